@@ -0,0 +1,400 @@
+"""Reproducible performance benchmarks for the Problem 2 / Problem 3 pipeline.
+
+Seeded generators build ring, grid, tree and planar (Delaunay) compound
+graphs with template-like area, household and rent distributions. Each stage
+of the pipeline is timed on every graph, and its peak traced memory is
+recorded in a separate pass. Results are written as JSON, and can be
+compared against an earlier results file::
+
+    python benchmark.py --sizes 1000,100000 --output bench.json
+    python benchmark.py --sizes 1000,100000 --compare bench.json --threshold 0.25
+
+``--compare`` exits with status 1 when any stage got slower than the
+baseline by more than the threshold.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from compound_graph import CompoundGraph
+
+GENERATORS = ('template', 'ring', 'grid', 'tree', 'planar')
+STAGES = ('load', 'rank', 'evaluate', 'evaluate_elementwise', 'nsga2', 'cluster', 'plot', 'export')
+
+# The elementwise problem loops over compounds in Python; larger graphs skip that stage
+ELEMENTWISE_MAX_SIZE = 100000
+ELEMENTWISE_INDIVIDUALS = 5
+
+# Differences below this many seconds are treated as noise when comparing runs
+MIN_REGRESSION_SECONDS = 0.01
+
+
+# ----- generators ------------------------------------------------------------
+
+def _attributes(rng, n):
+    """Area (m²), households and rent drawn to resemble the template table."""
+    area = np.clip(rng.lognormal(np.log(170), 0.8, n), 20, 5000).round()
+    households = np.maximum(1, rng.poisson(area / 40))
+    rent = np.clip(rng.lognormal(np.log(100), 0.25, n), 20, 400).round(1)
+    return area, households, rent
+
+
+def _graph_from_edges(rng, n, rows, cols):
+    """CompoundGraph with IDs 1..n and every edge listed by both endpoints."""
+    rows, cols = np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+    src = np.concatenate([rows, cols])
+    dst = np.concatenate([cols, rows])
+    order = np.lexsort((dst, src))
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(src, minlength=n))))
+    ids = np.arange(1, n + 1, dtype=np.int64)
+    area, households, rent = _attributes(rng, n)
+    return CompoundGraph.from_arrays(ids, area, households, rent, None, indptr, ids[dst[order]])
+
+
+def ring_graph(n, seed=0):
+    """Compounds in one cycle, like the template."""
+    rng = np.random.default_rng(seed)
+    i = np.arange(n)
+    if n < 3:
+        return _graph_from_edges(rng, n, i[:-1], i[1:])
+    return _graph_from_edges(rng, n, i, (i + 1) % n)
+
+
+def grid_graph(n, seed=0):
+    """Compounds on a near-square street grid (rook adjacency), filled row by row."""
+    rng = np.random.default_rng(seed)
+    width = max(1, int(np.ceil(np.sqrt(n))))
+    i = np.arange(n)
+    right = i[(i % width < width - 1) & (i + 1 < n)]
+    down = i[i + width < n]
+    return _graph_from_edges(rng, n, np.concatenate([right, down]), np.concatenate([right + 1, down + width]))
+
+
+def tree_graph(n, seed=0):
+    """Random recursive tree: every compound joins a uniformly chosen earlier one."""
+    rng = np.random.default_rng(seed)
+    child = np.arange(1, n)
+    parent = (rng.random(n - 1) * child).astype(np.int64)
+    return _graph_from_edges(rng, n, parent, child)
+
+
+def planar_graph(n, seed=0):
+    """Delaunay triangulation of uniformly scattered compound centroids."""
+    if n < 4:
+        return ring_graph(n, seed)
+    from scipy.spatial import Delaunay
+
+    rng = np.random.default_rng(seed)
+    simplices = Delaunay(rng.random((n, 2))).simplices
+    edges = np.concatenate([simplices[:, [0, 1]], simplices[:, [1, 2]], simplices[:, [0, 2]]])
+    edges = np.unique(np.sort(edges, axis=1), axis=0)
+    return _graph_from_edges(rng, n, edges[:, 0], edges[:, 1])
+
+
+def template_graph(n=None, seed=0):
+    """The 21-compound template table (size and seed are ignored)."""
+    from data_handler import load_compound_graph
+    return load_compound_graph("templates/compounds.csv")
+
+
+def make_graph(generator, n, seed=0):
+    builders = {'template': template_graph, 'ring': ring_graph, 'grid': grid_graph,
+                'tree': tree_graph, 'planar': planar_graph}
+    if generator not in builders:
+        raise ValueError(f"Unknown generator: {generator}")
+    return builders[generator](n, seed)
+
+
+# ----- stages ----------------------------------------------------------------
+# Each stage takes the shared context dict and returns the number of items it
+# processed (for per-item timings) or None. ``_prepare_*`` functions set up
+# untimed inputs.
+
+def _prepare_load(ctx):
+    from data_handler import save_compound_graph
+    ctx['csv_path'] = os.path.join(ctx['tmpdir'], 'compounds.csv')
+    save_compound_graph(ctx['graph'], ctx['csv_path'])
+
+
+def _stage_load(ctx):
+    from data_handler import load_compound_graph
+    load_compound_graph(ctx['csv_path'])
+    return len(ctx['graph'])
+
+
+def _stage_rank(ctx):
+    from problem_two import compute_problem_two
+    ctx['sorted_df'], ctx['feasible_sequence'] = compute_problem_two(ctx['graph'], ctx['params'])
+    return len(ctx['graph'])
+
+
+def _prepare_evaluate(ctx):
+    from problem_three import VectorizedUrbanRenewalProblem
+    from operators import ConnectedZoneSampling
+    problem = VectorizedUrbanRenewalProblem(ctx['graph'], ctx['params'])
+    np.random.seed(ctx['seed'])
+    ctx['population'] = ConnectedZoneSampling()._do(problem, int(ctx['params']['population_size']))
+    ctx['problem'] = problem
+
+
+def _stage_evaluate(ctx):
+    ctx['problem'].evaluator.evaluate(ctx['population'])
+    return len(ctx['population'])
+
+
+def _prepare_evaluate_elementwise(ctx):
+    if len(ctx['graph']) > ELEMENTWISE_MAX_SIZE:
+        return False
+    from problem_three import UrbanRenewalProblem
+    if 'population' not in ctx:
+        _prepare_evaluate(ctx)
+    ctx['elementwise_problem'] = UrbanRenewalProblem(ctx['graph'], ctx['params'])
+
+
+def _stage_evaluate_elementwise(ctx):
+    problem = ctx['elementwise_problem']
+    population = ctx['population'][:ELEMENTWISE_INDIVIDUALS]
+    for x in population:
+        problem._evaluate(x, {})
+    return len(population)
+
+
+def _stage_nsga2(ctx):
+    from problem_three import compute_problem_three
+    ctx['best_solution'], ctx['results'], ctx['front'] = compute_problem_three(ctx['graph'], ctx['params'])
+    return int(ctx['params']['population_size']) * int(ctx['params']['max_generations'])
+
+
+def _prepare_cluster(ctx):
+    rng = np.random.default_rng(ctx['seed'])
+    graph = ctx['graph']
+    ctx['cluster_ids'] = graph.ids[rng.random(len(graph)) < 0.1].tolist() or graph.ids[:1].tolist()
+
+
+def _stage_cluster(ctx):
+    from connectivity import cluster_groups
+    cluster_groups(ctx['graph'], ctx['cluster_ids'])
+    return len(ctx['cluster_ids'])
+
+
+def _prepare_front(ctx):
+    """Plotting and export need a front; without the nsga2 stage, use a random one."""
+    if 'front' not in ctx:
+        rng = np.random.default_rng(ctx['seed'])
+        ctx['front'] = np.column_stack([-rng.integers(2, 50, 100), rng.random(100) * 1e6, -rng.random(100) * 50])
+
+
+def _stage_plot(ctx):
+    from utils import plot_pareto_front
+    plot_pareto_front(ctx['front'], os.path.join(ctx['tmpdir'], 'pareto_front.png'))
+    return len(ctx['front'])
+
+
+def _prepare_export(ctx):
+    _prepare_front(ctx)
+    if 'sorted_df' not in ctx:
+        _stage_rank(ctx)
+
+
+def _stage_export(ctx):
+    from export import build_zip, problem_three_entries, problem_two_entries
+    entries = problem_two_entries(ctx['sorted_df'], ctx['feasible_sequence'])
+    if ctx.get('results') is not None:
+        entries += problem_three_entries(ctx['graph'], ctx['results'], ctx['front'], params=ctx['params'])
+    # Figures are timed by the plot stage
+    build_zip(entries, include=[name for name, _ in entries if not name.endswith('.png')])
+    return len(ctx['graph'])
+
+
+_STAGE_FUNCTIONS = {
+    'load': (_prepare_load, _stage_load),
+    'rank': (None, _stage_rank),
+    'evaluate': (_prepare_evaluate, _stage_evaluate),
+    'evaluate_elementwise': (_prepare_evaluate_elementwise, _stage_evaluate_elementwise),
+    'nsga2': (None, _stage_nsga2),
+    'cluster': (_prepare_cluster, _stage_cluster),
+    'plot': (_prepare_front, _stage_plot),
+    'export': (_prepare_export, _stage_export),
+}
+
+
+# ----- running -----------------------------------------------------------------
+
+def _measure(stage, ctx, repeat, memory):
+    """(best seconds, items, peak MB or None) of one stage."""
+    seconds = []
+    items = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = stage(ctx)
+        seconds.append(time.perf_counter() - start)
+    peak_mb = None
+    if memory:
+        # A separate traced pass, so tracing overhead does not distort the timings
+        tracemalloc.start()
+        try:
+            stage(ctx)
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return min(seconds), items, peak_mb
+
+
+def benchmark_graph(generator, size, stages, params, seed=0, repeat=1, memory=True):
+    """Benchmark rows (one per stage) for one generated graph."""
+    start = time.perf_counter()
+    graph = make_graph(generator, size, seed)
+    build_seconds = time.perf_counter() - start
+    logging.getLogger(__name__).info("Built %s graph: %s in %.2f s", generator, graph, build_seconds)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ctx = {'graph': graph, 'params': params, 'seed': seed, 'tmpdir': tmpdir}
+        for name in stages:
+            prepare, stage = _STAGE_FUNCTIONS[name]
+            row = {'generator': generator, 'size': len(graph), 'edges': int(len(graph.indices)), 'stage': name}
+            try:
+                if prepare is not None and prepare(ctx) is False:
+                    row['skipped'] = True
+                    rows.append(row)
+                    continue
+                seconds, items, peak_mb = _measure(stage, ctx, repeat, memory)
+                row['seconds'] = seconds
+                if items:
+                    row['per_item_seconds'] = seconds / items
+                row['peak_mb'] = peak_mb
+            except Exception as e:
+                row['error'] = f"{type(e).__name__}: {e}"
+            rows.append(row)
+    return rows
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(generators, sizes, stages, params, seed=0, repeat=1, memory=True):
+    """Benchmark every generator at every size; the template runs once at its own size."""
+    # Import the pipeline up front, so module loading is not timed as part of the first graph's stages
+    import matplotlib.pyplot  # noqa: F401
+    import connectivity, data_handler, operators, problem_three, problem_two, utils  # noqa: F401, E401
+    rows = []
+    for generator in generators:
+        for size in (sizes[:1] if generator == 'template' else sizes):
+            rows.extend(benchmark_graph(generator, size, stages, params, seed, repeat, memory))
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'seed': seed,
+            'repeat': repeat,
+            'params': params
+        },
+        'results': rows
+    }
+
+
+def compare(results, baseline, threshold):
+    """Rows of (key, baseline seconds, seconds, ratio, regressed) for stages present in both runs."""
+    def timings(data):
+        return {(r['generator'], r['size'], r['stage']): r['seconds'] for r in data['results'] if 'seconds' in r}
+
+    before = timings(baseline)
+    rows = []
+    for key, seconds in timings(results).items():
+        if key not in before:
+            continue
+        base = before[key]
+        ratio = seconds / base if base > 0 else float('inf')
+        regressed = seconds > base * (1 + threshold) and seconds - base > MIN_REGRESSION_SECONDS
+        rows.append((key, base, seconds, ratio, regressed))
+    return rows
+
+
+def _print_results(data):
+    print(f"{'generator':<10} {'size':>9} {'stage':<21} {'seconds':>10} {'per item':>10} {'peak MB':>9}")
+    for r in data['results']:
+        if 'seconds' not in r:
+            status = r.get('error') or 'skipped'
+            print(f"{r['generator']:<10} {r['size']:>9} {r['stage']:<21} {status}")
+            continue
+        per_item = f"{r['per_item_seconds']:.2e}" if 'per_item_seconds' in r else ''
+        peak = f"{r['peak_mb']:.1f}" if r.get('peak_mb') is not None else ''
+        print(f"{r['generator']:<10} {r['size']:>9} {r['stage']:<21} {r['seconds']:>10.4f} {per_item:>10} {peak:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Problem 2/3 pipeline on synthetic compound graphs.")
+    parser.add_argument('--generators', default=','.join(GENERATORS),
+                        help=f"comma-separated graph generators (default: {','.join(GENERATORS)})")
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help="comma-separated compound counts, up to 1000000 (default: 1000,10000,100000)")
+    parser.add_argument('--stages', default=','.join(STAGES), help="comma-separated stages (default: all)")
+    parser.add_argument('--seed', type=int, default=0, help="generator seed (default: 0)")
+    parser.add_argument('--repeat', type=int, default=1, help="timed runs per stage; the fastest is kept (default: 1)")
+    parser.add_argument('--population-size', type=int, default=20, help="NSGA-II population (default: 20)")
+    parser.add_argument('--generations', type=int, default=5, help="NSGA-II generations (default: 5)")
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help="override a config.json parameter (value parsed as JSON)")
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced pass that records peak memory")
+    parser.add_argument('--output', default='benchmark_results.json', help="results file (default: benchmark_results.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="results file of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative slowdown that counts as a regression (default: 0.2)")
+    parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+
+    from cli import _parse_override
+    from data_handler import load_params
+
+    generators = [g for g in args.generators.split(',') if g]
+    stages = [s for s in args.stages.split(',') if s]
+    unknown = [name for name in generators if name not in GENERATORS] + [name for name in stages if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown generator or stage: {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+
+    params = load_params()
+    params.update(population_size=args.population_size, max_generations=args.generations, instrument=False,
+                  checkpoint_path='')
+    params.update(dict(_parse_override(text) for text in args.set))
+
+    data = run_benchmarks(generators, sizes, stages, params, args.seed, args.repeat, not args.no_memory)
+    with open(args.output, 'w') as f:
+        json.dump(data, f, indent=4)
+    _print_results(data)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(data, baseline, args.threshold)
+        regressions = [row for row in rows if row[4]]
+        print(f"\nCompared with {args.compare} (commit {baseline['meta'].get('commit')}), "
+              f"threshold {args.threshold:.0%}:")
+        for (generator, size, stage), base, seconds, ratio, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{generator:<10} {size:>9} {stage:<21} {base:>10.4f} -> {seconds:>10.4f} ({ratio:.2f}x){flag}")
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+from pymoo.core.callback import Callback
+from pymoo.core.sampling import Sampling
+from compound_graph import as_compound_graph
+from connectivity import count_components
+from genome import decode, encode
+from result_cache import result_key
+
+logger = logging.getLogger(__name__)
+
+# Parameters that do not change the search itself, so a checkpoint written
+# under other values of these can be resumed rather than merely warm-started
+RESUME_IGNORED_PARAMS = ('max_generations', 'target_m', 'archive_size', 'checkpoint_path', 'warm_start',
+                         'seed_problem_two', 'warm_start_generations')
+
+
+def run_signature(graph, params):
+    """Hash of the compound table and the search parameters a checkpoint must share to be resumed."""
+    return result_key('problem3', graph, {name: value for name, value in params.items()
+                                          if name not in RESUME_IGNORED_PARAMS})
+
+
+def _pack(graph, X):
+    """Vacated compound IDs of every row of X, as (ids, offsets) arrays."""
+    mask = np.asarray(X) != 0
+    offsets = np.concatenate(([0], np.cumsum(mask.sum(axis=1)))).astype(np.int64)
+    return graph.ids[np.nonzero(mask)[1]].astype(np.int64), offsets
+
+
+def _unpack(ids, offsets):
+    return [ids[offsets[k]:offsets[k + 1]] for k in range(len(offsets) - 1)]
+
+
+def save_checkpoint(path, graph, params, population, archive=None, generation=0):
+    """Write the population (and archive front) of a run to ``path`` as compound-ID lists.
+
+    Zones are stored by compound ID rather than by position, so a checkpoint
+    stays usable after rows are added, removed or reordered. The file is
+    written to a temporary name and renamed, so readers never see a partial
+    checkpoint.
+    """
+    arrays = {}
+    arrays['population_ids'], arrays['population_offsets'] = _pack(graph, population)
+    archive = np.zeros((0, len(graph))) if archive is None else archive
+    arrays['archive_ids'], arrays['archive_offsets'] = _pack(graph, archive)
+    meta = {'generation': int(generation), 'signature': run_signature(graph, params)}
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.warning("Could not write checkpoint %s: %s", path, e)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return
+    logger.info("Saved checkpoint %s: generation %d, %d individuals, %d archived",
+                path, generation, len(population), len(archive))
+
+
+def load_checkpoint(path):
+    """Checkpoint saved by ``save_checkpoint`` as a dict of zone-ID lists, or None if there is none."""
+    try:
+        with np.load(path) as data:
+            checkpoint = json.loads(str(data['meta']))
+            checkpoint['population'] = _unpack(data['population_ids'], data['population_offsets'])
+            checkpoint['archive'] = _unpack(data['archive_ids'], data['archive_offsets'])
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignoring unreadable checkpoint %s: %s", path, e)
+        return None
+    return checkpoint
+
+
+def prune_checkpoints(directory, max_runs=32, max_age=24 * 3600, keep=()):
+    """Delete run subdirectories of ``directory`` older than ``max_age`` seconds and the oldest beyond ``max_runs``.
+
+    Each session checkpoints into its own subdirectory, which nothing else
+    removes; this keeps the checkpoint directory bounded. Age is the last
+    modification (every checkpoint write renames a file into the
+    subdirectory). Paths in ``keep`` are never removed. Returns the number
+    of subdirectories removed.
+    """
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.is_dir()]
+    except FileNotFoundError:
+        return 0
+    keep = {os.path.abspath(path) for path in keep}
+    runs = sorted(((entry.stat().st_mtime, entry.path) for entry in entries
+                   if os.path.abspath(entry.path) not in keep), reverse=True)
+    removed = 0
+    for rank, (mtime, path) in enumerate(runs):
+        if rank + len(keep) >= max_runs or time.time() - mtime > max_age:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info("Removed checkpoint directory %s", path)
+            removed += 1
+    return removed
+
+
+def zones_to_rows(zones, graph):
+    """Population matrix of the zones (lists of compound IDs) that are still valid on ``graph``.
+
+    A zone is dropped if any of its compounds is no longer in the table, if
+    it has fewer than two compounds, or if it is no longer one contiguous
+    zone under the current adjacency. Duplicates are kept only once.
+    """
+    graph = as_compound_graph(graph)
+    rows, seen = [], set()
+    for zone in zones:
+        positions = graph.index_of(np.asarray(zone, dtype=np.int64))
+        if len(positions) < 2 or np.any(positions < 0):
+            continue
+        key = tuple(np.sort(positions).tolist())
+        if key in seen or count_components(graph, positions) != 1:
+            continue
+        seen.add(key)
+        row = np.zeros(len(graph))
+        row[positions] = 1
+        rows.append(row)
+    return np.array(rows).reshape(len(rows), len(graph))
+
+
+def problem_two_seeds(graph, params, n):
+    """Up to n zones taken as prefixes of Problem 2's best-rho frontier growth.
+
+    Growth starts from the ``max(1, n // 10)`` compounds with the highest
+    rho; each growth sequence contributes prefixes at log-spaced sizes, so
+    the seeds cover small and large zones. Every prefix is contiguous.
+    """
+    from problem_two import compute_rho, grow_frontier
+
+    graph = as_compound_graph(graph)
+    if n <= 0 or len(graph) < 2:
+        return np.zeros((0, len(graph)))
+    n_starts = min(max(1, n // 10), len(graph))
+    per_start = -(-n // n_starts)
+    starts = graph.ids[np.argsort(-compute_rho(graph, params), kind='stable')[:n_starts]]
+    zones = []
+    for start in starts.tolist():
+        ids = grow_frontier(graph, params, start=start)['id'].to_numpy()
+        if len(ids) < 2:
+            continue
+        sizes = np.unique(np.geomspace(2, len(ids), num=per_start).astype(int))
+        zones.extend(ids[:size] for size in sizes.tolist())
+    X = zones_to_rows(zones, graph)
+    return X[:n]
+
+
+class WarmStart:
+    """Seeds for a Problem 3 run taken from a checkpoint and/or Problem 2 growth.
+
+    ``resumed`` is True when the checkpoint was written for the same table
+    and search parameters; the run then continues for the generations left
+    of ``max_generations``. After an edit it runs ``warm_start_generations``
+    (all of ``max_generations`` when 0) from the surviving individuals.
+    """
+
+    def __init__(self, graph, params):
+        pop_size = int(params.get('population_size', 20))
+        max_generations = int(params.get('max_generations', 50))
+        self.generation = 0
+        self.resumed = False
+        self.population = np.zeros((0, len(graph)))
+        self.archive = np.zeros((0, len(graph)))
+        self.generations = max_generations
+
+        path = params.get('checkpoint_path')
+        checkpoint = load_checkpoint(path) if path and params.get('warm_start', False) else None
+        if checkpoint is not None:
+            self.population = zones_to_rows(checkpoint['population'], graph)
+            self.archive = zones_to_rows(checkpoint['archive'], graph)
+            self.resumed = checkpoint['signature'] == run_signature(graph, params)
+            if self.resumed:
+                self.generation = checkpoint['generation']
+                self.generations = max(max_generations - self.generation, 1)
+            elif int(params.get('warm_start_generations', 0)) > 0:
+                self.generations = min(int(params['warm_start_generations']), max_generations)
+            logger.info("%s from %s: %d of %d individuals and %d of %d archived zones still valid",
+                        "Resuming" if self.resumed else "Warm-starting", path, len(self.population),
+                        len(checkpoint['population']), len(self.archive), len(checkpoint['archive']))
+
+        if params.get('seed_problem_two', False) and len(self.population) < pop_size:
+            seeds = problem_two_seeds(graph, params, pop_size - len(self.population))
+            logger.info("Seeding %d individuals from Problem 2 growth prefixes", len(seeds))
+            self.population = np.vstack([self.population, seeds])
+
+    def report(self):
+        return {'resumed': self.resumed, 'from_generation': self.generation, 'seeds': len(self.population),
+                'archived': len(self.archive), 'generations': self.generations}
+
+    def sampling(self, fallback):
+        """Initial sampling: the seeds first, topped up by ``fallback``."""
+        return SeededSampling(self.population, fallback) if len(self.population) else fallback
+
+
+class SeededSampling(Sampling):
+    """Use the given rows as the first individuals and fill the rest with another sampling."""
+
+    def __init__(self, seeds, fallback):
+        super().__init__()
+        self.seeds = seeds
+        self.fallback = fallback
+
+    def _do(self, problem, n_samples, **kwargs):
+        seeds = encode(problem, self.seeds[:n_samples])
+        if len(seeds) == n_samples:
+            return seeds.copy()
+        rest = self.fallback._do(problem, n_samples - len(seeds), **kwargs)
+        return np.vstack([seeds, rest])
+
+
+class CheckpointCallback(Callback):
+    """Save the population and archive every ``every`` generations, then call the inner callback."""
+
+    def __init__(self, path, problem, params, every, archive, inner, first_generation=0):
+        super().__init__()
+        self.path = path
+        self.problem = problem
+        self.params = params
+        self.every = int(every)
+        self.archive = archive
+        self.inner = inner
+        self.first_generation = first_generation
+
+    def notify(self, algorithm):
+        if self.every > 0 and algorithm.n_gen % self.every == 0:
+            self.save(algorithm.pop.get('X'), algorithm.n_gen)
+        self.inner(algorithm)
+
+    def save(self, population, n_gen):
+        """Save genomes of the run's problem (dense or packed) with the current archive."""
+        archive = decode(self.problem, self.archive.X) if self.archive is not None and len(self.archive) else None
+        save_checkpoint(self.path, self.problem.graph, self.params, decode(self.problem, population), archive,
+                        self.first_generation + n_gen)
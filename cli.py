@@ -0,0 +1,159 @@
+"""Headless batch runner for Problem 2 / Problem 3.
+
+Each scenario is a directory holding ``compounds.csv`` (or ``compounds.parquet``
+/ ``compounds.npz``) and ``config.json`` (the same layout as ``templates/``). Results are written per scenario under
+the output directory, plus a ``summary.csv`` / ``summary.json`` across all
+scenarios::
+
+    python cli.py scenarios/a scenarios/b --mode both --jobs 4 --output results
+
+Heavy dependencies are imported lazily: pymoo only for Problem 3, and
+matplotlib only with ``--plot``, so a Problem 2 run starts quickly.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+MODES = {'2': ('2',), '3': ('3',), 'both': ('2', '3')}
+
+# Compound table formats, in the order they are looked up in a scenario directory
+COMPOUND_FORMATS = ('npz', 'parquet', 'csv')
+
+
+def _write_json(path, data):
+    from export import _to_builtin
+
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=4, default=_to_builtin)
+
+
+def run_scenario(scenario_dir, mode='both', output_dir='results', plot=False, overrides=None, name=None):
+    """Run the selected problems for one scenario directory and return a summary row."""
+    from data_handler import load_compound_graph
+    from problem_two import compute_problem_two
+
+    start_time = time.time()
+    name = name or os.path.basename(os.path.abspath(scenario_dir))
+    summary = {'scenario': name, 'path': scenario_dir, 'error': None}
+    try:
+        candidates = [os.path.join(scenario_dir, f"compounds.{ext}") for ext in COMPOUND_FORMATS]
+        compounds_path = next((path for path in candidates if os.path.exists(path)), candidates[0])
+        config_path = os.path.join(scenario_dir, 'config.json')
+        for path in (compounds_path, config_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Missing scenario file: {path}")
+        with open(config_path, 'r') as f:
+            params = json.load(f)
+        params.update(overrides or {})
+        graph = load_compound_graph(compounds_path)
+        summary['compounds'] = len(graph)
+
+        out = os.path.join(output_dir, name)
+        os.makedirs(out, exist_ok=True)
+
+        if '2' in MODES[mode]:
+            sorted_df, feasible_sequence = compute_problem_two(graph, params)
+            sorted_df.to_csv(os.path.join(out, 'sorting_results.csv'), index=False)
+            _write_json(os.path.join(out, 'feasible_sequence.json'), feasible_sequence)
+            summary['sequence_length'] = len(feasible_sequence)
+
+        if '3' in MODES[mode]:
+            from problem_three import compute_problem_three
+            best_solution, results, F = compute_problem_three(graph, params)
+            from export import front_index_npz, pareto_set_npz
+            _write_json(os.path.join(out, 'inflection_results.json'),
+                        {k: v for k, v in results.items() if k != 'pareto_set'})
+            with open(os.path.join(out, 'pareto_set.npz'), 'wb') as f:
+                f.write(pareto_set_npz(F, results['pareto_set'], graph.ids))
+            with open(os.path.join(out, 'front_index.npz'), 'wb') as f:
+                f.write(front_index_npz(graph, results, F, params))
+            with open(os.path.join(out, 'pareto_front.csv'), 'w') as f:
+                f.write('vacated,cost,m\n')
+                for row in F:
+                    f.write(f"{-row[0]:.6g},{row[1]:.10g},{-row[2]:.10g}\n")
+            for key in ('m', 'vacated_compounds', 'households', 'cost', 'area', 'profit'):
+                summary[key] = results[key]
+            if plot:
+                from utils import plot_pareto_front
+                plot_pareto_front(F, os.path.join(out, 'pareto_front.png'))
+    except Exception as e:
+        summary['error'] = f"{type(e).__name__}: {e}"
+    summary['seconds'] = time.time() - start_time
+    return summary
+
+
+def _write_summary(rows, output_dir):
+    columns = []
+    for row in rows:
+        columns.extend(k for k in row if k not in columns)
+    with open(os.path.join(output_dir, 'summary.csv'), 'w') as f:
+        f.write(','.join(columns) + '\n')
+        for row in rows:
+            f.write(','.join(_csv_field(row.get(k)) for k in columns) + '\n')
+    _write_json(os.path.join(output_dir, 'summary.json'), rows)
+
+
+def _csv_field(value):
+    if value is None:
+        return ''
+    text = str(value)
+    return '"' + text.replace('"', '""') + '"' if any(c in text for c in ',"\n') else text
+
+
+def _scenario_names(paths):
+    """Output folder name per scenario; repeated directory names get a numeric suffix."""
+    names, seen = [], {}
+    for path in paths:
+        base = os.path.basename(os.path.abspath(path))
+        seen[base] = seen.get(base, 0) + 1
+        names.append(base if seen[base] == 1 else f"{base}_{seen[base]}")
+    return names
+
+
+def _parse_override(text):
+    key, _, value = text.partition('=')
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Problem 2/3 headlessly over scenario directories.")
+    parser.add_argument('scenarios', nargs='+', help="directories containing compounds.csv/.parquet/.npz and config.json")
+    parser.add_argument('--mode', choices=sorted(MODES), default='both', help="problems to run (default: both)")
+    parser.add_argument('--output', default='results', help="output directory (default: results)")
+    parser.add_argument('--jobs', type=int, default=1, help="scenarios to run in parallel (default: 1)")
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help="override a config.json parameter (value parsed as JSON), e.g. --set max_generations=50")
+    parser.add_argument('--plot', action='store_true', help="also write pareto_front.png for Problem 3")
+    parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="logging level for run details (default: WARNING)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+
+    overrides = dict(_parse_override(text) for text in args.set)
+    os.makedirs(args.output, exist_ok=True)
+    names = _scenario_names(args.scenarios)
+    run_args = [(path, args.mode, args.output, args.plot, overrides, name)
+                for path, name in zip(args.scenarios, names)]
+
+    if args.jobs > 1 and len(run_args) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            rows = list(executor.map(run_scenario, *zip(*run_args)))
+    else:
+        rows = [run_scenario(*a) for a in run_args]
+
+    _write_summary(rows, args.output)
+    for row in rows:
+        status = f"error: {row['error']}" if row['error'] else "ok"
+        print(f"{row['scenario']}: {status} ({row['seconds']:.2f} s)")
+    return 1 if any(row['error'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
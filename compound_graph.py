@@ -0,0 +1,476 @@
+import ast
+import hashlib
+import logging
+import re
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALPHA = 50.0
+
+
+class CompoundGraph:
+    """Immutable, array-backed compound table with a CSR adjacency structure.
+
+    Compound attributes are stored as NumPy columns indexed by position
+    (0..n-1). Adjacency is kept in CSR form: the neighbours of compound i are
+    ``indices[indptr[i]:indptr[i + 1]]`` (positions, not IDs).
+    """
+
+    __slots__ = ('ids', 'area', 'households', 'rent', 'alpha', 'indptr', 'indices', '_id_index', '_cache')
+
+    def __init__(self, ids, area, households, rent, alpha, indptr, indices):
+        columns = {
+            'ids': np.asarray(ids, dtype=np.int64),
+            'area': np.asarray(area, dtype=float),
+            'households': np.asarray(households, dtype=np.int64),
+            'rent': np.asarray(rent, dtype=float),
+            'alpha': np.asarray(alpha, dtype=float),
+            'indptr': np.asarray(indptr, dtype=np.int64),
+            'indices': np.asarray(indices),
+        }
+        n = len(columns['ids'])
+        for name in ('area', 'households', 'rent', 'alpha'):
+            if columns[name].shape != (n,):
+                raise ValueError(f"Column {name} must have one value per compound")
+        if columns['indptr'].shape != (n + 1,) or columns['indptr'][-1] != len(columns['indices']):
+            raise ValueError("Malformed adjacency: indptr does not match indices")
+        if columns['indptr'][0] != 0 or np.any(np.diff(columns['indptr']) < 0):
+            raise ValueError("Malformed adjacency: indptr must start at 0 and be non-decreasing")
+        if len(columns['indices']) and (columns['indices'].min() < 0 or columns['indices'].max() >= n):
+            raise ValueError("Malformed adjacency: neighbour index out of range")
+        # Checked before narrowing, so out-of-range indices cannot wrap into range
+        columns['indices'] = columns['indices'].astype(_index_dtype(n), copy=False)
+
+        for name, arr in columns.items():
+            arr.setflags(write=False)
+            object.__setattr__(self, name, arr)
+        object.__setattr__(self, '_id_index', _IdIndex(columns['ids']))
+        object.__setattr__(self, '_cache', {})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompoundGraph is immutable")
+
+    def __reduce__(self):
+        # Rebuild through __init__ (the immutable __setattr__ blocks the default slot restore)
+        return (CompoundGraph, tuple(getattr(self, name) for name in NPZ_ARRAYS))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return f"CompoundGraph(n={len(self)}, edges={len(self.indices)})"
+
+    # ----- construction -------------------------------------------------
+
+    @classmethod
+    def from_arrays(cls, ids, area, households, rent, alpha, adj_indptr, adj_ids, strict=True):
+        """Build a graph from columns and a flat list of adjacent IDs with offsets."""
+        ids = np.asarray(ids, dtype=np.int64)
+        adj_indptr = np.asarray(adj_indptr, dtype=np.int64)
+        adj_ids = np.asarray(adj_ids, dtype=np.int64)
+        if alpha is None:
+            alpha = np.full(len(ids), DEFAULT_ALPHA)
+        elif np.ndim(alpha) == 0:
+            alpha = np.full(len(ids), float(alpha))
+
+        indices = _IdIndex(ids).index_of(adj_ids)
+        invalid = indices < 0
+        if invalid.any():
+            owner = np.searchsorted(adj_indptr, np.flatnonzero(invalid), side='right') - 1
+            if strict:
+                first = np.flatnonzero(invalid)[0]
+                raise ValueError(f"Invalid adjacent ID {adj_ids[first]} in compound {ids[owner[0]]}")
+            for bad, cid in zip(adj_ids[invalid], ids[owner]):
+                logger.warning("Invalid adjacent ID %s in compound %s", bad, cid)
+            counts = np.diff(adj_indptr) - np.bincount(owner, minlength=len(ids))
+            adj_indptr = np.concatenate(([0], np.cumsum(counts)))
+            indices = indices[~invalid]
+
+        return cls(ids, area, households, rent, alpha, adj_indptr, indices)
+
+    @classmethod
+    def from_compounds(cls, compounds, strict=True):
+        """Build a graph from the legacy list-of-dicts representation."""
+        if isinstance(compounds, cls):
+            return compounds
+        n = len(compounds)
+        counts = np.zeros(n, dtype=np.int64)
+        adj_ids = []
+        for i, c in enumerate(compounds):
+            if not all(key in c for key in ['area', 'households', 'rent', 'id', 'adjacent']):
+                raise KeyError(f"Missing required keys in compound {c.get('id', 'unknown')}")
+            adjacent = c['adjacent']
+            if isinstance(adjacent, str):
+                try:
+                    adjacent = ast.literal_eval(adjacent)
+                except Exception as e:
+                    raise ValueError(f"Failed to parse adjacent for compound {c['id']}: {adjacent}, error: {e}")
+            if not isinstance(adjacent, list):
+                raise ValueError(f"Adjacent must be a list in compound {c['id']}")
+            counts[i] = len(adjacent)
+            adj_ids.extend(adjacent)
+        return cls.from_arrays(
+            ids=[c['id'] for c in compounds],
+            area=[c['area'] for c in compounds],
+            households=[c['households'] for c in compounds],
+            rent=[c['rent'] for c in compounds],
+            alpha=[c.get('alpha', DEFAULT_ALPHA) for c in compounds],
+            adj_indptr=np.concatenate(([0], np.cumsum(counts))),
+            adj_ids=np.array(adj_ids, dtype=np.int64),
+            strict=strict
+        )
+
+    @classmethod
+    def from_frame(cls, df, strict=True):
+        """Build a graph from a DataFrame with id, area, households, adjacent and rent columns."""
+        return cls.from_chunks([df], strict=strict)
+
+    @classmethod
+    def from_chunks(cls, chunks, strict=True):
+        """Build a graph from an iterable of row chunks (DataFrames or ``frame_columns`` dicts).
+
+        Each chunk is parsed into flat arrays as it arrives, so only the
+        arrays (not the source text) of the whole table are held in memory.
+        Adjacent IDs are validated once all chunks are read.
+        """
+        parts = []
+        offset = 0
+        for chunk in chunks:
+            part = chunk if isinstance(chunk, dict) else frame_columns(chunk, row_offset=offset)
+            offset += len(part['ids'])
+            parts.append(part)
+        if not parts:
+            parts = [frame_columns(None)]
+        columns = {name: np.concatenate([p[name] for p in parts])
+                   for name in ('ids', 'area', 'households', 'rent', 'alpha', 'counts', 'adj_ids')}
+        return cls.from_arrays(
+            ids=columns['ids'],
+            area=columns['area'],
+            households=columns['households'],
+            rent=columns['rent'],
+            alpha=columns['alpha'],
+            adj_indptr=np.concatenate(([0], np.cumsum(columns['counts']))),
+            adj_ids=columns['adj_ids'],
+            strict=strict
+        )
+
+    @classmethod
+    def from_npz(cls, file):
+        """Load a graph saved by ``save_npz`` (CSR adjacency by position, no parsing)."""
+        with np.load(file) as data:
+            missing = [name for name in NPZ_ARRAYS if name not in data]
+            if missing:
+                raise KeyError(f"Missing arrays in compound NPZ file: {missing}")
+            return cls(*(data[name] for name in NPZ_ARRAYS))
+
+    def save_npz(self, file):
+        """Save the graph columns and CSR adjacency as an uncompressed NPZ archive."""
+        np.savez(file, **{name: getattr(self, name) for name in NPZ_ARRAYS})
+
+    # ----- id <-> index mapping ----------------------------------------
+
+    def index_of(self, ids):
+        """Map compound IDs to positions; unknown IDs map to -1 (vectorized)."""
+        if np.ndim(ids) == 0:
+            return int(self._id_index.index_of(np.array([ids], dtype=np.int64))[0])
+        return self._id_index.index_of(np.asarray(ids, dtype=np.int64))
+
+    # ----- adjacency -----------------------------------------------------
+
+    def neighbors(self, i):
+        """Positions of the compounds adjacent to position i."""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def neighbor_ids(self, i):
+        """IDs of the compounds adjacent to position i."""
+        return self.ids[self.neighbors(i)]
+
+    @property
+    def degree(self):
+        return np.diff(self.indptr)
+
+    def adjacency_matrix(self):
+        """Sparse n x n adjacency matrix (duplicate entries are summed)."""
+        if 'adjacency' not in self._cache:
+            from scipy.sparse import csr_matrix
+            n = len(self)
+            # Copies keep the graph's own arrays read-only while scipy canonicalizes in place
+            adjacency = csr_matrix(
+                (np.ones(len(self.indices)), self.indices.copy(), self.indptr.copy()), shape=(n, n))
+            adjacency.sum_duplicates()
+            self._cache['adjacency'] = adjacency
+        return self._cache['adjacency']
+
+    def undirected_adjacency(self):
+        """Symmetric 0/1 adjacency without self-loops (an edge listed by either endpoint counts)."""
+        if 'undirected' not in self._cache:
+            A = self.adjacency_matrix()
+            undirected = (A + A.T).tolil()
+            undirected.setdiag(0)
+            undirected = undirected.tocsr()
+            undirected.eliminate_zeros()
+            undirected.data[:] = 1
+            undirected.sort_indices()
+            self._cache['undirected'] = undirected
+        return self._cache['undirected']
+
+    def is_symmetric(self):
+        """True if every adjacency is listed by both endpoints."""
+        A = self.adjacency_matrix()
+        A = (A > 0).astype(np.int8)
+        return (A != A.T).nnz == 0
+
+    def fingerprint(self):
+        """Hex digest of the full table content (IDs, attributes and adjacency), for content-addressed caching."""
+        if 'digest' not in self._cache:
+            # alpha is excluded here because with_alpha() copies share this cache
+            digest = hashlib.sha256()
+            for name in ('ids', 'area', 'households', 'rent', 'indptr', 'indices'):
+                arr = getattr(self, name)
+                digest.update(f"{name}:{arr.dtype.str}:{arr.shape}".encode())
+                digest.update(arr.tobytes())
+            self._cache['digest'] = digest.digest()
+        digest = hashlib.sha256(self._cache['digest'])
+        digest.update(self.alpha.tobytes())
+        return digest.hexdigest()
+
+    def subgraph(self, positions):
+        """Graph of the compounds at ``positions`` (in that order); adjacency leaving the selection is dropped."""
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1)
+        k = len(positions)
+        owner, neighbors = gather_rows(self.indptr, self.indices, positions)
+        local = np.full(len(self), -1, dtype=np.int64)
+        local[positions] = np.arange(k)
+        neighbors = local[neighbors]
+        inside = neighbors >= 0
+        counts = np.bincount(owner[inside], minlength=k)
+        return CompoundGraph(self.ids[positions], self.area[positions], self.households[positions],
+                             self.rent[positions], self.alpha[positions],
+                             np.concatenate(([0], np.cumsum(counts))), neighbors[inside])
+
+    def with_alpha(self, alpha):
+        """Copy of the graph with a different (scalar or per-compound) alpha; other columns are shared."""
+        alpha = np.broadcast_to(np.asarray(alpha, dtype=float), self.alpha.shape).copy()
+        graph = CompoundGraph.__new__(CompoundGraph)
+        for name in self.__slots__:
+            object.__setattr__(graph, name, getattr(self, name))
+        alpha.setflags(write=False)
+        object.__setattr__(graph, 'alpha', alpha)
+        object.__setattr__(graph, '_cache', self._cache)  # cached structures do not depend on alpha
+        return graph
+
+    # ----- per-compound economics --------------------------------------
+
+    def relocation_cost(self, params):
+        """Relocation cost of each compound."""
+        return (self.households * params['cost_per_household']).astype(float)
+
+    def rent_gain(self, params):
+        """Rent gain of each compound over the investment horizon."""
+        return self.area * (self.alpha - 1) * self.rent * params['years']
+
+    # ----- conversion ----------------------------------------------------
+
+    def to_compounds(self):
+        """Legacy list-of-dicts representation."""
+        return [
+            {
+                'id': int(self.ids[i]),
+                'area': float(self.area[i]),
+                'households': int(self.households[i]),
+                'adjacent': self.neighbor_ids(i).tolist(),
+                'rent': float(self.rent[i]),
+                'alpha': float(self.alpha[i])
+            } for i in range(len(self))
+        ]
+
+    def to_frame(self):
+        """DataFrame in the compounds.csv layout (adjacent as a list string), plus per-compound alpha."""
+        import pandas as pd
+        return pd.DataFrame({
+            'id': self.ids,
+            'area': self.area,
+            'households': self.households,
+            'adjacent': [str(self.neighbor_ids(i).tolist()) for i in range(len(self))],
+            'rent': self.rent,
+            'alpha': self.alpha
+        })
+
+
+REQUIRED_COLUMNS = ('id', 'area', 'households', 'adjacent', 'rent')
+
+NPZ_ARRAYS = ('ids', 'area', 'households', 'rent', 'alpha', 'indptr', 'indices')
+
+_INT64 = np.iinfo(np.int64)
+
+# A plain "[1, 2, 3]" list of integers; anything else falls back to ast.literal_eval
+_ADJACENT_PATTERN = r'\s*\[\s*(?:-?\d+\s*(?:,\s*-?\d+\s*)*)?\]\s*'
+
+
+def parse_adjacency(values, ids=None):
+    """Parse adjacent-ID lists into per-row counts and one flat array of adjacent IDs.
+
+    Values are "[2, 5]"-style strings or sequences. Well-formed strings are
+    validated with one vectorized regex match and then parsed together at the
+    byte level; other values are parsed one by one.
+    """
+    import pandas as pd
+    values = pd.Series(values, dtype=object).reset_index(drop=True)
+    n = len(values)
+    is_str = np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=n)
+    fast = np.zeros(n, dtype=bool)
+    if is_str.any():
+        fast[is_str] = values[is_str].str.fullmatch(_ADJACENT_PATTERN, flags=re.ASCII).to_numpy(dtype=bool)
+    counts = np.zeros(n, dtype=np.int64)
+    counts[fast], flat = _parse_plain_lists(values[fast].tolist())
+    # The byte-level parse saturates at the int64 limits; re-check rows holding them one by one
+    row_of = np.repeat(np.flatnonzero(fast), counts[fast])
+    for k in np.unique(row_of[(flat == _INT64.max) | (flat == _INT64.min)]).tolist():
+        _adjacent_ids(ast.literal_eval(values[k]), ids[k] if ids is not None else f"row {k}")
+    if fast.all():
+        return counts, flat
+
+    # Mixed input: parse the remaining rows individually and merge in row order
+    rows = np.split(flat, np.cumsum(counts[fast])[:-1]) if fast.any() else []
+    merged = [None] * n
+    for k, row in zip(np.flatnonzero(fast), rows):
+        merged[k] = row
+    for k in np.flatnonzero(~fast):
+        adjacent = values[k]
+        label = ids[k] if ids is not None else f"row {k}"
+        if isinstance(adjacent, str):
+            try:
+                adjacent = ast.literal_eval(adjacent)
+            except Exception as e:
+                raise ValueError(f"Failed to parse adjacent for compound {label}: {adjacent}, error: {e}")
+        if not isinstance(adjacent, (list, tuple, np.ndarray)):
+            raise ValueError(f"Adjacent must be a list in compound {label}")
+        merged[k] = _adjacent_ids(adjacent, label)
+        counts[k] = len(merged[k])
+    return counts, np.concatenate(merged) if n else flat
+
+
+def _adjacent_ids(adjacent, label):
+    """One compound's adjacent IDs as int64, rejecting fractional, non-numeric and out-of-range values."""
+    ids = []
+    for value in np.asarray(adjacent, dtype=object).reshape(-1):
+        if isinstance(value, (float, np.floating)) and float(value).is_integer():
+            value = int(value)
+        if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, np.integer)):
+            raise ValueError(f"Adjacent IDs must be integers in compound {label}: {adjacent}")
+        if not _INT64.min <= value <= _INT64.max:
+            raise ValueError(f"Adjacent ID {value} is out of the int64 range in compound {label}")
+        ids.append(value)
+    return np.array(ids, dtype=np.int64)
+
+
+def _parse_plain_lists(texts):
+    """Counts and flat IDs of strings already known to match _ADJACENT_PATTERN."""
+    data = np.frombuffer(';'.join(texts).encode('ascii'), dtype=np.uint8)
+    numeric = ((data >= ord('0')) & (data <= ord('9'))) | (data == ord('-'))
+    starts = numeric & ~np.concatenate(([False], numeric[:-1]))
+    row = np.cumsum(data == ord(';'))
+    counts = np.bincount(row[starts], minlength=len(texts)).astype(np.int64)
+    if not counts.sum():
+        return counts, np.zeros(0, dtype=np.int64)
+    # Blank out brackets, commas and separators, then parse every integer in one pass
+    flat = np.fromstring(np.where(numeric, data, ord(' ')).astype(np.uint8).tobytes(), dtype=np.int64, sep=' ')
+    if len(flat) != counts.sum():
+        raise ValueError("Could not parse adjacent IDs (value out of the int64 range?)")
+    return counts, flat
+
+
+def _numeric_column(df, name, dtype, row_offset=0):
+    """Column as a NumPy array, rejecting missing, non-numeric (and, for ints, fractional) values."""
+    import pandas as pd
+    column = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+    bad = ~np.isfinite(column)
+    if dtype is np.int64:
+        bad |= column != np.round(column)
+    if bad.any():
+        k = int(np.flatnonzero(bad)[0])
+        raise ValueError(f"Invalid {name} value {df[name].iloc[k]!r} in row {row_offset + k}")
+    return column.astype(dtype)
+
+
+def frame_columns(df, row_offset=0, adjacency=None):
+    """Validated flat arrays (ids, area, households, rent, alpha, counts, adj_ids) of a compounds DataFrame.
+
+    ``adjacency`` may supply already flat (counts, adj_ids) arrays, in which
+    case the frame needs no adjacent column.
+    """
+    if df is None or len(df) == 0:
+        empty_int, empty_float = np.zeros(0, dtype=np.int64), np.zeros(0)
+        return {'ids': empty_int, 'area': empty_float, 'households': empty_int, 'rent': empty_float,
+                'alpha': empty_float, 'counts': empty_int, 'adj_ids': empty_int}
+    missing = [name for name in REQUIRED_COLUMNS if name not in df and not (name == 'adjacent' and adjacency)]
+    if missing:
+        raise KeyError(f"Missing required columns: {missing}")
+    ids = _numeric_column(df, 'id', np.int64, row_offset)
+    counts, adj_ids = adjacency if adjacency else parse_adjacency(df['adjacent'], ids)
+    return {
+        'ids': ids,
+        'area': _numeric_column(df, 'area', float, row_offset),
+        'households': _numeric_column(df, 'households', np.int64, row_offset),
+        'rent': _numeric_column(df, 'rent', float, row_offset),
+        'alpha': _numeric_column(df, 'alpha', float, row_offset) if 'alpha' in df
+        else np.full(len(ids), DEFAULT_ALPHA),
+        'counts': counts,
+        'adj_ids': adj_ids
+    }
+
+
+class _IdIndex:
+    """Dense id -> position table, falling back to binary search for sparse ID ranges."""
+
+    def __init__(self, ids):
+        n = len(ids)
+        self.id_min = int(ids.min()) if n else 0
+        span = int(ids.max()) - self.id_min + 1 if n else 0
+        self.lookup = None
+        self.sorted_ids = None
+        self.order = None
+        if span <= 4 * n + 1024:
+            self.lookup = np.full(span, -1, dtype=np.int64)
+            self.lookup[ids - self.id_min] = np.arange(n)
+            self.lookup.setflags(write=False)
+            if n and np.count_nonzero(self.lookup >= 0) != n:
+                raise ValueError("Duplicate compound IDs")
+        else:
+            self.order = np.argsort(ids, kind='stable')
+            self.sorted_ids = ids[self.order]
+            if np.any(self.sorted_ids[1:] == self.sorted_ids[:-1]):
+                raise ValueError("Duplicate compound IDs")
+
+    def index_of(self, ids):
+        if self.lookup is not None:
+            offset = ids - self.id_min
+            valid = (offset >= 0) & (offset < len(self.lookup))
+            out = np.full(len(ids), -1, dtype=np.int64)
+            out[valid] = self.lookup[offset[valid]]
+            return out
+        pos = np.searchsorted(self.sorted_ids, ids)
+        pos = np.minimum(pos, len(self.sorted_ids) - 1)
+        found = self.sorted_ids[pos] == ids if len(self.sorted_ids) else np.zeros(len(ids), dtype=bool)
+        return np.where(found, self.order[pos], -1)
+
+
+def gather_rows(indptr, indices, rows):
+    """(owner, neighbour) arrays of every CSR entry of the given rows; owner indexes ``rows``."""
+    rows = np.asarray(rows)
+    degree = indptr[rows + 1] - indptr[rows]
+    owner = np.repeat(np.arange(len(rows)), degree)
+    offsets = np.arange(int(degree.sum())) - np.repeat(np.cumsum(degree) - degree, degree)
+    return owner, indices[np.repeat(indptr[rows], degree) + offsets]
+
+
+def _index_dtype(n):
+    return np.int32 if n < np.iinfo(np.int32).max else np.int64
+
+
+def as_compound_graph(compounds, strict=True):
+    """Return compounds as a CompoundGraph, converting the list-of-dicts form if needed."""
+    if isinstance(compounds, CompoundGraph):
+        return compounds
+    return CompoundGraph.from_compounds(compounds, strict=strict)
@@ -0,0 +1,163 @@
+from array import array
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from compound_graph import as_compound_graph, gather_rows
+
+
+class DisjointSet:
+    """Union-find over positions 0..n-1 backed by integer arrays.
+
+    ``find`` is iterative with path halving and ``union`` links the smaller
+    tree under the larger one, so any sequence of operations runs in
+    near-linear time and never recurses, however long the chains get.
+    """
+
+    def __init__(self, n):
+        self.parent = array('q', range(n))
+        self.size = array('q', [1]) * n
+        self.count = n  # number of disjoint sets
+
+    def __len__(self):
+        return len(self.parent)
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        """Merge the sets of a and b; return False if they were already joined."""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        self.count -= 1
+        return True
+
+    def union_edges(self, rows, cols):
+        """Union every (rows[k], cols[k]) pair in bulk.
+
+        The pairs' roots are joined with one connected-components pass and
+        each merged group is hung under its largest root, as ``union`` would.
+        """
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        cols = np.asarray(cols, dtype=np.int64).reshape(-1)
+        if len(rows) == 0:
+            return
+        roots = self.roots()
+        a, b = roots[rows], roots[cols]
+        involved = np.unique(np.concatenate([a, b]))
+        local = csr_matrix((np.ones(len(a), dtype=np.int8),
+                            (np.searchsorted(involved, a), np.searchsorted(involved, b))),
+                           shape=(len(involved), len(involved)))
+        n_groups, group = connected_components(local, directed=False)
+        parent = np.frombuffer(self.parent, dtype=np.int64)
+        size = np.frombuffer(self.size, dtype=np.int64)
+        sizes = size[involved]
+        # Representative of each group: its largest root (the first one on ties)
+        order = np.lexsort((-sizes, group))
+        first = np.flatnonzero(np.concatenate(([True], group[order][1:] != group[order][:-1])))
+        representative = involved[order[first]]
+        size[representative] = np.bincount(group, weights=sizes, minlength=n_groups).astype(np.int64)
+        parent[involved] = representative[group]
+        self.count -= len(involved) - n_groups
+
+    def connected(self, a, b):
+        return self.find(a) == self.find(b)
+
+    def roots(self):
+        """Root of every element, found by pointer jumping over the whole parent array.
+
+        The parent array is compressed to the roots as a side effect.
+        """
+        parent = np.frombuffer(self.parent, dtype=np.int64)
+        roots = parent.copy()
+        while True:
+            grandparents = roots[roots]
+            if np.array_equal(grandparents, roots):
+                break
+            roots = grandparents
+        parent[:] = roots
+        return roots
+
+    def labels(self):
+        """Component label (0..count-1, in order of first appearance) of every element."""
+        _, first, labels = np.unique(self.roots(), return_index=True, return_inverse=True)
+        return np.argsort(np.argsort(first))[labels]
+
+
+def _csr(graph):
+    """(indptr, indices) of a CompoundGraph or a scipy sparse matrix."""
+    if hasattr(graph, 'tocsr'):
+        graph = graph.tocsr()
+        return graph.indptr, graph.indices
+    graph = as_compound_graph(graph)
+    return graph.indptr, graph.indices
+
+
+def component_labels(graph, positions):
+    """(count, labels) of the connected components of the subgraph induced by ``positions``.
+
+    Only the adjacency rows of the selected compounds are read, so the cost
+    is O(k + d log k) for k positions with d adjacency entries in total,
+    independent of the size of the whole graph. Labels follow the order of
+    ``positions``, which should not repeat; an edge listed by either
+    endpoint connects both.
+    """
+    indptr, indices = _csr(graph)
+    positions = np.asarray(positions, dtype=np.int64).reshape(-1)
+    k = len(positions)
+    if k == 0:
+        return 0, np.zeros(0, dtype=np.int32)
+    if positions.min() < 0 or positions.max() >= len(indptr) - 1:
+        raise ValueError("Compound position out of range (unknown compound ID?)")
+    rows, neighbors = gather_rows(indptr, indices, positions)
+
+    # Map neighbour positions to local indices; neighbours outside the selection are dropped
+    order = np.argsort(positions, kind='stable')
+    sorted_positions = positions[order]
+    at = np.minimum(np.searchsorted(sorted_positions, neighbors), k - 1)
+    inside = sorted_positions[at] == neighbors
+    matrix = csr_matrix((np.ones(int(inside.sum()), dtype=np.int8), (rows[inside], order[at[inside]])),
+                        shape=(k, k))
+    return connected_components(matrix, directed=False)
+
+
+def count_components(graph, positions):
+    """Number of connected components among the selected positions."""
+    return component_labels(graph, positions)[0]
+
+
+def cluster_groups(graph, ids):
+    """Group compound IDs into contiguous clusters in one pass.
+
+    Returns {first ID of the cluster: [member IDs]} with clusters and members
+    in the order of ``ids``. Unknown IDs raise ValueError.
+    """
+    graph = as_compound_graph(graph)
+    ids = [int(i) for i in ids]
+    positions = graph.index_of(ids)
+    if np.any(positions < 0):
+        raise ValueError(f"Invalid adjacent ID in cluster groups: {ids[int(np.argmin(positions))]}")
+    _, labels = component_labels(graph, positions)
+    groups = {}
+    roots = {}
+    for cid, label in zip(ids, labels.tolist()):
+        root = roots.setdefault(label, cid)
+        groups.setdefault(root, []).append(cid)
+    return groups
+
+
+def union_find(vacated_ids, compounds):
+    """Number of contiguous zones formed by the given compound IDs."""
+    if len(vacated_ids) == 0:
+        return 0
+    graph = as_compound_graph(compounds)
+    return count_components(graph, graph.index_of(list(vacated_ids)))
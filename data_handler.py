@@ -1,25 +1,95 @@
 import pandas as pd
+import numpy as np
 import json
 import os
-import ast
+from compound_graph import CompoundGraph, frame_columns, parse_adjacency
 
 def load_compounds(filename="templates/compounds.csv"):
     """Load compound data from CSV."""
     if not os.path.exists(filename):
         create_default_data()
     df = pd.read_csv(filename)
+    counts, adj_ids = parse_adjacency(df['adjacent'], df['id'].to_numpy())
+    adjacent = np.split(adj_ids, np.cumsum(counts)[:-1]) if len(df) else []
     compounds = []
-    for _, row in df.iterrows():
+    for cid, area, households, adj, rent in zip(df['id'].tolist(), df['area'].tolist(), df['households'].tolist(),
+                                                adjacent, df['rent'].tolist()):
         compounds.append({
-            'id': int(row['id']),
-            'area': float(row['area']),
-            'households': int(row['households']),
-            'adjacent': ast.literal_eval(row['adjacent']),
-            'rent': float(row['rent']),
+            'id': int(cid),
+            'area': float(area),
+            'households': int(households),
+            'adjacent': adj.tolist(),
+            'rent': float(rent),
             'alpha': 50.0
         })
     return compounds
 
+def load_compound_graph(filename="templates/compounds.csv", file_format=None, chunksize=None):
+    """Load compound data as an array-backed CompoundGraph.
+
+    Supports CSV, Parquet (adjacent as a list<int> or "[..]" string column)
+    and NPZ (as written by save_compound_graph). The format follows the file
+    extension unless given; ``filename`` may also be a file-like object.
+    With ``chunksize``, CSV and Parquet files are streamed in row chunks of
+    that size instead of being read whole.
+    """
+    file_format = file_format or _file_format(filename)
+    if file_format == 'csv':
+        if isinstance(filename, str) and not os.path.exists(filename):
+            create_default_data()
+        if chunksize:
+            with pd.read_csv(filename, chunksize=chunksize) as reader:
+                return CompoundGraph.from_chunks(reader)
+        return CompoundGraph.from_frame(pd.read_csv(filename))
+    if file_format == 'npz':
+        return CompoundGraph.from_npz(filename)
+    if file_format == 'parquet':
+        return CompoundGraph.from_chunks(_parquet_chunks(filename, chunksize))
+    raise ValueError(f"Unsupported compounds file format: {file_format}")
+
+def save_compound_graph(graph, filename, file_format=None):
+    """Save a CompoundGraph as CSV, Parquet or NPZ (by extension unless given)."""
+    file_format = file_format or _file_format(filename)
+    if file_format == 'csv':
+        graph.to_frame().to_csv(filename, index=False)
+    elif file_format == 'npz':
+        graph.save_npz(filename)
+    elif file_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        adjacent = pa.LargeListArray.from_arrays(pa.array(graph.indptr), pa.array(graph.ids[graph.indices]))
+        table = pa.table({'id': graph.ids, 'area': graph.area, 'households': graph.households,
+                          'adjacent': adjacent, 'rent': graph.rent, 'alpha': graph.alpha})
+        pq.write_table(table, filename)
+    else:
+        raise ValueError(f"Unsupported compounds file format: {file_format}")
+
+def _file_format(filename):
+    name = filename if isinstance(filename, str) else getattr(filename, 'name', '')
+    extension = os.path.splitext(name)[1].lower().lstrip('.')
+    return {'pq': 'parquet', '': 'csv'}.get(extension, extension)
+
+def _parquet_chunks(filename, chunksize=None):
+    """Row batches of a Parquet file as frame_columns dicts; list<int> adjacency is taken from Arrow offsets."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    parquet = pq.ParquetFile(filename)
+    offset = 0
+    for batch in parquet.iter_batches(batch_size=chunksize or 65536):
+        adjacent = batch.column('adjacent') if 'adjacent' in batch.schema.names else None
+        if adjacent is not None and (pa.types.is_list(adjacent.type) or pa.types.is_large_list(adjacent.type)):
+            if adjacent.null_count or adjacent.values.null_count:
+                raise ValueError("Adjacent lists must not be null")
+            offsets = adjacent.offsets.to_numpy()
+            adj_ids = adjacent.values.slice(offsets[0], offsets[-1] - offsets[0]).to_numpy(zero_copy_only=False)
+            columns = {name: batch.column(name).to_pandas() for name in batch.schema.names if name != 'adjacent'}
+            part = frame_columns(pd.DataFrame(columns), row_offset=offset,
+                                 adjacency=(np.diff(offsets).astype(np.int64), adj_ids.astype(np.int64)))
+        else:
+            part = frame_columns(batch.to_pandas(), row_offset=offset)
+        offset += batch.num_rows
+        yield part
+
 def load_params(filename="templates/config.json"):
     """Load parameters from JSON."""
     if not os.path.exists(filename):
@@ -67,7 +137,24 @@ def create_default_data():
         'years': 10,
         'target_m': 20,
         'population_size': 100,
-        'max_generations': 200
+        'max_generations': 200,
+        'vectorized': True,
+        'workers': 1,
+        'solver': 'nsga2',
+        'cache_size': 10000,
+        'archive_size': 500,
+        'operators': 'connected',
+        'genome': 'dense',
+        'delta_evaluation': False,
+        'decompose': False,
+        'max_part_size': 0,
+        'checkpoint_path': '',
+        'checkpoint_every': 0,
+        'warm_start': False,
+        'seed_problem_two': False,
+        'warm_start_generations': 20,
+        'instrument': True,
+        'verbose': False
     }
     with open('templates/config.json', 'w') as f:
         json.dump(params, f, indent=4)
\ No newline at end of file
@@ -0,0 +1,191 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+import numpy as np
+from scipy.sparse.csgraph import breadth_first_order, connected_components
+from connectivity import component_labels
+from evaluation import PopulationEvaluator
+from exact_solver import connected_zones, exact_solvable
+from instrumentation import Instrumentation
+from pareto import non_dominated
+
+logger = logging.getLogger(__name__)
+
+
+def decompose(graph, max_part_size=None):
+    """Split a graph into independent parts for Problem 3, largest first.
+
+    Every feasible zone is a single contiguous zone, so it lies inside one
+    connected component: solving the components separately and merging
+    their fronts loses nothing. With ``max_part_size``, larger components
+    are additionally cut into connected pieces of at most that many
+    compounds (taken along a breadth-first order), which bounds the genome
+    length at the cost of missing zones that straddle a cut.
+
+    Returns a list of sorted position arrays. Single compounds are left out:
+    on their own they can never satisfy the neighbour-support constraint.
+    """
+    A = graph.undirected_adjacency()
+    n_components, labels = connected_components(A, directed=False)
+    order = np.argsort(labels, kind='stable')
+    bounds = np.flatnonzero(np.diff(labels[order])) + 1
+    parts = []
+    for vertices in np.split(order, bounds) if len(order) else []:
+        if max_part_size and len(vertices) > max_part_size:
+            parts.extend(_split(A, vertices, int(max_part_size)))
+        else:
+            parts.append(vertices)
+    parts = [np.sort(p) for p in parts if len(p) >= 2]
+    parts.sort(key=len, reverse=True)
+    return parts
+
+
+def _split(A, vertices, max_size):
+    """Cut one component into connected pieces of at most max_size compounds."""
+    sub = A[vertices][:, vertices]
+    bfs = breadth_first_order(sub, 0, directed=False, return_predecessors=False)
+    pieces = []
+    for start in range(0, len(bfs), max_size):
+        block = bfs[start:start + max_size]
+        # A block of the BFS order can fall apart into several connected pieces
+        n_pieces, labels = component_labels(sub, block)
+        for k in range(n_pieces):
+            pieces.append(vertices[block[labels == k]])
+    return pieces
+
+
+def _score_zones(graph, params, X):
+    """(X, F) of the non-dominated feasible rows among the given zones."""
+    F, G, H = PopulationEvaluator.from_graph(graph, params).evaluate(X)
+    feasible = np.all(G <= 0, axis=1) & np.all(H == 0, axis=1)
+    if not feasible.any():
+        raise ValueError("No feasible solutions found. Check constraints or parameters.")
+    X, F = X[feasible], F[feasible]
+    keep = non_dominated(F)
+    return X[keep], F[keep]
+
+
+def _solve_part(graph, params, on_generation=None):
+    """Solve one part: exactly when it is small, a path or a ring, otherwise with NSGA-II.
+
+    A part with fewer connected zones than ``population_size`` is solved by
+    scoring every zone: NSGA-II keeps duplicate-free populations, so on such
+    a part every offspring would be a duplicate and mating would exhaust its
+    retries each generation.
+    """
+    from problem_three import solve_front
+    instrumentation = Instrumentation(enabled=on_generation is not None, on_generation=on_generation)
+    try:
+        if params.get('solver', 'nsga2') == 'nsga2':
+            pop_size = int(params.get('population_size', 20))
+            zones = connected_zones(graph, pop_size)
+            if len(zones) < pop_size:
+                # With the empty zone, which the exact solver also keeps
+                zones = np.vstack([np.zeros((1, len(graph))), zones])
+                return (*_score_zones(graph, params, zones), None)
+            if exact_solvable(graph, params):
+                try:
+                    _, X, F, _ = solve_front(graph, dict(params, solver='exact'), instrumentation)
+                    return X, F, None
+                except ValueError as e:
+                    # More connected subsets than the exact solver enumerates: search the part instead
+                    logger.info("Exact solver skipped for a part of %d compounds: %s", len(graph), e)
+        _, X, F, _ = solve_front(graph, params, instrumentation)
+    except ValueError as e:
+        return None, None, str(e)
+    return X, F, None
+
+
+def _forward_part(progress, part, parts, metrics):
+    """Pass one generation of a part's run on to the whole run's progress, tagged with the part."""
+    progress(dict(metrics, part=part, parts=parts))
+
+
+def _part_done(part, parts, F_part, max_generations):
+    """Progress record of a part solved without per-generation metrics (exact, or in another process)."""
+    best_m = float(np.max(-F_part[:, 2])) if F_part is not None and len(F_part) else 0.0
+    return {'generation': max_generations, 'n_eval': 0, 'seconds': 0.0, 'evals_per_sec': 0.0,
+            'feasible_fraction': 1.0, 'front_size': 0 if F_part is None else len(F_part), 'best_m': best_m,
+            'part': part, 'parts': parts}
+
+
+def solve_decomposed(graph, params, instrumentation):
+    """Solve every part of the decomposed graph as its own Problem 3 and merge the fronts.
+
+    Parts run in parallel on ``decompose_workers`` processes (default: the
+    ``workers`` setting; each part's evaluation stays single-core); see
+    ``_solve_part`` for how each part is solved. Part
+    solutions are mapped back to the full compound vector and merged with
+    ``non_dominated``; a part without any feasible zone is skipped. Returns
+    (X, F, stats) like ``_run_nsga2``.
+    """
+    with instrumentation.span('decomposition'):
+        parts = decompose(graph, params.get('max_part_size') or None)
+    if not parts:
+        raise ValueError("No feasible solutions found: no two adjacent compounds to form a zone.")
+    # Parts would overwrite each other's checkpoints, so they neither save nor resume one
+    shared_params = dict(params, decompose=False, workers=1, instrument=False, checkpoint_path='')
+    workers = min(int(params.get('decompose_workers', params.get('workers', 1))), len(parts))
+    logger.info("Decomposed %d compounds into %d parts (largest %d) on %d workers",
+                len(graph), len(parts), len(parts[0]), workers)
+
+    # Parts report progress (and so can be cancelled) through the run's instrumentation: serial
+    # NSGA-II parts per generation, every part once it is solved
+    progress = instrumentation.record_generation if instrumentation.enabled else None
+    max_generations = int(params.get('max_generations', 50))
+    with instrumentation.span('optimization'):
+        subgraphs = (graph.subgraph(p) for p in parts)
+        solved = [None] * len(parts)
+        if workers > 1:
+            # Spawned, not forked: this may run on a worker thread of a multithreaded server
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            try:
+                futures = {executor.submit(_solve_part, sub, shared_params): k for k, sub in enumerate(subgraphs)}
+                for done, future in enumerate(as_completed(futures), 1):
+                    solved[futures[future]] = future.result()
+                    if progress is not None:
+                        progress(_part_done(done, len(parts), solved[futures[future]][1], max_generations))
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            for k, sub in enumerate(subgraphs):
+                forward = partial(_forward_part, progress, k + 1, len(parts)) if progress is not None else None
+                solved[k] = _solve_part(sub, shared_params, forward)
+                if progress is not None:
+                    progress(_part_done(k + 1, len(parts), solved[k][1], max_generations))
+
+    with instrumentation.span('merge'):
+        fronts, failed = [], []
+        for positions, (X_part, F_part, error) in zip(parts, solved):
+            if error is not None:
+                logger.warning("Skipping part of %d compounds: %s", len(positions), error)
+                failed.append(error)
+                continue
+            fronts.append((positions, X_part, F_part))
+        if not fronts:
+            raise ValueError(f"No feasible solutions found in any part: {failed[0]}")
+        F_all = np.vstack([F_part for _, _, F_part in fronts])
+        owner = np.concatenate([np.full(len(F_part), k) for k, (_, _, F_part) in enumerate(fronts)])
+        row = np.concatenate([np.arange(len(F_part)) for _, _, F_part in fronts])
+        keep = non_dominated(F_all)
+        X = np.zeros((len(keep), len(graph)))
+        for r, i in enumerate(keep.tolist()):
+            positions, X_part, _ = fronts[owner[i]]
+            X[r, positions] = X_part[row[i]]
+        F = F_all[keep]
+
+    stats = {
+        'parallel': None,
+        'cache': None,
+        'decomposition': {
+            'parts': len(parts),
+            'largest_part': int(len(parts[0])),
+            'workers': workers,
+            'failed_parts': len(failed),
+            'merged_front': int(len(keep)),
+            'part_fronts': int(len(F_all))
+        }
+    }
+    return X, F, stats
@@ -0,0 +1,240 @@
+from collections import OrderedDict
+
+import numpy as np
+from compound_graph import gather_rows
+from connectivity import DisjointSet, component_labels
+from evaluation import PopulationEvaluator
+from genome import is_packed, pack
+
+
+class Lineage:
+    """Parent genome of each offspring, recorded by the connected operators until the next evaluation.
+
+    Genomes are keyed by their packed bytes. Recording a child of a genome
+    that is itself a recorded child links it to that genome's parent, so
+    mutated crossover offspring point at an individual that was evaluated.
+    """
+
+    def __init__(self):
+        self.parents = {}
+
+    def __len__(self):
+        return len(self.parents)
+
+    @staticmethod
+    def key(problem, row):
+        return row.tobytes() if is_packed(problem) else pack(row[None, :])[0].tobytes()
+
+    def record(self, problem, child, parent):
+        parent_key = self.key(problem, parent)
+        self.parents[self.key(problem, child)] = self.parents.get(parent_key, parent_key)
+
+    def get(self, key):
+        return self.parents.get(key)
+
+    def clear(self):
+        self.parents.clear()
+
+
+class DeltaEvaluator:
+    """Scores 0/1 populations like PopulationEvaluator, re-checking constraints only where genomes changed.
+
+    For every genome it keeps the zone's support counts (vacated adjacency
+    entries per vacated compound) and component labels. An offspring whose
+    recorded parent is still kept, and that differs from it by at most
+    ``max_change`` of its zone, is scored from the parent's state: only the
+    flipped compounds and their neighbours are updated, removals are
+    re-checked with a BFS that stops as soon as the zone is known to hold
+    together, and additions are joined with union-find. Other genomes are
+    scored in full. Objectives still come from ``PopulationEvaluator``, so
+    F, G and H are identical to its results.
+    """
+
+    def __init__(self, evaluator, max_states=10000, max_change=0.25):
+        self.evaluator = evaluator
+        self.n = evaluator.n
+        A = evaluator.adjacency.tocsr()
+        R = A.T.tocsr()
+        U = (A + R).tocsr()
+        self.indptr, self.indices = A.indptr, A.indices
+        self.reverse_indptr, self.reverse_indices = R.indptr, R.indices
+        self.undirected_indptr, self.undirected_indices = U.indptr, U.indices
+        self.max_states = int(max_states)
+        self.max_change = max_change
+        self.lineage = Lineage()
+        self._states = OrderedDict()  # genome key -> (zone, support, labels, n_components)
+        self._in_zone = np.zeros(self.n, dtype=bool)  # scratch mask, cleared after every use
+        self.incremental = 0
+        self.full = 0
+        self.reused = 0
+
+    @classmethod
+    def from_graph(cls, graph, params, **kwargs):
+        return cls(PopulationEvaluator.from_graph(graph, params), **kwargs)
+
+    def evaluate(self, X):
+        """Return (F, G, H) for the population matrix X."""
+        X = np.asarray(X, dtype=float)
+        F = self.evaluator.objectives(X)
+        G = np.zeros(X.shape)
+        H = np.zeros((len(X), 1))
+        for r, key in enumerate(pack(X)):
+            zone = np.flatnonzero(X[r])
+            _, support, _, n_components = self._state(key.tobytes(), zone)
+            G[r, zone] = 1 - support
+            H[r, 0] = max(n_components - 1, 0)
+        self.lineage.clear()
+        return F, G, H
+
+    def evaluate_packed(self, P, max_cells=2 ** 20):
+        """Return (F, G, H) for packed genomes, with G folded into one column as in ``evaluate_packed``."""
+        P = np.asarray(P, dtype=np.uint8)
+        F = np.empty((len(P), 3))
+        G = np.empty((len(P), 1))
+        H = np.empty((len(P), 1))
+        step = max(1, max_cells // max(self.n, 1))
+        for start in range(0, len(P), step):
+            X = np.unpackbits(P[start:start + step], axis=1, count=self.n)
+            F[start:start + step] = self.evaluator.objectives(X)
+            for k, x in enumerate(X):
+                _, support, _, n_components = self._state(P[start + k].tobytes(), np.flatnonzero(x))
+                G[start + k, 0] = np.count_nonzero(support == 0)
+                H[start + k, 0] = max(n_components - 1, 0)
+        self.lineage.clear()
+        return F, G, H
+
+    def _state(self, key, zone):
+        state = self._states.get(key)
+        if state is not None:
+            self._states.move_to_end(key)
+            self.reused += 1
+            return state
+        parent_key = self.lineage.get(key)
+        parent = self._states.get(parent_key) if parent_key is not None else None
+        if parent is not None:
+            self._states.move_to_end(parent_key)
+            removed = np.setdiff1d(parent[0], zone, assume_unique=True)
+            added = np.setdiff1d(zone, parent[0], assume_unique=True)
+            if len(removed) + len(added) > max(1, int(self.max_change * len(zone))):
+                parent = None
+        if parent is not None:
+            state = self._apply(parent, zone, removed, added)
+            self.incremental += 1
+        else:
+            state = self._full_state(zone)
+            self.full += 1
+        self._states[key] = state
+        while len(self._states) > self.max_states:
+            self._states.popitem(last=False)
+        return state
+
+    def _support(self, rows):
+        """Adjacency entries of each row that are marked in the scratch mask."""
+        owner, neighbors = gather_rows(self.indptr, self.indices, rows)
+        return np.bincount(owner[self._in_zone[neighbors]], minlength=len(rows))
+
+    def _full_state(self, zone):
+        self._in_zone[zone] = True
+        try:
+            support = self._support(zone)
+        finally:
+            self._in_zone[zone] = False
+        n_components, labels = component_labels(self.evaluator.adjacency, zone)
+        return zone, support, labels.astype(np.int64), n_components
+
+    def _apply(self, parent, zone, removed, added):
+        """State of ``zone`` from its parent's state, given the removed and added compounds."""
+        parent_zone, parent_support, parent_labels, _ = parent
+        keep = np.ones(len(parent_zone), dtype=bool)
+        keep[np.searchsorted(parent_zone, removed)] = False
+        kept = parent_zone[keep]
+        support = parent_support[keep]
+        labels = parent_labels[keep]
+        in_zone = self._in_zone
+        in_zone[kept] = True
+        try:
+            # Support of kept compounds changes only where a flipped compound is in their adjacency list
+            flipped = np.concatenate([removed, added])
+            owner, affected = gather_rows(self.reverse_indptr, self.reverse_indices, flipped)
+            at = np.searchsorted(kept, affected)
+            inside = at < len(kept)
+            inside[inside] = kept[at[inside]] == affected[inside]
+            np.add.at(support, at[inside], np.where(owner[inside] < len(removed), -1, 1))
+
+            if len(removed):
+                labels = self._split(kept, labels, parent_labels[~keep], removed)
+
+            in_zone[added] = True
+            added_support = self._support(added)
+            if len(added):
+                labels = self._join(kept, labels, added)
+            else:
+                labels = np.unique(labels, return_inverse=True)[1]
+        finally:
+            in_zone[kept] = False
+            in_zone[added] = False
+
+        order = np.argsort(np.concatenate([kept, added]), kind='stable')
+        support = np.concatenate([support, added_support])[order]
+        labels = labels[order]
+        n_components = int(labels.max()) + 1 if len(labels) else 0
+        return zone, support, labels, n_components
+
+    def _split(self, kept, labels, removed_labels, removed):
+        """Relabel the pieces that removing compounds cut off from their zone.
+
+        Every piece left of a component touches a removed compound, so the
+        search starts from those neighbours and stops once one search has
+        reached all of them; only pieces that were cut off are walked in full.
+        """
+        indptr, indices = self.undirected_indptr, self.undirected_indices
+        in_zone = self._in_zone
+        _, touching = gather_rows(indptr, indices, removed)
+        touching = np.unique(touching[in_zone[touching]])
+        touching_labels = labels[np.searchsorted(kept, touching)]
+        labels = labels.copy()
+        next_label = int(max(labels.max(initial=-1), removed_labels.max())) + 1
+        for component in np.unique(removed_labels).tolist():
+            pending = set(touching[touching_labels == component].tolist())
+            # With one neighbour left, its piece is the last one and keeps the label
+            while len(pending) > 1:
+                start = pending.pop()
+                seen = {start}
+                stack = [start]
+                while stack and pending:
+                    v = stack.pop()
+                    for u in indices[indptr[v]:indptr[v + 1]].tolist():
+                        if u not in seen and in_zone[u]:
+                            seen.add(u)
+                            stack.append(u)
+                            pending.discard(u)
+                if not pending:
+                    break
+                labels[np.searchsorted(kept, np.fromiter(seen, dtype=np.int64, count=len(seen)))] = next_label
+                next_label += 1
+        return labels
+
+    def _join(self, kept, labels, added):
+        """Component labels (0..k-1) of kept then added compounds after joining the added ones."""
+        components, labels = np.unique(labels, return_inverse=True)
+        base = len(components)
+        # Elements are the kept components (0..base-1) followed by the added compounds
+        owner, neighbors = gather_rows(self.undirected_indptr, self.undirected_indices, added)
+        at = np.minimum(np.searchsorted(added, neighbors), len(added) - 1)
+        is_added = added[at] == neighbors
+        is_kept = ~is_added & self._in_zone[neighbors]
+        targets = np.concatenate([base + at[is_added],
+                                  labels[np.searchsorted(kept, neighbors[is_kept])]])
+        sources = np.concatenate([owner[is_added], owner[is_kept]]) + base
+        sets = DisjointSet(base + len(added))
+        sets.union_edges(sources, targets)
+        joined = sets.labels()
+        return np.concatenate([joined[labels], joined[base:]])
+
+    def stats(self):
+        return {
+            'incremental': self.incremental,
+            'full': self.full,
+            'reused': self.reused,
+            'states': len(self._states)
+        }
@@ -0,0 +1,180 @@
+from collections import OrderedDict
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+class PopulationEvaluator:
+    """NumPy kernel that scores a whole population matrix for Problem 3.
+
+    Holds only flat arrays (per-compound cost and rent gain, CSR adjacency),
+    so it can be rebuilt cheaply inside worker processes from shared memory.
+    """
+
+    def __init__(self, cost_arr, rent_gain_arr, indptr, indices):
+        n = len(cost_arr)
+        self.n = n
+        self.cost_arr = cost_arr
+        self.rent_gain_arr = rent_gain_arr
+        self.adjacency = csr_matrix((np.ones(len(indices)), indices, indptr), shape=(n, n))
+        # Directed adjacency edge list (i -> j for every j in compound i's adjacent list)
+        self.edge_rows = np.repeat(np.arange(n, dtype=indices.dtype), np.diff(indptr))
+        self.edge_cols = indices
+
+    @classmethod
+    def from_graph(cls, graph, params):
+        return cls(graph.relocation_cost(params), graph.rent_gain(params), graph.indptr, graph.indices)
+
+    def count_zones(self, mask):
+        """Count contiguous zones for every row of a boolean population mask."""
+        n_pop, n = mask.shape
+        # Keep edges whose both endpoints are vacated, then lay out one block per individual
+        both = mask[:, self.edge_rows] & mask[:, self.edge_cols]
+        owner, edge = np.nonzero(both)
+        offset = owner * n
+        blocks = csr_matrix(
+            (np.ones(len(edge)), (offset + self.edge_rows[edge], offset + self.edge_cols[edge])),
+            shape=(n_pop * n, n_pop * n))
+        _, labels = connected_components(blocks, directed=False)
+
+        # Labels are unique across blocks, so count distinct labels of vacated compounds per row
+        vacated_owner = np.nonzero(mask)[0]
+        _, first = np.unique(labels.reshape(n_pop, n)[mask], return_index=True)
+        return np.bincount(vacated_owner[first], minlength=n_pop)
+
+    def objectives(self, X):
+        """Return F = [-vacated, cost, -m] for the population matrix X."""
+        X = np.asarray(X, dtype=float)
+        # Row-wise reductions, so a row's result does not depend on how the population is chunked
+        total_vacated = np.sum(X, axis=1)
+        total_cost = np.sum(X * self.cost_arr, axis=1)
+        total_rent_gain = np.sum(X * self.rent_gain_arr, axis=1)
+        positive = total_cost > 1e-6
+        m = np.where(positive, total_rent_gain / np.where(positive, total_cost, 1.0), 0)
+        m = np.minimum(m, 1e6)  # Limit m to prevent overflow
+        return np.column_stack([-total_vacated, total_cost, -m])
+
+    def evaluate(self, X):
+        """Return (F, G, H) for the population matrix X."""
+        X = np.asarray(X, dtype=float)
+
+        # Objectives
+        F = self.objectives(X)
+
+        # Inequality constraints: x_i <= sum(x_j for j in adjacent), only for vacated compounds
+        mask = X != 0
+        support = (self.adjacency @ X.T).T
+        G = np.where(mask, X - support, 0.0)
+
+        # Equality constraint: single contiguous zone
+        zones = self.count_zones(mask)
+        H = np.where(mask.any(axis=1), zones - 1, 0).reshape(-1, 1)
+        return F, G, H
+
+    def evaluate_packed(self, P, max_cells=2 ** 20):
+        """Return (F, G, H) for packed genomes (``np.packbits`` rows).
+
+        Rows are unpacked and scored a block of at most ``max_cells``
+        compound cells at a time, so F and H are bit-identical to
+        ``evaluate`` on the dense rows while only one block is ever dense.
+        G is folded into a single column counting the unsupported vacated
+        compounds, which gives the same constraint violation as the
+        per-compound G.
+        """
+        P = np.asarray(P, dtype=np.uint8)
+        n_pop = len(P)
+        F = np.empty((n_pop, 3))
+        G = np.empty((n_pop, 1))
+        H = np.empty((n_pop, 1))
+        step = max(1, max_cells // max(self.n, 1))
+        for start in range(0, n_pop, step):
+            rows = slice(start, start + step)
+            F[rows], G_dense, H[rows] = self.evaluate(np.unpackbits(P[rows], axis=1, count=self.n))
+            G[rows, 0] = np.maximum(G_dense, 0).sum(axis=1)
+        return F, G, H
+
+
+class FitnessCache:
+    """Bounded LRU cache of evaluation results keyed by the packed genome.
+
+    0/1 genomes are keyed by ``np.packbits`` of the row; any other genome
+    falls back to its raw float bytes, so distinct genomes never share an
+    entry. G rows are stored sparsely (they are zero for every compound that
+    is not vacated).
+    """
+
+    def __init__(self, max_size):
+        self.max_size = int(max_size)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def keys(X):
+        """Cache keys for every row of the population matrix X."""
+        X = np.asarray(X)
+        binary = np.all((X == 0) | (X == 1), axis=1)
+        packed = np.packbits(X != 0, axis=1)
+        return [packed[r].tobytes() if binary[r] else b'f' + X[r].astype(float).tobytes()
+                for r in range(len(X))]
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, f, g, h):
+        nz = np.flatnonzero(g)
+        self._entries[key] = (np.array(f, dtype=float), nz, np.asarray(g)[nz].astype(float), np.array(h, dtype=float))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def evaluate(self, X, evaluate, packed=False):
+        """Return (F, G, H) for X, calling evaluate only on genomes not seen before.
+
+        With ``packed``, X holds ``np.packbits`` rows, which are their own
+        keys (the same keys as the dense rows), and G has a single column.
+        """
+        X = np.asarray(X, dtype=np.uint8 if packed else float)
+        n_pop, n = X.shape
+        F = np.empty((n_pop, 3))
+        G = np.zeros((n_pop, 1 if packed else n))
+        H = np.empty((n_pop, 1))
+
+        missing = OrderedDict()  # key -> rows sharing that genome
+        keys = [row.tobytes() for row in X] if packed else self.keys(X)
+        for r, key in enumerate(keys):
+            entry = self.get(key)
+            if entry is None:
+                missing.setdefault(key, []).append(r)
+                continue
+            self.hits += 1
+            F[r], G[r, entry[1]], H[r] = entry[0], entry[2], entry[3]
+
+        if missing:
+            first = [rows[0] for rows in missing.values()]
+            F_new, G_new, H_new = evaluate(X[first])
+            self.misses += len(first)
+            for k, (key, rows) in enumerate(missing.items()):
+                self.hits += len(rows) - 1  # duplicates within the batch reuse the fresh result
+                F[rows], G[rows], H[rows] = F_new[k], G_new[k], H_new[k]
+                if self.max_size > 0:
+                    self.put(key, F_new[k], G_new[k], H_new[k])
+        return F, G, H
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,264 @@
+import numpy as np
+from scipy.sparse.csgraph import connected_components
+from compound_graph import as_compound_graph
+from pareto import non_dominated, front_2d
+
+
+class _LevelFronts:
+    """Candidate zones kept as per-size (cost, m) fronts.
+
+    Zones with the same number of compounds share the first objective, so a
+    zone dominated within its own size level is dominated globally. Keeping
+    only each level's 2D front bounds memory regardless of how many zones
+    are enumerated.
+    """
+
+    def __init__(self, params, buffer_size=200000):
+        self.params = params
+        self.buffer_size = buffer_size
+        self.count, self.cost, self.gain, self.members = [], [], [], []
+        self.pending = 0
+
+    def add(self, count, cost, gain, members):
+        self.count.append(np.atleast_1d(np.asarray(count, dtype=np.int64)))
+        self.cost.append(np.atleast_1d(np.asarray(cost, dtype=float)))
+        self.gain.append(np.atleast_1d(np.asarray(gain, dtype=float)))
+        self.members.extend(members)
+        self.pending += len(self.count[-1])
+        if self.pending >= self.buffer_size:
+            self.compact()
+
+    def compact(self):
+        if not self.count:
+            return
+        count = np.concatenate(self.count)
+        cost = np.concatenate(self.cost)
+        gain = np.concatenate(self.gain)
+        m = _cost_effectiveness(cost, gain)
+        keep = [idx[front_2d(cost[idx], m[idx])]
+                for idx in np.split(np.argsort(count, kind='stable'),
+                                    np.flatnonzero(np.diff(np.sort(count))) + 1)]
+        keep = np.sort(np.concatenate(keep)) if keep else np.zeros(0, dtype=np.int64)
+        self.count, self.cost, self.gain = [count[keep]], [cost[keep]], [gain[keep]]
+        self.members = [self.members[i] for i in keep]
+        self.pending = 0
+
+    def objectives(self):
+        self.compact()
+        if not self.count:
+            return np.zeros((0, 3)), []
+        count, cost, gain = self.count[0], self.cost[0], self.gain[0]
+        return np.column_stack([-count, cost, -_cost_effectiveness(cost, gain)]), self.members
+
+
+def _cost_effectiveness(cost, gain):
+    positive = cost > 1e-6
+    m = np.where(positive, gain / np.where(positive, cost, 1.0), 0)
+    return np.minimum(m, 1e6)
+
+
+def _undirected_neighbors(graph):
+    """Symmetric adjacency (without self-loops) as a list of neighbour index arrays."""
+    if not graph.is_symmetric():
+        raise ValueError("Exact solver requires symmetric adjacency lists")
+    A = graph.undirected_adjacency()
+    return A, [A.indices[A.indptr[i]:A.indptr[i + 1]] for i in range(A.shape[0])]
+
+
+def _walk(start, neighbors, size):
+    """Order the vertices of a path or cycle component by walking it from start."""
+    order = [start]
+    prev, cur = -1, start
+    for _ in range(size - 1):
+        nxt = [v for v in neighbors[cur].tolist() if v != prev]
+        prev, cur = cur, nxt[0]
+        order.append(cur)
+    return np.array(order, dtype=np.int64)
+
+
+def _component_kind(comp_degree, max_nodes):
+    """How the exact solver handles a component: 'ring', 'path', 'subsets', or None if it is too large."""
+    size = len(comp_degree)
+    if size >= 3 and np.all(comp_degree == 2):
+        return 'ring'
+    if np.count_nonzero(comp_degree == 1) == 2 and np.all(comp_degree <= 2):
+        return 'path'
+    return 'subsets' if size <= max_nodes else None
+
+
+def exact_solvable(compounds, params):
+    """True if ``solve_exact`` accepts the graph: symmetric adjacency, and every component a path,
+    a ring or at most ``exact_max_nodes`` compounds (it can still hit ``exact_max_subsets``)."""
+    graph = as_compound_graph(compounds)
+    if not graph.is_symmetric():
+        return False
+    A = graph.undirected_adjacency()
+    degree = np.diff(A.indptr)
+    _, labels = connected_components(A, directed=False)
+    max_nodes = int(params.get('exact_max_nodes', 40))
+    return all(len(vertices) < 2 or _component_kind(degree[vertices], max_nodes) is not None
+               for vertices in np.split(np.argsort(labels, kind='stable'),
+                                        np.flatnonzero(np.diff(np.sort(labels))) + 1))
+
+
+def connected_zones(compounds, limit):
+    """Up to ``limit`` connected zones (of at least two compounds) as 0/1 rows, in enumeration order.
+
+    Fewer than ``limit`` rows means these are all the graph's connected zones.
+    """
+    graph = as_compound_graph(compounds)
+    A = graph.undirected_adjacency()
+    nbr = [sum(1 << int(u) for u in A.indices[A.indptr[v]:A.indptr[v + 1]].tolist())
+           for v in range(A.shape[0])]
+    masks = []
+
+    def extend(subset, frontier, excluded, size, allowed):
+        if size >= 2:
+            masks.append(subset)
+            if len(masks) >= limit:
+                return True
+        while frontier:
+            bit = frontier & -frontier
+            frontier ^= bit
+            u = bit.bit_length() - 1
+            grown = frontier | (nbr[u] & allowed & ~(subset | frontier | excluded))
+            if extend(subset | bit, grown, excluded, size + 1, allowed):
+                return True
+            excluded |= bit
+        return False
+
+    for v in range(A.shape[0]):
+        allowed = ~((1 << (v + 1)) - 1)
+        if extend(1 << v, nbr[v] & allowed, 0, 1, allowed):
+            break
+    X = np.zeros((len(masks), len(graph)))
+    for r, mask in enumerate(masks):
+        X[r, [k for k in range(len(graph)) if mask >> k & 1]] = 1
+    return X
+
+
+def _add_arcs(fronts, order, cyclic, cost_arr, gain_arr):
+    """All contiguous runs of a path (or arcs of a cycle) of length >= 2, one size level at a time."""
+    n = len(order)
+    walk = np.concatenate((order, order)) if cyclic else order
+    cost_prefix = np.concatenate(([0.0], np.cumsum(cost_arr[walk])))
+    gain_prefix = np.concatenate(([0.0], np.cumsum(gain_arr[walk])))
+    for length in range(2, n + 1):
+        if cyclic and length == n:
+            starts = np.array([0])  # the whole ring, counted once
+        else:
+            starts = np.arange(n if cyclic else n - length + 1)
+        cost = cost_prefix[starts + length] - cost_prefix[starts]
+        gain = gain_prefix[starts + length] - gain_prefix[starts]
+        level = front_2d(cost, _cost_effectiveness(cost, gain))
+        fronts.add(np.full(len(level), length), cost[level], gain[level],
+                   [('arc', order, cyclic, int(s), length) for s in starts[level]])
+
+
+def _add_connected_subsets(fronts, vertices, neighbors, cost_arr, gain_arr, max_subsets):
+    """Enumerate every connected subset (size >= 2) of a component exactly once.
+
+    Each subset is generated from its lowest-numbered vertex by growing a
+    candidate frontier; vertices already decided against are excluded from
+    later branches, so no subset is produced twice.
+    """
+    local = {int(v): k for k, v in enumerate(vertices.tolist())}
+    nbr = [sum(1 << local[int(u)] for u in neighbors[v].tolist()) for v in vertices.tolist()]
+    cost = cost_arr[vertices].tolist()
+    gain = gain_arr[vertices].tolist()
+    counts, costs, gains, masks = [], [], [], []
+    total = 0
+
+    def extend(subset, frontier, excluded, size, c, g):
+        nonlocal total
+        if size >= 2:
+            counts.append(size)
+            costs.append(c)
+            gains.append(g)
+            masks.append(subset)
+            total += 1
+            if total > max_subsets:
+                raise ValueError(f"Exact solver exceeded {max_subsets} connected subsets; use the NSGA-II solver")
+            if len(counts) >= fronts.buffer_size:
+                flush()
+        while frontier:
+            bit = frontier & -frontier
+            u = bit.bit_length() - 1
+            frontier ^= bit
+            grown = frontier | (nbr[u] & allowed & ~(subset | frontier | excluded))
+            extend(subset | bit, grown, excluded, size + 1, c + cost[u], g + gain[u])
+            excluded |= bit
+
+    def flush():
+        fronts.add(counts, costs, gains, [('mask', vertices, mask) for mask in masks])
+        counts.clear()
+        costs.clear()
+        gains.clear()
+        masks.clear()
+
+    for v in range(len(vertices)):
+        allowed = ~((1 << (v + 1)) - 1)  # only vertices numbered above v may join
+        extend(1 << v, nbr[v] & allowed, 0, 1, cost[v], gain[v])
+    flush()
+
+
+def _decode(member, n):
+    x = np.zeros(n)
+    if member[0] == 'arc':
+        _, order, cyclic, start, length = member
+        idx = np.arange(start, start + length) % len(order) if cyclic else np.arange(start, start + length)
+        x[order[idx]] = 1
+    elif member[0] == 'mask':
+        _, vertices, mask = member
+        bits = [k for k in range(len(vertices)) if mask >> k & 1]
+        x[vertices[bits]] = 1
+    return x
+
+
+def solve_exact(compounds, params):
+    """Exact Pareto front of contiguous zones over (vacated count, cost, m).
+
+    Components that are paths or rings are solved by scanning their O(n^2)
+    contiguous runs with prefix sums; any other component is enumerated
+    exhaustively as long as it has at most ``exact_max_nodes`` compounds.
+    Returns (X, F) in the same layout as the NSGA-II result.
+    """
+    graph = as_compound_graph(compounds)
+    n = len(graph)
+    max_nodes = int(params.get('exact_max_nodes', 40))
+    max_subsets = int(params.get('exact_max_subsets', 5000000))
+    cost_arr = graph.relocation_cost(params)
+    gain_arr = graph.rent_gain(params)
+
+    A, neighbors = _undirected_neighbors(graph)
+    degree = np.diff(A.indptr)
+    n_components, labels = connected_components(A, directed=False)
+
+    fronts = _LevelFronts(params)
+    fronts.add(0, 0.0, 0.0, [('empty',)])  # vacating nothing is feasible in the model
+    for comp in range(n_components):
+        vertices = np.flatnonzero(labels == comp)
+        size = len(vertices)
+        if size < 2:
+            continue  # a lone compound can never satisfy the neighbour-support constraint
+        kind = _component_kind(degree[vertices], max_nodes)
+        if kind == 'ring':
+            _add_arcs(fronts, _walk(vertices[0], neighbors, size), True, cost_arr, gain_arr)
+        elif kind == 'path':
+            start = vertices[np.flatnonzero(degree[vertices] == 1)[0]]
+            _add_arcs(fronts, _walk(start, neighbors, size), False, cost_arr, gain_arr)
+        elif kind == 'subsets':
+            _add_connected_subsets(fronts, vertices, neighbors, cost_arr, gain_arr, max_subsets)
+        else:
+            raise ValueError(f"Component with {size} compounds exceeds exact_max_nodes={max_nodes}; "
+                             f"use the NSGA-II solver")
+
+    F, members = fronts.objectives()
+    front = non_dominated(F)
+    X = np.array([_decode(members[i], n) for i in front]).reshape(len(front), n)
+
+    # Recompute objectives from X exactly as the NSGA-II evaluation does
+    total_cost = np.sum(X * cost_arr, axis=1)
+    total_rent_gain = np.sum(X * gain_arr, axis=1)
+    F = np.column_stack([-np.sum(X, axis=1), total_cost, -_cost_effectiveness(total_cost, total_rent_gain)])
+    return X, F
@@ -0,0 +1,117 @@
+import io
+import json
+import zipfile
+
+import numpy as np
+from genome import unpack
+
+# Export pipeline: every file is built in memory from result objects, so
+# concurrent sessions never share files and nothing is written to disk.
+# Entries are (name, content) pairs where content is bytes, a string, or a
+# zero-argument callable returning either; callables (e.g. figure renderers)
+# only run when their entry is included in an archive.
+
+
+def _to_builtin(value):
+    """json.dump(s) fallback for NumPy scalars and arrays."""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def build_zip(entries, include=None):
+    """ZIP archive bytes of the entries whose names are in ``include`` (default: all)."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as z:
+        for name, content in entries:
+            if include is not None and name not in include:
+                continue
+            if callable(content):
+                content = content()
+            if content is None:
+                continue
+            z.writestr(name, content)
+    return buffer.getvalue()
+
+
+def pareto_set_npz(F, pareto_set, ids):
+    """Compact NPZ dump of a whole Pareto set: objectives as columns and solutions as packed bits.
+
+    ``pareto_set`` holds ``np.packbits`` rows (``results['pareto_set']``)
+    aligned with F; bit j of a row is compound ``ids[j]``.
+    """
+    F = np.asarray(F, dtype=float)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, ids=np.asarray(ids, dtype=np.int64), X_packed=np.asarray(pareto_set, dtype=np.uint8),
+                        vacated=-F[:, 0], cost=F[:, 1], m=-F[:, 2])
+    return buffer.getvalue()
+
+
+def load_pareto_set(file):
+    """(ids, X, F) from a file written by ``pareto_set_npz``; X is a 0/1 uint8 matrix."""
+    with np.load(file) as data:
+        ids = data['ids']
+        X = unpack(data['X_packed'], len(ids))
+        F = np.column_stack([-data['vacated'], data['cost'], -data['m']])
+    return ids, X, F
+
+
+def cost_effectiveness_curve(graph, F, pareto_set):
+    """(households, m) of every front solution, sorted by households (as in the inflection search)."""
+    X = unpack(pareto_set, len(graph))
+    households = np.einsum('ij,j->i', X, graph.households.astype(float))
+    m = np.where(F[:, 1] > 1e-6, -F[:, 2], 0)
+    order = np.argsort(households)
+    return households[order], m[order]
+
+
+def pareto_front_png(F):
+    from utils import plot_pareto_front
+    buffer = io.BytesIO()
+    plot_pareto_front(F, buffer)
+    return buffer.getvalue()
+
+
+def cost_effectiveness_png(graph, results, F):
+    from utils import plot_cost_effectiveness
+    households, m = cost_effectiveness_curve(graph, F, results['pareto_set'])
+    buffer = io.BytesIO()
+    plot_cost_effectiveness(households, m, results['households'], results['m'], buffer)
+    return buffer.getvalue()
+
+
+def problem_two_entries(sorted_df, feasible_sequence):
+    return [
+        ('sorting_results.csv', lambda: sorted_df.to_csv(index=False)),
+        ('feasible_sequence.json', lambda: json.dumps(feasible_sequence, default=_to_builtin)),
+    ]
+
+
+def front_index_npz(graph, results, F, params):
+    from front_query import FrontIndex
+    buffer = io.BytesIO()
+    FrontIndex.from_results(graph, results, F, params).save(buffer)
+    return buffer.getvalue()
+
+
+def problem_three_entries(graph, results, F, summary=None, params=None):
+    """Export entries for one Problem 3 result; figures and the Pareto set are rendered on demand.
+
+    With ``params``, the entries include ``front_index.npz`` for ``front_query``.
+    """
+    entries = []
+    if summary is not None:
+        entries.append(('inflection_results.txt', summary))
+    report = {k: v for k, v in results.items() if k not in ('pareto_set', 'instrumentation')}
+    entries.append(('inflection_results.json', lambda: json.dumps(report, indent=4, default=_to_builtin)))
+    entries.append(('pareto_front.png', lambda: pareto_front_png(F)))
+    if results.get('pareto_set') is not None:
+        entries.append(('cost_effectiveness.png', lambda: cost_effectiveness_png(graph, results, F)))
+        entries.append(('pareto_set.npz', lambda: pareto_set_npz(F, results['pareto_set'], graph.ids)))
+        if params is not None:
+            entries.append(('front_index.npz', lambda: front_index_npz(graph, results, F, params)))
+    if results.get('instrumentation'):
+        entries.append(('run_metrics.json', lambda: json.dumps(results['instrumentation'], indent=4,
+                                                               default=_to_builtin)))
+    return entries
+
@@ -0,0 +1,239 @@
+"""Constrained lookups on a computed Pareto front without re-running the solver.
+
+``FrontIndex`` keeps every front solution's metrics with, per metric, the
+solutions sorted by it and the best solution (max and min of every other
+metric) over each prefix and suffix of that order. A lookup with one bound,
+such as "best m with cost <= 5e6" or "cheapest zone with households >= 40",
+is then a binary search plus one array read: O(log n). The index is saved
+as one NPZ file and can be served over HTTP::
+
+    python front_query.py front_index.npz --port 8765
+    curl 'http://127.0.0.1:8765/query?maximize=m&max_cost=5e6'
+"""
+import argparse
+import json
+import logging
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+import numpy as np
+from genome import pack, unpack
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('vacated', 'households', 'area', 'cost', 'm', 'profit')
+
+# Query keys accepted as bounds, e.g. max_cost or min_households
+BOUNDS = tuple(f'{side}_{name}' for side in ('max', 'min') for name in COLUMNS)
+
+# Rows of each per-column lookup table: best solution over the prefix / suffix of the sorted order
+PREFIX_MAX, PREFIX_MIN, SUFFIX_MAX, SUFFIX_MIN = range(4)
+
+
+def _running_best(values):
+    """Index of the first maximum of values[:k + 1] for every k."""
+    positions = np.arange(len(values))
+    best = np.maximum.accumulate(values)
+    is_new = np.concatenate(([True], values[1:] > best[:-1]))
+    return np.maximum.accumulate(np.where(is_new, positions, 0))
+
+
+def _lookup_tables(columns, order):
+    """(4, n_columns, n) table of row indices for one sort order."""
+    n = len(order)
+    tables = np.zeros((4, len(COLUMNS), n), dtype=np.int64)
+    for t, name in enumerate(COLUMNS):
+        values = columns[name][order]
+        tables[PREFIX_MAX, t] = order[_running_best(values)]
+        tables[PREFIX_MIN, t] = order[_running_best(-values)]
+        tables[SUFFIX_MAX, t] = order[n - 1 - _running_best(values[::-1])[::-1]]
+        tables[SUFFIX_MIN, t] = order[n - 1 - _running_best(-values[::-1])[::-1]]
+    return tables
+
+
+def front_columns(graph, X, F, params):
+    """Metrics of every front solution, as in ``summarize_front``."""
+    X = np.asarray(X)
+    area = np.einsum('ij,j->i', X, graph.area.astype(float))
+    income = np.einsum('ij,j->i', X, graph.area * graph.alpha * graph.rent * params['years'])
+    return {
+        'vacated': -F[:, 0],
+        'households': np.einsum('ij,j->i', X, graph.households.astype(float)),
+        'area': area,
+        'cost': F[:, 1],
+        'm': np.where(F[:, 1] > 1e-6, -F[:, 2], 0),
+        'profit': income - F[:, 1],
+    }
+
+
+class FrontIndex:
+    """Sorted and prefix/suffix-best indexes over the metrics of a Pareto front."""
+
+    def __init__(self, ids, pareto_set, columns, orders=None, tables=None):
+        self.ids = np.asarray(ids)
+        self.pareto_set = np.asarray(pareto_set, dtype=np.uint8)
+        self.columns = {name: np.asarray(columns[name], dtype=float) for name in COLUMNS}
+        if orders is None:
+            orders = {name: np.argsort(self.columns[name], kind='stable') for name in COLUMNS}
+            tables = {name: _lookup_tables(self.columns, orders[name]) for name in COLUMNS}
+        self.orders = orders
+        self.tables = tables
+        self.sorted_values = {name: self.columns[name][orders[name]] for name in COLUMNS}
+
+    @classmethod
+    def build(cls, graph, X, F, params):
+        """Index of a front given as dense 0/1 rows X and objectives F."""
+        return cls(graph.ids, pack(X), front_columns(graph, X, np.asarray(F, dtype=float), params))
+
+    @classmethod
+    def from_results(cls, graph, results, F, params):
+        """Index of the Pareto set kept in ``results['pareto_set']`` by ``compute_problem_three``."""
+        X = unpack(results['pareto_set'], len(graph))
+        return cls(graph.ids, results['pareto_set'], front_columns(graph, X, np.asarray(F, dtype=float), params))
+
+    def __len__(self):
+        return len(self.pareto_set)
+
+    def save(self, file):
+        """Write the front and its indexes to a path or binary buffer (NPZ)."""
+        arrays = {'ids': self.ids, 'pareto_set': self.pareto_set}
+        for name in COLUMNS:
+            arrays[f'column_{name}'] = self.columns[name]
+            arrays[f'order_{name}'] = self.orders[name]
+            arrays[f'tables_{name}'] = self.tables[name]
+        np.savez_compressed(file, **arrays)
+
+    @classmethod
+    def load(cls, file):
+        with np.load(file) as data:
+            columns = {name: data[f'column_{name}'] for name in COLUMNS}
+            orders = {name: data[f'order_{name}'] for name in COLUMNS}
+            tables = {name: data[f'tables_{name}'] for name in COLUMNS}
+            return cls(data['ids'], data['pareto_set'], columns, orders, tables)
+
+    def solution(self, row):
+        """Metrics and vacated compound IDs of one front solution."""
+        mask = unpack(self.pareto_set[row:row + 1], len(self.ids))[0]
+        result = {name: float(self.columns[name][row]) for name in COLUMNS}
+        result['row'] = int(row)
+        result['vacated_ids'] = self.ids[mask != 0].tolist()
+        return result
+
+    def best(self, objective, maximize=True, **bounds):
+        """Best solution for ``objective`` subject to bounds like ``max_cost=5e6`` or ``min_households=40``.
+
+        With at most one bound the lookup is O(log n); several bounds fall
+        back to a linear scan of the front. Returns the solution dict, or
+        None when no solution satisfies the bounds.
+        """
+        if objective not in COLUMNS:
+            raise ValueError(f"Unknown objective '{objective}'; expected one of {', '.join(COLUMNS)}")
+        parsed = [self._parse_bound(key, value) for key, value in bounds.items()]
+        if len(self) == 0:
+            return None
+        t = COLUMNS.index(objective)
+        if not parsed:
+            values = self.columns[objective]
+            return self.solution(int(np.argmax(values) if maximize else np.argmin(values)))
+        if len(parsed) == 1:
+            name, upper, limit = parsed[0]
+            values = self.sorted_values[name]
+            if upper:
+                k = np.searchsorted(values, limit, side='right')
+                if k == 0:
+                    return None
+                return self.solution(self.tables[name][PREFIX_MAX if maximize else PREFIX_MIN, t, k - 1])
+            k = np.searchsorted(values, limit, side='left')
+            if k == len(values):
+                return None
+            return self.solution(self.tables[name][SUFFIX_MAX if maximize else SUFFIX_MIN, t, k])
+        feasible = np.ones(len(self), dtype=bool)
+        for name, upper, limit in parsed:
+            feasible &= self.columns[name] <= limit if upper else self.columns[name] >= limit
+        if not feasible.any():
+            return None
+        values = np.where(feasible, self.columns[objective], -np.inf if maximize else np.inf)
+        return self.solution(int(np.argmax(values) if maximize else np.argmin(values)))
+
+    @staticmethod
+    def _parse_bound(key, value):
+        side, _, name = key.partition('_')
+        if side not in ('max', 'min') or name not in COLUMNS:
+            raise ValueError(f"Unknown bound '{key}'; expected max_<column> or min_<column> "
+                             f"with a column in {', '.join(COLUMNS)}")
+        return name, side == 'max', float(value)
+
+    def summary(self):
+        """Size of the front and the range of every metric."""
+        return {'solutions': len(self),
+                'columns': {name: [float(self.sorted_values[name][0]), float(self.sorted_values[name][-1])]
+                            if len(self) else None for name in COLUMNS}}
+
+
+def _handler(index):
+    class FrontQueryHandler(BaseHTTPRequestHandler):
+        """GET /query?maximize=<column>&max_<column>=<value>... and GET /summary, answered as JSON."""
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = dict(parse_qsl(url.query))
+            try:
+                if url.path == '/summary':
+                    self._reply(200, index.summary())
+                elif url.path == '/query':
+                    if ('maximize' in query) == ('minimize' in query):
+                        raise ValueError("Give exactly one of maximize=<column> or minimize=<column>")
+                    maximize = 'maximize' in query
+                    objective = query.pop('maximize' if maximize else 'minimize')
+                    unknown = sorted(set(query) - set(BOUNDS))
+                    if unknown:
+                        raise ValueError(f"Unknown query parameters {', '.join(unknown)}; expected "
+                                         f"max_<column> or min_<column> with a column in {', '.join(COLUMNS)}")
+                    self._reply(200, {'solution': index.best(objective, maximize, **query)})
+                else:
+                    self._reply(404, {'error': f"Unknown path {url.path}"})
+            except (ValueError, TypeError, KeyError) as e:
+                self._reply(400, {'error': str(e)})
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logger.info("%s - %s", self.address_string(), format % args)
+
+    return FrontQueryHandler
+
+
+def make_server(index, host='127.0.0.1', port=8765):
+    """HTTP server answering front queries on ``host:port`` (call ``serve_forever`` to run it)."""
+    return ThreadingHTTPServer((host, port), _handler(index))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve constrained lookups on a saved Pareto front index.")
+    parser.add_argument('index', help="front_index.npz written by the app export or cli.py")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="port to listen on (default: 8765)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+    index = FrontIndex.load(args.index)
+    server = make_server(index, args.host, args.port)
+    logger.info("Serving %d front solutions on http://%s:%d", len(index), args.host, server.server_port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
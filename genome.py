@@ -0,0 +1,72 @@
+import numpy as np
+from pymoo.core.duplicate import DuplicateElimination
+
+# Genome encodings for Problem 3 individuals. A dense genome is a 0/1 row with
+# one entry per compound; a packed genome is the same row as np.packbits
+# bytes, 1 bit per compound instead of 8 bytes.
+
+
+def pack(X):
+    """Packed bytes of every row of a 0/1 population matrix."""
+    return np.packbits(np.asarray(X) != 0, axis=1)
+
+
+def unpack(P, n):
+    """0/1 uint8 population matrix of n compounds from packed rows."""
+    return np.unpackbits(np.asarray(P, dtype=np.uint8), axis=1, count=n)
+
+
+def is_packed(problem):
+    return getattr(problem, 'packed', False)
+
+
+def encode(problem, X):
+    """Dense 0/1 rows in the genome encoding of ``problem``."""
+    return pack(X) if is_packed(problem) else X
+
+
+def decode(problem, X):
+    """Genomes of ``problem`` as dense 0/1 rows."""
+    return unpack(X, len(problem.graph)) if is_packed(problem) else X
+
+
+def zone_of(problem, x):
+    """Positions of the compounds vacated by one genome."""
+    if is_packed(problem):
+        return np.flatnonzero(np.unpackbits(x.astype(np.uint8, copy=False), count=len(problem.graph)))
+    return np.flatnonzero(x)
+
+
+def zone_rows(problem, zones):
+    """Population matrix (in the encoding of ``problem``) with one row per zone."""
+    n = len(problem.graph)
+    if not is_packed(problem):
+        X = np.zeros((len(zones), n))
+        for k, zone in enumerate(zones):
+            X[k, zone] = 1
+        return X
+    P = np.zeros((len(zones), (n + 7) // 8), dtype=np.uint8)
+    for k, zone in enumerate(zones):
+        zone = np.asarray(zone, dtype=np.int64)
+        np.bitwise_or.at(P[k], zone >> 3, (0x80 >> (zone & 7)).astype(np.uint8))
+    return P
+
+
+class PackedDuplicateElimination(DuplicateElimination):
+    """Exact duplicate detection by hashing each genome's bytes: O(n_pop) instead of pairwise distances.
+
+    Marks the same individuals as pymoo's default elimination: a genome equal
+    to an earlier one in the population, or to any in ``other``.
+    """
+
+    def _do(self, pop, other, is_duplicate):
+        seen = set()
+        if other is not None:
+            seen.update(x.tobytes() for x in np.ascontiguousarray(self.func(other)))
+        for i, x in enumerate(np.ascontiguousarray(self.func(pop))):
+            key = x.tobytes()
+            if key in seen:
+                is_duplicate[i] = True
+            elif other is None:
+                seen.add(key)
+        return is_duplicate
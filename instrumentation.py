@@ -0,0 +1,107 @@
+import contextlib
+import logging
+import time
+import numpy as np
+from pymoo.core.callback import Callback
+
+logger = logging.getLogger(__name__)
+
+SPANS = ('validation', 'decomposition', 'setup', 'optimization', 'merge', 'post-processing', 'clustering')
+
+_NO_SPAN = contextlib.nullcontext()
+
+
+class RunCancelled(Exception):
+    """Raised from an ``on_generation`` hook to stop a run after the current generation."""
+
+
+class Instrumentation:
+    """Named timing spans and per-generation metrics for one Problem 3 run.
+
+    ``on_generation(metrics)`` is called with each generation's metrics dict
+    as soon as it is recorded. A disabled instance records nothing: ``span``
+    returns a shared no-op context and ``callback`` returns pymoo's default
+    empty Callback.
+    """
+
+    def __init__(self, enabled=True, on_generation=None):
+        self.enabled = enabled
+        self.on_generation = on_generation
+        self.spans = []
+        self.generations = []
+        self._origin = time.perf_counter()
+
+    def span(self, name):
+        if not self.enabled:
+            return _NO_SPAN
+        return self._span(name)
+
+    @contextlib.contextmanager
+    def _span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.spans.append({'name': name, 'start': start - self._origin, 'seconds': seconds})
+            logger.info("%s time: %.2f seconds", name, seconds)
+
+    def callback(self):
+        """pymoo callback feeding ``record_generation`` (pymoo's empty default when disabled)."""
+        return GenerationCallback(self) if self.enabled else Callback()
+
+    def record_generation(self, metrics):
+        self.generations.append(metrics)
+        logger.debug("Generation %(generation)d: %(n_eval)d evaluations, %(evals_per_sec).0f evals/s, "
+                     "%(feasible_fraction).2f feasible, front %(front_size)d, best m %(best_m).2f", metrics)
+        if self.on_generation is not None:
+            self.on_generation(metrics)
+
+    def timings(self):
+        """Total seconds per span name."""
+        totals = {}
+        for span in self.spans:
+            totals[span['name']] = totals.get(span['name'], 0.0) + span['seconds']
+        return totals
+
+    def report(self):
+        """JSON-serializable report of all spans and generations, or None when disabled."""
+        if not self.enabled:
+            return None
+        return {
+            'timings': self.timings(),
+            'spans': list(self.spans),
+            'generations': list(self.generations)
+        }
+
+
+class GenerationCallback(Callback):
+    """Collect evaluations/sec, feasible fraction, front size and best m after every generation."""
+
+    def __init__(self, instrumentation):
+        super().__init__()
+        self.instrumentation = instrumentation
+        self._last_time = time.perf_counter()
+        self._last_eval = 0
+
+    def notify(self, algorithm):
+        now = time.perf_counter()
+        n_eval = int(algorithm.evaluator.n_eval)
+        elapsed = now - self._last_time
+        feasible = algorithm.pop.get('feasible')
+        opt = algorithm.opt
+        best_m = 0.0
+        if opt is not None and len(opt):
+            opt_F = opt.get('F')[opt.get('feasible')[:, 0]]
+            if len(opt_F):
+                best_m = float(np.max(-opt_F[:, 2]))
+        self.instrumentation.record_generation({
+            'generation': int(algorithm.n_gen),
+            'n_eval': n_eval,
+            'seconds': elapsed,
+            'evals_per_sec': (n_eval - self._last_eval) / elapsed if elapsed > 0 else 0.0,
+            'feasible_fraction': float(np.mean(feasible)) if len(feasible) else 0.0,
+            'front_size': len(opt) if opt is not None else 0,
+            'best_m': best_m
+        })
+        self._last_time, self._last_eval = now, n_eval
@@ -0,0 +1,222 @@
+import functools
+import itertools
+import logging
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import RunCancelled
+from result_cache import result_key
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+
+# Runs are started as fresh interpreters: forking a process with live Streamlit and
+# pool threads is unsafe, and a separate process does not compete for the app's GIL
+_context = multiprocessing.get_context('spawn')
+_start_lock = threading.Lock()
+
+
+def _run_in_process(compute, compounds, params, messages, cancel):
+    """Child process body: run ``compute`` and report progress and the outcome through ``messages``."""
+    def on_generation(metrics):
+        messages.put(('progress', metrics))
+        if cancel.is_set():
+            raise RunCancelled("Job cancelled")
+
+    try:
+        messages.put((DONE, compute(compounds, params, callback=on_generation)))
+    except RunCancelled:
+        messages.put((CANCELLED, None))
+    except Exception as e:
+        messages.put((FAILED, f"{type(e).__name__}: {e}"))
+
+
+def _start(process):
+    """Start a spawned process without running the launching script again in it.
+
+    Spawn re-imports ``__main__`` in the child, and Streamlit installs the app
+    script as ``__main__``; runs only need the modules they import themselves.
+    """
+    with _start_lock:
+        main = sys.modules['__main__']
+        sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            process.start()
+        finally:
+            sys.modules['__main__'] = main
+
+
+class Job:
+    """State of one background Problem 3 run or sweep, shared between its monitoring thread and the UI."""
+
+    def __init__(self, job_id, compounds, params):
+        self.id = job_id
+        self.compounds = compounds
+        self.params = dict(params)
+        self.status = QUEUED
+        self.progress = []  # per-generation metrics, appended as the run reports them
+        self.result = None  # (best_solution, results, F) once done; the table for sweeps
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+        self.cached = False  # True if the result came from the result cache
+        self._cancel = _context.Event()  # shared with the run's process
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def fraction_done(self):
+        """Completed fraction of the generation budget (1.0 once finished)."""
+        if not self.active:
+            return 1.0
+        total = max(int(self.params.get('max_generations', 1)), 1)
+        latest = self.progress[-1] if self.progress else {}
+        if 'scenarios' in latest:
+            # Sweep: scenarios finished so far plus the generations of the current optimization
+            done = latest['scenario'] - 1 + min(latest.get('generation', total) / total, 1.0)
+            return min(done / latest['scenarios'], 1.0)
+        if 'parts' in latest:
+            # Decomposed run: parts finished so far plus the generations of the current one
+            return min((latest['part'] - 1 + min(latest['generation'] / total, 1.0)) / latest['parts'], 1.0)
+        return min(len(self.progress) / total, 1.0)
+
+    def cancel(self):
+        """Ask the run to stop; it ends at the next generation boundary."""
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.status = CANCELLED
+            self.finished = time.time()
+
+
+class JobManager:
+    """Runs Problem 3 optimizations and parameter sweeps in background processes, addressed by job ID.
+
+    At most ``max_workers`` runs execute at once, each in its own spawned
+    process watched by a thread that only waits on the process's messages.
+    Jobs stream per-generation metrics into ``Job.progress`` and can be
+    cancelled between generations. Finished jobs are kept for
+    ``finished_ttl`` seconds, and at most ``max_finished`` of them (least
+    recently finished are dropped first), or until ``discard``ed, so a UI
+    can poll and re-render them freely. With a ``ResultCache``, a scenario
+    that was already solved completes immediately from the cache, and new
+    results are stored in it.
+    """
+
+    def __init__(self, max_workers=2, cache=None, max_finished=64, finished_ttl=24 * 3600):
+        self.cache = cache
+        self.max_finished = int(max_finished)
+        self.finished_ttl = finished_ttl
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='problem3')
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit_problem_three(self, compounds, params):
+        """Queue a Problem 3 run and return its job ID."""
+        from problem_three import compute_problem_three, resummarize
+
+        job = self._add(compounds, params)
+        key = result_key('problem3', compounds, params) if self.cache is not None else None
+        cached = self.cache.get(key) if key is not None else None
+        if cached is not None:
+            # The cache holds the front; its summary point depends on the requested target_m
+            job.result, job.cached = resummarize(compounds, params, cached), True
+            instrumentation = cached[1].get('instrumentation')
+            job.progress = list(instrumentation['generations']) if instrumentation else []
+            job.status = DONE
+            job.started = job.finished = time.time()
+            logger.info("%s served from the result cache", job.id)
+            return job.id
+        job.future = self.executor.submit(self._run, job, compute_problem_three, key)
+        logger.info("Submitted %s", job.id)
+        return job.id
+
+    def submit_sweep(self, compounds, params, grid):
+        """Queue a parameter sweep (``sweep.run_sweep``) and return its job ID; the result is the sweep table."""
+        from sweep import run_sweep
+
+        job = self._add(compounds, params)
+        job.future = self.executor.submit(self._run, job, functools.partial(run_sweep, grid=grid))
+        logger.info("Submitted sweep %s", job.id)
+        return job.id
+
+    def _add(self, compounds, params):
+        with self._lock:
+            self._evict()
+            job = Job(f"job-{next(self._ids)}", compounds, params)
+            self.jobs[job.id] = job
+        return job
+
+    def _run(self, job, compute, key=None):
+        job.status = RUNNING
+        job.started = time.time()
+        messages = _context.Queue()
+        process = _context.Process(target=_run_in_process, args=(compute, job.compounds, job.params, messages,
+                                                                 job._cancel), name=job.id)
+        try:
+            _start(process)
+            while True:
+                try:
+                    kind, payload = messages.get(timeout=1.0)
+                except queue.Empty:
+                    if not process.is_alive():
+                        raise RuntimeError(f"run process exited with code {process.exitcode}")
+                    continue
+                if kind == 'progress':
+                    job.progress.append(payload)
+                    continue
+                if kind == DONE:
+                    job.result = payload
+                    if key is not None:
+                        self.cache.put(key, job.result)
+                job.error = payload if kind == FAILED else None
+                job.status = kind
+                break
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+        finally:
+            if process.pid is not None:
+                process.join()
+            job.finished = time.time()
+            logger.info("%s %s", job.id, job.status)
+
+    def _evict(self):
+        """Forget finished jobs past ``finished_ttl`` and the oldest beyond ``max_finished``."""
+        finished = sorted((job for job in self.jobs.values() if not job.active and job.finished is not None),
+                          key=lambda job: job.finished)
+        expired = [job for job in finished if time.time() - job.finished > self.finished_ttl]
+        excess = finished[:max(len(finished) - self.max_finished, 0)]
+        for job in expired + excess:
+            if self.jobs.pop(job.id, None) is not None:
+                logger.info("Evicted finished %s", job.id)
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job.cancel()
+
+    def discard(self, job_id):
+        """Cancel a job if needed and forget it."""
+        with self._lock:
+            job = self.jobs.pop(job_id, None)
+        if job is not None and job.active:
+            job.cancel()
+
+    def shutdown(self):
+        for job in list(self.jobs.values()):
+            if job.active:
+                job.cancel()
+        self.executor.shutdown(wait=True)
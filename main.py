@@ -1,12 +1,26 @@
 import streamlit as st
 import pandas as pd
+import io
 import json
+import logging
 import os
-from data_handler import load_compounds, load_params
-from problem_two import compute_problem_two
-from problem_three import compute_problem_three
-import plotly.graph_objects as go
-from zipfile import ZipFile
+import time
+import uuid
+from data_handler import load_compound_graph, load_params
+from checkpoint import prune_checkpoints
+from compound_graph import CompoundGraph
+from problem_two import compute_problem_two, grow_frontier
+from sweep import parse_grid_values
+from jobs import JobManager, DONE, FAILED
+from result_cache import ResultCache
+from utils import cost_effectiveness_figure, pareto_front_figure
+from front_query import COLUMNS as FRONT_COLUMNS, FrontIndex
+from export import build_zip, cost_effectiveness_curve, problem_three_entries, problem_two_entries
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+
+RESULT_CACHE_DIR = ".result_cache"
+CHECKPOINT_DIR = ".checkpoints"
 
 st.set_page_config(page_title="Urban Renewal Decision Software", layout="wide")
 
@@ -20,6 +34,28 @@ years = st.sidebar.number_input("Investment Years", min_value=1, value=10)
 target_m = st.sidebar.number_input("Target m", min_value=0.0, value=20.0)
 population_size = st.sidebar.number_input("Population Size", min_value=10, value=100)
 max_generations = st.sidebar.number_input("Max Generations", min_value=10, value=200)
+vectorized = st.sidebar.checkbox("Vectorized Evaluation", value=True)
+workers = st.sidebar.number_input("Workers", min_value=1, max_value=os.cpu_count() or 1, value=1)
+solver = st.sidebar.selectbox("Problem 3 Solver", ["nsga2", "exact"])
+cache_size = st.sidebar.number_input("Fitness Cache Size", min_value=0, value=10000)
+archive_size = st.sidebar.number_input("Pareto Archive Size (0 = final population only)", min_value=0, value=500)
+operators = st.sidebar.selectbox("NSGA-II Operators", ["connected", "default"])
+genome = st.sidebar.selectbox("Genome Encoding", ["dense", "packed"])
+delta_evaluation = st.sidebar.checkbox("Delta Constraint Evaluation", value=False)
+decompose = st.sidebar.checkbox("Solve Districts Separately", value=False)
+max_part_size = st.sidebar.number_input("Max District Size (0 = no limit)", min_value=0, value=0)
+warm_start = st.sidebar.checkbox("Warm Start from Last Run", value=False)
+warm_start_generations = st.sidebar.number_input("Warm-Start Generations (0 = all)", min_value=0, value=20)
+seed_problem_two = st.sidebar.checkbox("Seed from Problem 2 Growth", value=False)
+checkpoint_every = st.sidebar.number_input("Checkpoint Every (generations, 0 = end of run)", min_value=0, value=0)
+instrument = st.sidebar.checkbox("Collect Run Metrics", value=True)
+
+# Each session checkpoints into its own directory, so warm starts never pick up another session's run.
+# Sessions end without notice, so each new session removes stale and excess directories left by others.
+if 'checkpoint_path' not in st.session_state:
+    session_dir = os.path.join(CHECKPOINT_DIR, uuid.uuid4().hex)
+    prune_checkpoints(CHECKPOINT_DIR, keep=[session_dir])
+    st.session_state.checkpoint_path = os.path.join(session_dir, "problem3.npz")
 
 params = {
     'cost_per_household': cost_per_household,
@@ -27,80 +63,173 @@ params = {
     'years': years,
     'target_m': target_m,
     'population_size': population_size,
-    'max_generations': max_generations
+    'max_generations': max_generations,
+    'vectorized': vectorized,
+    'workers': workers,
+    'solver': solver,
+    'cache_size': cache_size,
+    'archive_size': archive_size,
+    'operators': operators,
+    'genome': genome,
+    'delta_evaluation': delta_evaluation,
+    'decompose': decompose,
+    'max_part_size': max_part_size,
+    'checkpoint_path': st.session_state.checkpoint_path,
+    'checkpoint_every': checkpoint_every,
+    'warm_start': warm_start,
+    'seed_problem_two': seed_problem_two,
+    'warm_start_generations': warm_start_generations,
+    'instrument': instrument
 }
 
 # File uploads
 st.sidebar.header("Data Upload")
-compounds_file = st.sidebar.file_uploader("Upload Compounds CSV", type="csv")
+compounds_file = st.sidebar.file_uploader("Upload Compounds (CSV, Parquet or NPZ)", type=["csv", "parquet", "npz"])
 params_file = st.sidebar.file_uploader("Upload Parameters JSON", type="json")
 
+# Graphs are cached by input content, so reruns do not re-parse unchanged tables
+@st.cache_resource(max_entries=4)
+def load_default_graph(mtime):
+    return load_compound_graph()
+
+
+@st.cache_resource(max_entries=4)
+def graph_from_upload(name, data):
+    return load_compound_graph(io.BytesIO(data), file_format=os.path.splitext(name)[1].lstrip('.').lower())
+
+
+# The editor frame is cached by table content, and an edited graph by its base table and the editor's
+# changes, so polling reruns neither rebuild the frame nor hash it
+@st.cache_resource(max_entries=4)
+def frame_of_graph(fingerprint, _graph):
+    return _graph.to_frame()
+
+
+@st.cache_resource(max_entries=16)
+def graph_from_edits(fingerprint, edits, _edited_df):
+    return CompoundGraph.from_frame(_edited_df)
+
+
 # Load data
 if compounds_file:
-    compounds_df = pd.read_csv(compounds_file)
-    compounds = [
-        {
-            'id': int(row['id']),
-            'area': float(row['area']),
-            'households': int(row['households']),
-            'adjacent': eval(row['adjacent']),
-            'rent': float(row['rent']),
-            'alpha': 50.0
-        } for _, row in compounds_df.iterrows()
-    ]
+    graph = graph_from_upload(compounds_file.name, compounds_file.getvalue())
 else:
-    compounds = load_compounds()
+    default_path = "templates/compounds.csv"
+    graph = load_default_graph(os.path.getmtime(default_path) if os.path.exists(default_path) else None)
 
 if params_file:
     params = json.load(params_file)
 
 # Display and edit compounds
 st.header("Compounds Data")
-compounds_df = pd.DataFrame([
-    {'id': c['id'], 'area': c['area'], 'households': c['households'],
-     'adjacent': str(c['adjacent']), 'rent': c['rent']}
-    for c in compounds
-])
-edited_df = st.data_editor(compounds_df, num_rows="dynamic")
-if edited_df is not None:
-    compounds = [
-        {
-            'id': int(row['id']),
-            'area': float(row['area']),
-            'households': int(row['households']),
-            'adjacent': eval(row['adjacent']),
-            'rent': float(row['rent']),
-            'alpha': 50.0
-        } for _, row in edited_df.iterrows()
-    ]
+compounds_df = frame_of_graph(graph.fingerprint(), graph)
+edited_df = st.data_editor(compounds_df, num_rows="dynamic", key="compounds_editor")
+# The editor state lists edited, added and deleted rows; rebuild the graph only when there are any
+editor_state = st.session_state.compounds_editor
+if edited_df is not None and any(editor_state.values()):
+    graph = graph_from_edits(graph.fingerprint(), json.dumps(editor_state, sort_keys=True, default=str), edited_df)
+
+
+# Results are cached by content (compound table + parameters) in memory and on disk, across sessions and restarts
+@st.cache_resource
+def get_result_cache():
+    return ResultCache(RESULT_CACHE_DIR)
+
+
+# Problem 3 runs on a background job pool shared by all sessions; each session keeps its job IDs
+@st.cache_resource
+def get_job_manager():
+    return JobManager(max_workers=2, cache=get_result_cache())
+
+
+result_cache = get_result_cache()
+job_manager = get_job_manager()
+if 'problem_three_jobs' not in st.session_state:
+    st.session_state.problem_three_jobs = []
+if 'sweep_jobs' not in st.session_state:
+    st.session_state.sweep_jobs = []
+
+
+def submit_problem_three(compounds, run_params):
+    # Button callback: runs once per click, not again on the progress polling reruns
+    st.session_state.problem_three_jobs.append(job_manager.submit_problem_three(compounds, run_params))
+
+
+def submit_sweep(compounds, run_params, inputs):
+    # Button callback, like submit_problem_three
+    grid = {name: parse_grid_values(text, cast) for name, (text, cast) in inputs.items() if text.strip()}
+    st.session_state.sweep_grid_missing = not grid
+    if grid:
+        st.session_state.sweep_jobs.append(job_manager.submit_sweep(compounds, run_params, grid))
+
 
 # Run buttons
 col1, col2, col3 = st.columns(3)
 with col1:
     run_problem_two = st.button("Run Problem 2")
 with col2:
-    run_problem_three = st.button("Run Problem 3")
+    st.button("Run Problem 3", on_click=submit_problem_three, args=(graph, params))
 with col3:
     export = st.button("Export Results")
 
 # Results
 if run_problem_two:
-    sorted_df, feasible_sequence = compute_problem_two(compounds, params)
+    sorted_df, feasible_sequence = result_cache.get_or_compute('problem2', graph, params, compute_problem_two)
     st.header("Problem 2 Results")
     st.write("Sorted Compounds by Marginal Cost-effectiveness:")
     st.dataframe(sorted_df)
     st.write(f"Feasible Sequence: {feasible_sequence}")
-    sorted_df.to_csv("sorting_results.csv", index=False)
+    st.write("Frontier Growth Curve (cumulative cost and m per step):")
+    st.dataframe(result_cache.get_or_compute('frontier', graph, params, grow_frontier))
+    # Kept per session for export instead of a shared file in the working directory
+    st.session_state.problem_two_result = (sorted_df, feasible_sequence)
+
+# Finished jobs are evicted by the job manager after a while; forget their IDs too
+st.session_state.problem_three_jobs = [job_id for job_id in st.session_state.problem_three_jobs
+                                       if job_manager.get(job_id) is not None]
+session_jobs = [job for job in map(job_manager.get, st.session_state.problem_three_jobs) if job is not None]
+if session_jobs:
+    st.header("Problem 3 Jobs")
+    for job in reversed(session_jobs):
+        job_col, progress_col, cancel_col = st.columns([2, 5, 1])
+        with job_col:
+            st.write(f"**{job.id}**: {job.status}" + (" (cached)" if job.cached else "")
+                     + (f" ({job.error})" if job.error else ""))
+        progress = list(job.progress)  # snapshot: the monitoring thread keeps appending
+        with progress_col:
+            latest = progress[-1] if progress else None
+            st.progress(job.fraction_done(), text=(
+                (f"District {latest['part']}/{latest['parts']}, " if 'parts' in latest else "") +
+                f"Generation {latest['generation']}: front {latest['front_size']}, best m {latest['best_m']:.2f}, "
+                f"{latest['evals_per_sec']:.0f} evals/s" if latest else job.status))
+        with cancel_col:
+            if job.active:
+                if st.button("Cancel", key=f"cancel_{job.id}"):
+                    job.cancel()
+            elif st.button("Remove", key=f"remove_{job.id}"):
+                job_manager.discard(job.id)
+                st.session_state.problem_three_jobs.remove(job.id)
+                for per_job in ('figures', 'front_indexes'):
+                    st.session_state.get(per_job, {}).pop(job.id, None)
+                st.rerun()
+        if job.active and progress:
+            st.line_chart(pd.DataFrame(progress).set_index('generation')[['best_m', 'front_size']])
 
-if run_problem_three:
-    best_solution, results, F = compute_problem_three(compounds, params)
+finished_jobs = [job for job in session_jobs if job.status == DONE]
+if finished_jobs:
+    job = finished_jobs[-1]
+    if len(finished_jobs) > 1:
+        shown_id = st.selectbox("Show results of", [j.id for j in reversed(finished_jobs)])
+        job = job_manager.get(shown_id)
+    best_solution, results, F = job.result
+    job_graph, job_params = job.compounds, job.params
     st.header("Problem 3 Results")
-    
+
     output = "=== Optimal Solution ===\n"
-    if results['m'] >= params['target_m']:
+    if results['m'] >= job_params['target_m']:
         output += f"Found inflection point (m = {results['m']:.2f}):\n"
     else:
-        output += f"No inflection point with m >= {params['target_m']:.1f}. Maximum m = {results['m']:.2f}:\n"
+        output += f"No inflection point with m >= {job_params['target_m']:.1f}. Maximum m = {results['m']:.2f}:\n"
     output += f"- Vacated Compounds: {results['vacated_compounds']}\n"
     output += f"- Relocated Households: {results['households']}\n"
     output += f"- Total Relocation Cost: {results['cost']/1e4:.2f} 10k Yuan\n"
@@ -109,45 +238,128 @@ if run_problem_three:
     output += f"- Total Profit: {results['profit']/1e4:.2f} 10k Yuan\n"
     output += "- Vacated Compounds:\n"
     for i in results['vacated_ids']:
-        c = next(c for c in compounds if c['id'] == i)
-        output += f"  - Compound {i} (Area: {c['area']:.1f} m², Households: {c['households']})\n"
+        idx = job_graph.index_of(i)
+        output += f"  - Compound {i} (Area: {job_graph.area[idx]:.1f} m², Households: {job_graph.households[idx]})\n"
     output += "- Contiguous Zones:\n"
     for zone_idx, (root, cids) in enumerate(results['cluster_groups'].items(), 1):
-        cluster_area = sum(c['area'] for c in compounds if c['id'] in cids)
+        cluster_area = job_graph.area[job_graph.index_of(cids)].sum()
         output += f"  Zone {zone_idx}: Compounds {sorted(cids)} (Total Area: {cluster_area:.1f} m²)\n"
     output += "- Relocation Details: Residents relocated to external housing.\n"
     
     st.text(output)
+    if results.get('parallel'):
+        st.write(f"Parallel evaluation on {results['parallel']['workers']} workers: "
+                 f"{results['parallel']['speedup']:.2f}x estimated speedup over one core "
+                 f"({results['parallel']['cpu_per_wall']:.2f} CPU-seconds per wall-second, "
+                 f"{results['parallel']['efficiency']:.0%} parallel efficiency)")
+    if results.get('decomposition'):
+        decomposition = results['decomposition']
+        st.write(f"Solved {decomposition['parts']} districts separately (largest: {decomposition['largest_part']} "
+                 f"compounds); merged front of {decomposition['merged_front']} solutions")
+    if results.get('archive'):
+        st.write(f"Pareto archive: {results['archive']['size']} solutions kept from the whole run "
+                 f"({results['archive']['pruned']} pruned by crowding)")
+    if results.get('warm_start'):
+        warm = results['warm_start']
+        origin = f"resumed at generation {warm['from_generation']}" if warm['resumed'] else "warm-started"
+        st.write(f"Search {origin} with {warm['seeds']} seeded individuals; ran {warm['generations']} generations")
+    if results.get('delta'):
+        st.write(f"Delta evaluation: {results['delta']['incremental']} offspring checked incrementally, "
+                 f"{results['delta']['full']} in full")
+    if results.get('cache'):
+        st.write(f"Fitness cache: {results['cache']['hits']} hits, {results['cache']['misses']} misses, "
+                 f"{results['cache']['evictions']} evictions")
+    if results.get('instrumentation'):
+        st.write("Run Timings (seconds):")
+        st.dataframe(pd.Series(results['instrumentation']['timings'], name='seconds'))
+        if results['instrumentation']['generations']:
+            st.line_chart(pd.DataFrame(results['instrumentation']['generations'])
+                          .set_index('generation')[['best_m', 'front_size']])
+        st.download_button("Download Run Metrics", json.dumps(results['instrumentation'], indent=4),
+                           file_name="run_metrics.json")
     
-    # Visualizations
+    # Visualizations: WebGL figures, downsampled and built once per result
+    figures = st.session_state.setdefault('figures', {})
+    if job.id not in figures:
+        figures[job.id] = {'pareto_front': pareto_front_figure(F)}
+        if results.get('pareto_set') is not None:
+            households, m = cost_effectiveness_curve(job_graph, F, results['pareto_set'])
+            figures[job.id]['cost_effectiveness'] = cost_effectiveness_figure(households, m, results['households'],
+                                                                              results['m'])
     st.subheader("Pareto Front")
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=-F[:, 0], y=F[:, 1]/1e4, mode='markers', name='Pareto Front'))
-    fig.update_layout(
-        xaxis_title='Vacated Compounds',
-        yaxis_title='Total Relocation Cost (10k Yuan)',
-        title='Pareto Front'
-    )
-    st.plotly_chart(fig)
+    st.plotly_chart(figures[job.id]['pareto_front'])
     
-    st.subheader("Cost-effectiveness Curve")
-    st.image("cost_effectiveness.png")
-    
-    with open("inflection_results.txt", "w") as f:
-        f.write(output)
+    if 'cost_effectiveness' in figures[job.id]:
+        st.subheader("Cost-effectiveness Curve")
+        st.plotly_chart(figures[job.id]['cost_effectiveness'])
+
+        # What-if lookups on the stored front instead of another optimization run
+        with st.expander("Query Pareto Front"):
+            front_indexes = st.session_state.setdefault('front_indexes', {})
+            if job.id not in front_indexes:
+                front_indexes[job.id] = FrontIndex.from_results(job_graph, results, F, job_params)
+            q_goal, q_objective, q_column, q_side, q_limit = st.columns(5)
+            goal = q_goal.selectbox("Find", ["max", "min"])
+            objective = q_objective.selectbox("of", FRONT_COLUMNS, index=FRONT_COLUMNS.index('m'))
+            column = q_column.selectbox("where", FRONT_COLUMNS, index=FRONT_COLUMNS.index('cost'))
+            side = q_side.selectbox("is", ["<=", ">="])
+            limit = q_limit.number_input("value", value=float(results['cost']))
+            bound = f"{'max' if side == '<=' else 'min'}_{column}"
+            solution = front_indexes[job.id].best(objective, goal == "max", **{bound: limit})
+            if solution is None:
+                st.write("No solution on the front satisfies this bound.")
+            else:
+                st.write({k: v for k, v in solution.items() if k != 'row'})
 
+# Parameter sweep: scenarios that only rescale the objectives reuse one optimized front
+with st.expander("Parameter Sweep"):
+    st.write("Comma-separated values per parameter; empty fields keep the sidebar value.")
+    sweep_inputs = {
+        'cost_per_household': (st.text_input("Cost per Household values", ""), float),
+        'years': (st.text_input("Investment Years values", ""), int),
+        'alpha': (st.text_input("Alpha values (uniform)", ""), float),
+        'target_m': (st.text_input("Target m values", ""), float),
+    }
+    st.button("Run Sweep", on_click=submit_sweep, args=(graph, params, sweep_inputs))
+    if st.session_state.get('sweep_grid_missing'):
+        st.warning("Enter at least one list of values to sweep.")
+    # Only the latest sweep of this session is shown; it runs on the job pool like Problem 3
+    sweep_job = job_manager.get(st.session_state.sweep_jobs[-1]) if st.session_state.sweep_jobs else None
+    if sweep_job is not None and sweep_job.active:
+        sweep_progress = sweep_job.progress[-1] if sweep_job.progress else None
+        st.progress(sweep_job.fraction_done(), text=(
+            f"Scenario {sweep_progress['scenario']}/{sweep_progress['scenarios']}" if sweep_progress
+            else sweep_job.status))
+        if st.button("Cancel Sweep"):
+            sweep_job.cancel()
+    elif sweep_job is not None and sweep_job.status == DONE:
+        sweep_table = sweep_job.result
+        st.write(f"{len(sweep_table)} scenarios, {sweep_table['optimized'].sum()} optimization runs")
+        st.dataframe(sweep_table.drop(columns=['vacated_ids']))
+        st.download_button("Download Sweep CSV", sweep_table.to_csv(index=False), file_name="sweep_results.csv")
+    elif sweep_job is not None and sweep_job.status == FAILED:
+        st.error(f"Sweep failed: {sweep_job.error}")
+
+# Export: the ZIP is built in memory from this session's results; figures are only rendered when selected
+export_entries = []
+if 'problem_two_result' in st.session_state:
+    export_entries += problem_two_entries(*st.session_state.problem_two_result)
+if finished_jobs:
+    export_entries += problem_three_entries(job_graph, results, F, output, job_params)
+if export_entries:
+    export_names = [name for name, _ in export_entries]
+    export_selection = st.multiselect("Files to export", export_names, default=export_names)
 if export:
-    with ZipFile("results.zip", "w") as z:
-        if os.path.exists("sorting_results.csv"):
-            z.write("sorting_results.csv")
-        if os.path.exists("inflection_results.txt"):
-            z.write("inflection_results.txt")
-        if os.path.exists("pareto_front.png"):
-            z.write("pareto_front.png")
-        if os.path.exists("cost_effectiveness.png"):
-            z.write("cost_effectiveness.png")
-    with open("results.zip", "rb") as f:
-        st.download_button("Download Results", f, file_name="results.zip")
+    if not export_entries:
+        st.warning("Run Problem 2 or Problem 3 before exporting.")
+    else:
+        st.download_button("Download Results", build_zip(export_entries, include=export_selection),
+                           file_name="results.zip", mime="application/zip")
+
+# Poll while this session has jobs running so progress keeps streaming in
+if any(job.active for job in session_jobs) or (sweep_job is not None and sweep_job.active):
+    time.sleep(1)
+    st.rerun()
 
 if __name__ == "__main__":
     st.write("Urban Renewal Decision Software loaded successfully.")
\ No newline at end of file
@@ -0,0 +1,182 @@
+import numpy as np
+from pymoo.core.crossover import Crossover
+from pymoo.core.mutation import Mutation
+from pymoo.core.sampling import Sampling
+from connectivity import component_labels
+from genome import is_packed, zone_of, zone_rows
+
+# All randomness goes through np.random, which pymoo seeds from minimize(seed=...),
+# so runs with these operators stay reproducible. Genomes go through the genome
+# helpers, so the same draws produce the same zones in dense and packed mode.
+# With delta evaluation the problem has a ``lineage``, where each offspring is
+# recorded with its closest parent; recording draws no random numbers.
+
+
+def _adjacency(problem):
+    return problem.graph.undirected_adjacency()
+
+
+def grow_zone(A, seed, target, region=None):
+    """Randomly grow a connected zone of up to ``target`` compounds from ``seed``.
+
+    Each step adds a uniformly chosen compound from the zone's boundary. If
+    ``region`` (a set of positions) is given, growth stays inside it.
+    """
+    indptr, indices = A.indptr, A.indices
+    zone = [seed]
+    seen = {seed}
+    frontier = []
+    draws = np.random.random(max(target - 1, 0)).tolist()
+    v = seed
+    while True:
+        for u in indices[indptr[v]:indptr[v + 1]].tolist():
+            if u not in seen and (region is None or u in region):
+                seen.add(u)
+                frontier.append(u)
+        if len(zone) >= target or not frontier:
+            return zone
+        k = int(draws[len(zone) - 1] * len(frontier))
+        v = frontier[k]
+        frontier[k] = frontier[-1]
+        frontier.pop()
+        zone.append(v)
+
+
+def _components(zone, A):
+    """(count, labels) of the components of the subgraph induced by a set of positions."""
+    if len(zone) > 64:
+        # Large zones: bulk labeling on the zone's adjacency rows
+        return component_labels(A, zone)
+
+    # Small zones: a set-based BFS avoids the sparse slicing overhead
+    indptr, indices = A.indptr, A.indices
+    position = {int(v): k for k, v in enumerate(zone)}
+    labels = np.full(len(position), -1)
+    count = 0
+    for start in range(len(labels)):
+        if labels[start] >= 0:
+            continue
+        labels[start] = count
+        stack = [int(zone[start])]
+        while stack:
+            v = stack.pop()
+            for u in indices[indptr[v]:indptr[v + 1]].tolist():
+                k = position.get(u)
+                if k is not None and labels[k] < 0:
+                    labels[k] = count
+                    stack.append(u)
+        count += 1
+    return count, labels
+
+
+def repair_zone(zone, A):
+    """Make a zone feasible: keep its largest connected piece and give a lone compound a neighbour."""
+    if len(zone) == 0:
+        return []
+    zone = np.asarray(zone, dtype=np.int64)
+    n_components, labels = _components(zone, A)
+    if n_components > 1:
+        zone = zone[labels == np.argmax(np.bincount(labels))]
+    zone = zone.tolist()
+    if len(zone) == 1:
+        neighbors = A.indices[A.indptr[zone[0]]:A.indptr[zone[0] + 1]]
+        if len(neighbors):
+            zone.append(int(neighbors[np.random.randint(len(neighbors))]))
+    return zone
+
+
+def _empty(problem, shape):
+    return np.zeros(shape, dtype=np.uint8 if is_packed(problem) else float)
+
+
+class ConnectedZoneSampling(Sampling):
+    """Initial population of random connected zones grown from random seed compounds.
+
+    Zone sizes are drawn log-uniformly between 2 and n so the first
+    generation already spans small and large zones along the front.
+    """
+
+    def _do(self, problem, n_samples, **kwargs):
+        A = _adjacency(problem)
+        n = len(problem.graph)
+        sizes = np.exp(np.random.uniform(np.log(2), np.log(max(n, 2)), size=n_samples)).astype(int)
+        seeds = np.random.randint(n, size=n_samples)
+        zones = [repair_zone(grow_zone(A, int(seeds[k]), int(sizes[k])), A) for k in range(n_samples)]
+        return zone_rows(problem, zones)
+
+
+class ZoneCrossover(Crossover):
+    """Merge two parent zones into connected offspring.
+
+    Each child grows a random connected zone inside the union of both parents,
+    seeded from their overlap (or from its own parent if they do not
+    overlap), with a size between the two parents' sizes.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(2, 2, **kwargs)
+
+    def _do(self, problem, X, **kwargs):
+        A = _adjacency(problem)
+        lineage = getattr(problem, 'lineage', None)
+        _, n_matings, _ = X.shape
+        Y = _empty(problem, X.shape)
+        for k in range(n_matings):
+            a = zone_of(problem, X[0, k]).tolist()
+            b = zone_of(problem, X[1, k]).tolist()
+            union = set(a) | set(b)
+            overlap = sorted(set(a) & set(b))
+            low, high = sorted((len(a), len(b)))
+            for child, parent in enumerate((a, b)):
+                pool = overlap or parent
+                if not pool:
+                    Y[child, k] = X[child, k]
+                    continue
+                seed = pool[np.random.randint(len(pool))]
+                target = np.random.randint(low, high + 1) if high > low else high
+                zone = repair_zone(grow_zone(A, seed, max(target, 2), region=union), A)
+                Y[child, k] = zone_rows(problem, [zone])[0]
+                if lineage is not None:
+                    zone_set = set(zone)
+                    closest = 0 if len(zone_set ^ set(a)) <= len(zone_set ^ set(b)) else 1
+                    lineage.record(problem, Y[child, k], X[closest, k])
+        return Y
+
+
+class ZoneMutation(Mutation):
+    """Add a boundary compound to the zone, or drop one whose removal keeps it connected."""
+
+    def __init__(self, attempts=3, **kwargs):
+        super().__init__(**kwargs)
+        self.attempts = attempts
+
+    def _do(self, problem, X, **kwargs):
+        A = _adjacency(problem)
+        lineage = getattr(problem, 'lineage', None)
+        Y = _empty(problem, X.shape)
+        for k in range(len(X)):
+            zone = repair_zone(zone_of(problem, X[k]), A)
+            if np.random.random() < 0.5 or not self._drop(zone, A):
+                self._add(zone, A)
+            Y[k] = zone_rows(problem, [zone])[0]
+            if lineage is not None:
+                lineage.record(problem, Y[k], X[k])
+        return Y
+
+    @staticmethod
+    def _add(zone, A):
+        neighbors = [A.indices[A.indptr[v]:A.indptr[v + 1]] for v in zone]
+        boundary = np.setdiff1d(np.concatenate(neighbors), zone) if neighbors else neighbors
+        if len(boundary):
+            zone.append(int(boundary[np.random.randint(len(boundary))]))
+
+    def _drop(self, zone, A):
+        if len(zone) <= 2:
+            return False
+        for _ in range(self.attempts):
+            k = np.random.randint(len(zone))
+            rest = zone[:k] + zone[k + 1:]
+            if _components(rest, A)[0] == 1:
+                zone[:] = rest
+                return True
+        return False
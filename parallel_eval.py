@@ -0,0 +1,155 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+from evaluation import PopulationEvaluator
+
+# Per-process state of pool workers: shared memory handles and the evaluator built on top of them
+_worker = {}
+
+
+def _attach(specs):
+    """Map shared memory blocks back to NumPy arrays (no copy)."""
+    handles, arrays = [], {}
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        handles.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return handles, arrays
+
+
+def _init_worker(specs):
+    handles, arrays = _attach(specs)
+    _worker['handles'] = handles
+    _worker['evaluator'] = PopulationEvaluator(
+        arrays['cost'], arrays['rent_gain'], arrays['indptr'], arrays['indices'])
+
+
+def _evaluate_chunk(X):
+    start = time.perf_counter()
+    F, G, H = _worker['evaluator'].evaluate(X)
+    return F, G, H, time.perf_counter() - start
+
+
+def _evaluate_packed_chunk(P):
+    start = time.perf_counter()
+    F, G, H = _worker['evaluator'].evaluate_packed(P)
+    return F, G, H, time.perf_counter() - start
+
+
+class SharedGraphPool:
+    """Process pool for Problem 3 fitness evaluation.
+
+    The compound arrays are copied into shared memory once when the pool
+    starts; each task only ships its slice of the population matrix. Chunks
+    are returned in submission order, so results do not depend on worker
+    scheduling. The first population is also evaluated once in-process, as
+    the serial baseline for the reported speedup.
+    """
+
+    def __init__(self, graph, params, workers):
+        self.workers = int(workers)
+        self.wall_time = 0.0
+        self.busy_time = 0.0
+        self.rows = 0
+        self.serial_time_per_row = None
+        self._blocks = []
+        arrays = {
+            'cost': graph.relocation_cost(params),
+            'rent_gain': graph.rent_gain(params),
+            'indptr': graph.indptr,
+            'indices': graph.indices,
+        }
+        self.serial = PopulationEvaluator(arrays['cost'], arrays['rent_gain'], arrays['indptr'], arrays['indices'])
+        try:
+            specs = {name: self._share(arr) for name, arr in arrays.items()}
+            # Workers only attach to shared memory, so they start as fresh interpreters rather than
+            # forks of a process that may be running other threads (e.g. a job or Streamlit thread)
+            self.pool = multiprocessing.get_context('spawn').Pool(
+                self.workers, initializer=_init_worker, initargs=(specs,))
+        except Exception:
+            self._release()
+            raise
+
+    def _share(self, arr):
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        self._blocks.append(shm)
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        return shm.name, arr.shape, arr.dtype.str
+
+    def evaluate(self, X):
+        """Evaluate X across the pool and return (F, G, H)."""
+        X = np.asarray(X, dtype=float)
+        self._measure_serial(self.serial.evaluate, X)
+        return self._map(_evaluate_chunk, X)
+
+    def evaluate_packed(self, P):
+        """Evaluate packed genomes across the pool; only the packed bytes are shipped to workers."""
+        P = np.asarray(P, dtype=np.uint8)
+        self._measure_serial(self.serial.evaluate_packed, P)
+        return self._map(_evaluate_packed_chunk, P)
+
+    def _measure_serial(self, evaluate, X):
+        """Time the first population in-process, once: the single-core cost per individual."""
+        if self.serial_time_per_row is None and len(X):
+            start = time.perf_counter()
+            evaluate(X)
+            self.serial_time_per_row = (time.perf_counter() - start) / len(X)
+
+    def _map(self, func, X):
+        self.rows += len(X)
+        start = time.perf_counter()
+        chunks = [chunk for chunk in np.array_split(X, self.workers) if len(chunk)]
+        parts = self.pool.map(func, chunks)
+        self.wall_time += time.perf_counter() - start
+        self.busy_time += sum(p[3] for p in parts)
+        return tuple(np.concatenate([p[k] for p in parts]) for k in range(3))
+
+    @property
+    def speedup(self):
+        """Estimated serial evaluation time of every individual evaluated, divided by the pool's wall time."""
+        if self.serial_time_per_row is None or self.wall_time <= 0:
+            return 0.0
+        return self.serial_time_per_row * self.rows / self.wall_time
+
+    @property
+    def cpu_per_wall(self):
+        """Evaluation CPU-seconds summed over workers per elapsed second (workers kept busy on average)."""
+        return self.busy_time / self.wall_time if self.wall_time > 0 else 0.0
+
+    @property
+    def efficiency(self):
+        """Fraction of the workers' wall time spent evaluating."""
+        return self.cpu_per_wall / self.workers if self.workers else 0.0
+
+    def report(self):
+        return {
+            'workers': self.workers,
+            'evaluation_wall_time': self.wall_time,
+            'evaluation_cpu_time': self.busy_time,
+            'serial_time_per_individual': self.serial_time_per_row,
+            'speedup': self.speedup,
+            'cpu_per_wall': self.cpu_per_wall,
+            'efficiency': self.efficiency
+        }
+
+    def _release(self):
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def close(self):
+        if getattr(self, 'pool', None) is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,119 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+
+def non_dominated(F):
+    """Indices of the non-dominated rows of a 3-objective matrix F (minimization).
+
+    Rows are swept in lexicographic order while a staircase of the best
+    (f1, f2) trade-offs seen so far is kept sorted, so every dominance check
+    is a binary search: O(N log N) instead of pairwise O(N^2). Exact
+    duplicates keep their first occurrence only.
+    """
+    F = np.asarray(F, dtype=float)
+    if len(F) == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((F[:, 2], F[:, 1], F[:, 0]))
+    f1s, f2s = [], []  # staircase: f1 ascending, f2 strictly descending
+    keep = []
+    for i, a, b in zip(order.tolist(), F[order, 1].tolist(), F[order, 2].tolist()):
+        j = bisect_right(f1s, a) - 1
+        if j >= 0 and f2s[j] <= b:
+            continue  # dominated (or duplicate of) an earlier row
+        keep.append(i)
+        lo = bisect_left(f1s, a)
+        hi = lo
+        while hi < len(f1s) and f2s[hi] >= b:
+            hi += 1
+        f1s[lo:hi] = [a]
+        f2s[lo:hi] = [b]
+    return np.sort(np.array(keep, dtype=np.int64))
+
+
+def front_2d(cost, m):
+    """Indices of the (cost, m) trade-off front: minimal cost, maximal m (vectorized)."""
+    cost = np.asarray(cost, dtype=float)
+    m = np.asarray(m, dtype=float)
+    if len(cost) == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((-m, cost))
+    m_sorted = m[order]
+    best_before = np.concatenate(([-np.inf], np.maximum.accumulate(m_sorted)[:-1]))
+    return order[m_sorted > best_before]
+
+
+def crowding_distance(F):
+    """NSGA-II crowding distance of every row of F; boundary rows get infinity."""
+    F = np.asarray(F, dtype=float)
+    n, n_obj = F.shape
+    distance = np.zeros(n)
+    if n <= 2:
+        distance[:] = np.inf
+        return distance
+    for k in range(n_obj):
+        order = np.argsort(F[:, k], kind='stable')
+        values = F[order, k]
+        span = values[-1] - values[0]
+        distance[order[0]] = distance[order[-1]] = np.inf
+        if span > 0:
+            distance[order[1:-1]] += (values[2:] - values[:-2]) / span
+    return distance
+
+
+class ParetoArchive:
+    """Bounded external archive of every non-dominated feasible solution seen during a run.
+
+    ``add`` merges a batch into the archive with the ``non_dominated``
+    staircase sweep, so each update is O(N log N) in the archive plus batch
+    size. When more than ``max_size`` solutions remain, the most crowded ones
+    are dropped one at a time (recomputing crowding distances after each
+    removal), which keeps the extremes and an even spread along the front.
+    ``max_size=None`` keeps the whole front.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = int(max_size) if max_size else None
+        self.X = None
+        self.F = None
+        self.inserted = 0
+        self.pruned = 0
+
+    def __len__(self):
+        return 0 if self.F is None else len(self.F)
+
+    def add(self, X, F, feasible=None):
+        """Merge the (feasible) rows of a batch; return how many of them entered the archive."""
+        X = np.asarray(X)
+        F = np.asarray(F, dtype=float)
+        if feasible is not None:
+            feasible = np.asarray(feasible, dtype=bool).reshape(-1)
+            X, F = X[feasible], F[feasible]
+        if len(F) == 0:
+            return 0
+        n_old = len(self)
+        if n_old:
+            X = np.vstack([self.X, X.astype(self.X.dtype, copy=False)])
+            F = np.vstack([self.F, F])
+        keep = non_dominated(F)  # archive rows come first, so they win ties with new duplicates
+        X, F = X[keep], F[keep]
+        if self.max_size is not None and len(F) > self.max_size:
+            kept = self._prune(F, len(F) - self.max_size)
+            self.pruned += len(F) - len(kept)
+            keep, X, F = keep[kept], X[kept], F[kept]
+        added = int(np.sum(keep >= n_old))
+        self.inserted += added
+        self.X, self.F = X, F
+        return added
+
+    @staticmethod
+    def _prune(F, n_remove):
+        """Positions of F that survive removing the n_remove most crowded rows."""
+        alive = np.arange(len(F))
+        for _ in range(n_remove):
+            distance = crowding_distance(F[alive])
+            alive = np.delete(alive, np.argmin(distance))
+        return alive
+
+    def stats(self):
+        return {'size': len(self), 'max_size': self.max_size, 'inserted': self.inserted, 'pruned': self.pruned}
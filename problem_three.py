@@ -2,188 +2,371 @@ from pymoo.config import Config
 
 Config.warnings['not_compiled'] = False
 
+import logging
 import numpy as np
-import time
-import traceback
-import ast
-from pymoo.core.problem import ElementwiseProblem
+from pymoo.core.problem import ElementwiseProblem, Problem
 from pymoo.algorithms.moo.nsga2 import NSGA2
 from pymoo.optimize import minimize
-
-
-# Built-in union_find to avoid utils.py dependency
-def union_find(vacated_ids, compounds):
-    """Simple union-find to count connected components."""
-    try:
-        if not vacated_ids:
-            return 0
-        parent = {v: v for v in vacated_ids}
-
-        def find(u):
-            if parent[u] != u:
-                parent[u] = find(parent[u])
-            return parent[u]
-
-        id_to_index = {c['id']: i for i, c in enumerate(compounds)}
-        for i in vacated_ids:
-            for adj in compounds[id_to_index[i]]['adjacent']:
-                if adj in vacated_ids:
-                    pu = find(i)
-                    pv = find(adj)
-                    if pu != pv:
-                        parent[pv] = pu
-
-        return len(set(find(cid) for cid in vacated_ids))
-    except Exception as e:
-        print(f"Error in union_find: {e}")
-        raise
+from pymoo.core.callback import Callback
+from pymoo.operators.sampling.rnd import FloatRandomSampling
+from compound_graph import as_compound_graph
+from evaluation import PopulationEvaluator, FitnessCache
+from parallel_eval import SharedGraphPool
+from delta_eval import DeltaEvaluator
+from exact_solver import solve_exact
+from operators import ConnectedZoneSampling, ZoneCrossover, ZoneMutation
+from instrumentation import Instrumentation, RunCancelled
+from pareto import ParetoArchive
+from genome import PackedDuplicateElimination, decode, encode, pack, unpack
+from checkpoint import CheckpointCallback, WarmStart
+from connectivity import count_components, cluster_groups
+
+logger = logging.getLogger(__name__)
 
 
 class UrbanRenewalProblem(ElementwiseProblem):
-    def __init__(self, compounds, params):
-        self.compounds = compounds
+    def __init__(self, compounds, params, cache=None):
+        self.graph = as_compound_graph(compounds)
         self.params = params
-        self.id_to_index = {c['id']: i for i, c in enumerate(compounds)}  # Cache ID to index
+        self.cache = cache  # Optional FitnessCache shared across generations
+        self.cost_arr = self.graph.relocation_cost(params)
+        self.rent_gain_arr = self.graph.rent_gain(params)
+        n = len(self.graph)
         super().__init__(
-            n_var=len(compounds),
+            n_var=n,
             n_obj=3,
-            n_ieq_constr=len(compounds),
+            n_ieq_constr=n,
             n_eq_constr=1,
-            xl=np.zeros(len(compounds)),
-            xu=np.ones(len(compounds)),
+            xl=np.zeros(n),
+            xu=np.ones(n),
             vtype=int
         )
 
     def _evaluate(self, x, out, *args, **kwargs):
         try:
+            key = None
+            if self.cache is not None:
+                key = FitnessCache.keys(x[None, :])[0]
+                entry = self.cache.get(key)
+                if entry is not None:
+                    self.cache.hits += 1
+                    out["F"] = entry[0]
+                    out["G"] = np.zeros(len(self.graph))
+                    out["G"][entry[1]] = entry[2]
+                    out["H"] = entry[3]
+                    return
+                self.cache.misses += 1
+
             # Objectives
             total_vacated = np.sum(x)
-            total_cost = np.sum(
-                x * np.array([c['households'] * self.params['cost_per_household'] for c in self.compounds]))
-            total_rent_gain = np.sum(
-                x * np.array([c['area'] * (c['alpha'] - 1) * c['rent'] * self.params['years'] for c in self.compounds]))
+            total_cost = np.sum(x * self.cost_arr)
+            total_rent_gain = np.sum(x * self.rent_gain_arr)
             m = total_rent_gain / total_cost if total_cost > 1e-6 else 0
             m = min(m, 1e6)  # Limit m to prevent overflow
 
             out["F"] = [-total_vacated, total_cost, -m]
 
             # Inequality constraints: x_i <= sum(x_j for j in adjacent)
-            c = np.zeros(len(self.compounds))
-            for i in range(len(self.compounds)):
+            c = np.zeros(len(self.graph))
+            for i in range(len(self.graph)):
                 if x[i]:
-                    try:
-                        adj_indices = [self.id_to_index[adj] for adj in self.compounds[i]['adjacent']]
-                        c[i] = x[i] - np.sum(x[adj_indices])
-                    except KeyError as e:
-                        raise ValueError(f"Invalid adjacent ID: {e}")
+                    c[i] = x[i] - np.sum(x[self.graph.neighbors(i)])
 
             # Equality constraint: single contiguous zone
-            vacated = [c['id'] for i, c in enumerate(self.compounds) if x[i]]
-            zones = union_find(vacated, self.compounds) if vacated else 0
-            ceq = zones - 1 if vacated else 0
+            vacated = np.flatnonzero(x)
+            ceq = count_components(self.graph, vacated) - 1 if len(vacated) else 0
 
             out["G"] = c
             out["H"] = [ceq]
+            if key is not None:
+                self.cache.put(key, out["F"], c, out["H"])
         except Exception as e:
-            print(f"Error in _evaluate: {e}")
+            logger.error("Error in _evaluate: %s", e)
             raise
 
 
-def compute_cluster_groups(vacated_ids, compounds, id_to_index):
-    start_time = time.time()
-    try:
-        parent = {v: v for v in vacated_ids}
-
-        def find(u):
-            if parent[u] != u:
-                parent[u] = find(parent[u])
-            return parent[u]
-
-        for i in vacated_ids:
-            try:
-                for adj in compounds[id_to_index[i]]['adjacent']:
-                    if adj in vacated_ids:
-                        pu = find(i)
-                        pv = find(adj)
-                        if pu != pv:
-                            parent[pv] = pu
-            except KeyError as e:
-                raise ValueError(f"Invalid adjacent ID in cluster groups: {e}")
-
-        cluster_groups = {}
-        for cid in vacated_ids:
-            root = find(cid)
-            if root not in cluster_groups:
-                cluster_groups[root] = []
-            cluster_groups[root].append(cid)
-
-        print(f"Cluster groups time: {time.time() - start_time:.2f} seconds")
-        return cluster_groups
-    except Exception as e:
-        print(f"Error in compute_cluster_groups: {e}")
-        raise
+class VectorizedUrbanRenewalProblem(Problem):
+    """Batched variant of UrbanRenewalProblem that scores the whole population matrix at once."""
+
+    def __init__(self, compounds, params, pool=None, cache=None, delta=None):
+        self.graph = as_compound_graph(compounds)
+        self.params = params
+        self.evaluator = PopulationEvaluator.from_graph(self.graph, params)
+        self.pool = pool  # Optional SharedGraphPool for multi-core evaluation
+        self.cache = cache  # Optional FitnessCache shared across generations
+        self.delta = delta  # Optional DeltaEvaluator; its lineage is filled in by the connected operators
+        self.lineage = delta.lineage if delta is not None else None
+        n = len(self.graph)
+        super().__init__(
+            n_var=n,
+            n_obj=3,
+            n_ieq_constr=n,
+            n_eq_constr=1,
+            xl=np.zeros(n),
+            xu=np.ones(n),
+            vtype=int
+        )
 
+    def _evaluate(self, X, out, *args, **kwargs):
+        try:
+            evaluator = self.delta if self.delta is not None else self.evaluator
+            evaluate = self.pool.evaluate if self.pool is not None else evaluator.evaluate
+            if self.cache is not None:
+                out["F"], out["G"], out["H"] = self.cache.evaluate(X, evaluate)
+            else:
+                out["F"], out["G"], out["H"] = evaluate(X)
+        except Exception as e:
+            logger.error("Error in _evaluate: %s", e)
+            raise
 
-def compute_problem_three(compounds, params):
-    """Run NSGA-II and find inflection point."""
-    start_time = time.time()
 
-    # Validate compounds data
-    try:
-        print(f"Validating compounds: {compounds[:2]}")  # Log first two compounds
-        for c in compounds:
-            if isinstance(c['adjacent'], str):
-                try:
-                    c['adjacent'] = ast.literal_eval(c['adjacent'])
-                except Exception as e:
-                    raise ValueError(f"Failed to parse adjacent for compound {c['id']}: {c['adjacent']}, error: {e}")
-            if not isinstance(c['adjacent'], list):
-                raise ValueError(f"Invalid adjacent format for compound {c['id']}: {c['adjacent']}")
-            for adj in c['adjacent']:
-                if adj not in [comp['id'] for comp in compounds]:
-                    raise ValueError(f"Invalid adjacent ID {adj} in compound {c['id']}")
-    except Exception as e:
-        print(f"Data validation error: {e}")
-        raise
+class PackedUrbanRenewalProblem(Problem):
+    """VectorizedUrbanRenewalProblem over bit-packed genomes (``np.packbits`` rows, one bit per compound).
 
-    try:
-        print(f"Params: {params}")  # Log parameters
-        problem = UrbanRenewalProblem(compounds, params)
-        algorithm = NSGA2(pop_size=params.get('population_size', 20))  # Reduced to 20
-        res = minimize(
-            problem,
-            algorithm,
-            ('n_gen', params.get('max_generations', 50)),  # Reduced to 50
-            seed=1,
-            verbose=True
+    The per-compound support constraints are folded into one G column that
+    counts unsupported vacated compounds, so pymoo never holds an
+    n_pop x n_compounds matrix.
+    """
+
+    packed = True
+
+    def __init__(self, compounds, params, pool=None, cache=None, delta=None):
+        self.graph = as_compound_graph(compounds)
+        self.params = params
+        self.evaluator = PopulationEvaluator.from_graph(self.graph, params)
+        self.pool = pool  # Optional SharedGraphPool for multi-core evaluation
+        self.cache = cache  # Optional FitnessCache shared across generations
+        self.delta = delta  # Optional DeltaEvaluator; its lineage is filled in by the connected operators
+        self.lineage = delta.lineage if delta is not None else None
+        super().__init__(
+            n_var=(len(self.graph) + 7) // 8,
+            n_obj=3,
+            n_ieq_constr=1,
+            n_eq_constr=1,
+            xl=0,
+            xu=255,
+            vtype=np.uint8
         )
 
-        print(f"NSGA-II time: {time.time() - start_time:.2f} seconds")
+    def _evaluate(self, P, out, *args, **kwargs):
+        try:
+            evaluator = self.delta if self.delta is not None else self.evaluator
+            evaluate = self.pool.evaluate_packed if self.pool is not None else evaluator.evaluate_packed
+            if self.cache is not None:
+                out["F"], out["G"], out["H"] = self.cache.evaluate(P, evaluate, packed=True)
+            else:
+                out["F"], out["G"], out["H"] = evaluate(P)
+        except Exception as e:
+            logger.error("Error in _evaluate: %s", e)
+            raise
+
+
+def compute_cluster_groups(vacated_ids, compounds, id_to_index=None, instrumentation=None):
+    if instrumentation is None:
+        instrumentation = Instrumentation(enabled=False)
+    with instrumentation.span('clustering'):
+        try:
+            return cluster_groups(as_compound_graph(compounds), vacated_ids)
+        except Exception as e:
+            logger.error("Error in compute_cluster_groups: %s", e)
+            raise
+
+
+class ArchiveCallback(Callback):
+    """Feed every generation's evaluated offspring into a ParetoArchive, then call the inner callback."""
+
+    def __init__(self, archive, inner):
+        super().__init__()
+        self.archive = archive
+        self.inner = inner
+
+    def notify(self, algorithm):
+        off = algorithm.off if algorithm.off is not None else algorithm.pop
+        self.archive.add(off.get('X'), off.get('F'), off.get('feasible'))
+        self.inner(algorithm)
+
+
+def _run_nsga2(graph, params, instrumentation):
+    """Run NSGA-II and return the front (X, F) with parallel evaluation, cache and archive reports.
+
+    With ``archive_size`` > 0 the front is read from a ParetoArchive of every
+    feasible solution evaluated during the run, bounded to that many points;
+    with 0 it is the final population's front (``res.X``/``res.F``).
+
+    With ``warm_start`` or ``seed_problem_two`` the initial population is
+    seeded by ``checkpoint.WarmStart``; with a ``checkpoint_path`` the
+    population and archive are saved there every ``checkpoint_every``
+    generations and at the end of the run.
 
+    ``genome='packed'`` stores individuals as bitsets (vectorized problem
+    with connected operators only); it gives the same front as the dense
+    genome with a fraction of the memory.
+
+    ``delta_evaluation`` scores offspring constraints incrementally from
+    their parents (``delta_eval.DeltaEvaluator``; vectorized problem,
+    connected operators and one worker only), with the same results.
+    """
+    pool = None
+    archive_size = int(params.get('archive_size', 500))
+    archive = ParetoArchive(archive_size) if archive_size > 0 else None
+    cache_size = int(params.get('cache_size', 10000))
+    cache = FitnessCache(cache_size) if cache_size > 0 else None
+    try:
+        with instrumentation.span('setup'):
+            # The vectorized problem scores the whole population per call; the elementwise one is kept for benchmarking
+            workers = int(params.get('workers', 1))
+            connected = params.get('operators', 'connected') == 'connected'
+            packed = params.get('genome', 'dense') == 'packed'
+            if packed and not (params.get('vectorized', True) and connected):
+                logger.warning("Packed genomes require the vectorized problem and connected operators; "
+                               "using dense genomes")
+                packed = False
+            delta = None
+            if params.get('delta_evaluation', False):
+                if params.get('vectorized', True) and connected and workers == 1:
+                    delta = DeltaEvaluator.from_graph(
+                        graph, params, max_states=max(cache_size, 4 * int(params.get('population_size', 20))))
+                else:
+                    logger.warning("Delta evaluation requires the vectorized problem, connected operators and "
+                                   "one worker; evaluating every offspring in full")
+            if params.get('vectorized', True):
+                if workers > 1:
+                    # Started once per run; compound arrays reach the workers through shared memory
+                    pool = SharedGraphPool(graph, params, workers)
+                problem_class = PackedUrbanRenewalProblem if packed else VectorizedUrbanRenewalProblem
+                problem = problem_class(graph, params, pool=pool, cache=cache, delta=delta)
+            else:
+                if workers > 1:
+                    logger.warning("Parallel evaluation requires the vectorized problem; running on a single core")
+                problem = UrbanRenewalProblem(graph, params, cache=cache)
+            sampling = ConnectedZoneSampling() if connected else FloatRandomSampling()
+            warm = None
+            if params.get('warm_start', False) or params.get('seed_problem_two', False):
+                warm = WarmStart(graph, params)
+                sampling = warm.sampling(sampling)
+                if archive is not None and len(warm.archive):
+                    # Archived zones are re-scored on the current table before they compete again
+                    seeds = encode(problem, warm.archive)
+                    out = problem.evaluate(seeds, return_as_dictionary=True)
+                    feasible = np.all(out['G'] <= 0, axis=1) & np.all(out['H'] == 0, axis=1)
+                    archive.add(seeds, out['F'], feasible)
+            n_gen = warm.generations if warm is not None else params.get('max_generations', 50)
+            if connected:
+                # Graph-aware operators keep every individual a single contiguous zone
+                algorithm = NSGA2(
+                    pop_size=params.get('population_size', 20),
+                    sampling=sampling,
+                    crossover=ZoneCrossover(),
+                    mutation=ZoneMutation(),
+                    eliminate_duplicates=PackedDuplicateElimination() if packed else True
+                )
+            else:
+                algorithm = NSGA2(pop_size=params.get('population_size', 20), sampling=sampling)  # Reduced to 20
+
+            callback = instrumentation.callback()
+            checkpointer = None
+            if params.get('checkpoint_path'):
+                callback = checkpointer = CheckpointCallback(
+                    params['checkpoint_path'], problem, params, params.get('checkpoint_every', 0), archive, callback,
+                    warm.generation if warm is not None else 0)
+            if archive is not None:
+                callback = ArchiveCallback(archive, callback)
+
+        with instrumentation.span('optimization'):
+            res = minimize(
+                problem,
+                algorithm,
+                ('n_gen', n_gen),
+                seed=1,
+                callback=callback,
+                verbose=bool(params.get('verbose', False))
+            )
+        if checkpointer is not None:
+            checkpointer.save(res.pop.get('X'), n_gen)
+
+        stats = {
+            'parallel': pool.report() if pool is not None else None,
+            'cache': cache.stats() if cache is not None else None,
+            'archive': archive.stats() if archive is not None else None,
+            'warm_start': warm.report() if warm is not None else None,
+            'delta': delta.stats() if delta is not None else None
+        }
+        if stats['parallel'] is not None:
+            logger.info("Parallel evaluation: %d workers, %.2fx estimated speedup over one core "
+                        "(%.2f CPU-seconds per wall-second, %.0f%% efficiency)",
+                        stats['parallel']['workers'], stats['parallel']['speedup'],
+                        stats['parallel']['cpu_per_wall'], 100 * stats['parallel']['efficiency'])
+        if stats['cache'] is not None:
+            logger.info("Fitness cache: %d hits, %d misses, %d evictions",
+                        stats['cache']['hits'], stats['cache']['misses'], stats['cache']['evictions'])
+        if stats['delta'] is not None:
+            logger.info("Delta evaluation: %d incremental, %d full, %d reused",
+                        stats['delta']['incremental'], stats['delta']['full'], stats['delta']['reused'])
+
+        if archive is not None:
+            logger.info("Pareto archive: %d solutions (%d inserted, %d pruned)",
+                        len(archive), archive.inserted, archive.pruned)
+            if len(archive) == 0:
+                raise ValueError("No feasible solutions found. Check constraints or parameters.")
+            return decode(problem, archive.X), archive.F, stats
         if res.X is None:
             raise ValueError("No feasible solutions found. Check constraints or parameters.")
+        return decode(problem, res.X), res.F, stats
+    finally:
+        if pool is not None:
+            pool.close()
+
 
-        start_time = time.time()
-        X = res.X
-        F = res.F
+def solve_front(compounds, params, instrumentation=None):
+    """Validate compounds and optimize; return (graph, X, F, stats) for the whole front."""
+    if instrumentation is None:
+        instrumentation = Instrumentation(enabled=False)
+
+    # Validate compounds data (building the graph checks every adjacent ID in one pass)
+    try:
+        with instrumentation.span('validation'):
+            graph = as_compound_graph(compounds)
+        logger.info("Validating compounds: %s", graph)
+    except Exception as e:
+        logger.error("Data validation error: %s", e)
+        raise
 
+    logger.info("Params: %s", params)
+    solver = params.get('solver', 'nsga2')
+    if params.get('decompose', False):
+        # Independent districts are solved as separate Problem 3 instances and their fronts merged
+        from decomposition import solve_decomposed
+        X, F, stats = solve_decomposed(graph, params, instrumentation)
+    elif solver == 'exact':
+        with instrumentation.span('optimization'):
+            X, F = solve_exact(graph, params)
+        stats = {}
+    elif solver == 'nsga2':
+        X, F, stats = _run_nsga2(graph, params, instrumentation)
+    else:
+        raise ValueError(f"Unknown solver: {solver}")
+    return graph, X, F, stats
+
+
+def summarize_front(graph, params, X, F, instrumentation=None):
+    """Find the inflection point on a front and compute its economic metrics."""
+    if instrumentation is None:
+        instrumentation = Instrumentation(enabled=False)
+
+    with instrumentation.span('post-processing'):
         # Precompute arrays for efficiency
-        households_arr = np.array([c['households'] for c in compounds])
-        area_arr = np.array([c['area'] for c in compounds])
-        rent_arr = np.array([c['rent'] for c in compounds])
-        alpha_arr = np.array([c['alpha'] for c in compounds])
+        households_arr = graph.households
+        area_arr = graph.area
+        rent_arr = graph.rent
+        alpha_arr = graph.alpha
 
-        # Vectorized computation of households and cost-effectiveness
-        households = np.sum(X * households_arr, axis=1)
+        # Vectorized computation of households and cost-effectiveness (einsum avoids a dense float copy of X)
+        households = np.einsum('ij,j->i', X, households_arr.astype(float))
         cost_effectiveness = np.where(F[:, 1] > 1e-6, -F[:, 2], 0)
 
-        print(f"Households and cost-effectiveness time: {time.time() - start_time:.2f} seconds")
-
-        start_time = time.time()
         # Sort by households
         sort_idx = np.argsort(households)
         households_sorted = households[sort_idx]
-        solutions_sorted = X[sort_idx]
         m_sorted = cost_effectiveness[sort_idx]
 
         # Find inflection point with numerical stability
@@ -195,12 +378,9 @@ def compute_problem_three(compounds, params):
             inflection_idx = np.argmax(m_sorted)
             max_m = m_sorted[inflection_idx]
 
-        best_solution = solutions_sorted[inflection_idx]
+        best_solution = X[sort_idx[inflection_idx]].astype(float)
         best_households = households_sorted[inflection_idx]
 
-        print(f"Inflection point time: {time.time() - start_time:.2f} seconds")
-
-        start_time = time.time()
         # Economic metrics (vectorized)
         total_cost = np.sum(best_solution * households_arr * params['cost_per_household'])
         total_area = np.sum(best_solution * area_arr)
@@ -208,28 +388,61 @@ def compute_problem_three(compounds, params):
         total_income = np.sum(best_solution * area_arr * alpha_arr * rent_arr * params['years'])
         profit = total_income - total_cost
 
-        # Compute cluster groups with cached index
-        vacated_ids = [c['id'] for i, c in enumerate(compounds) if best_solution[i]]
-        id_to_index = {c['id']: i for i, c in enumerate(compounds)}
-        cluster_groups = compute_cluster_groups(vacated_ids, compounds, id_to_index)
-
-        print(f"Economic metrics time: {time.time() - start_time:.2f} seconds")
-
-        results = {
-            'm': max_m,
-            'vacated_compounds': int(np.sum(best_solution)),
-            'households': int(best_households),
-            'cost': total_cost,
-            'area': total_area,
-            'income': total_income,
-            'profit': profit,
-            'vacated_ids': vacated_ids,
-            'cluster_groups': cluster_groups
-        }
-
-        print(f"Results: {results}")
+    # Compute cluster groups with cached index
+    vacated_ids = graph.ids[best_solution != 0].tolist()
+    cluster_groups = compute_cluster_groups(vacated_ids, graph, instrumentation=instrumentation)
+
+    results = {
+        'm': max_m,
+        'vacated_compounds': int(np.sum(best_solution)),
+        'households': int(best_households),
+        'cost': total_cost,
+        'area': total_area,
+        'income': total_income,
+        'profit': profit,
+        'vacated_ids': vacated_ids,
+        'cluster_groups': cluster_groups
+    }
+    return best_solution, results
+
+
+def resummarize(compounds, params, result):
+    """Summarize a stored ``compute_problem_three`` result again under params (e.g. another ``target_m``)."""
+    _, results, F = result
+    graph = as_compound_graph(compounds, strict=False)
+    X = unpack(results['pareto_set'], len(graph)).astype(float)
+    best_solution, summary = summarize_front(graph, params, X, F)
+    return best_solution, dict(results, **summary), F
+
+
+def compute_problem_three(compounds, params, callback=None):
+    """Run NSGA-II (or the exact solver) and find inflection point.
+
+    Timing spans and per-generation metrics are collected unless
+    ``params['instrument']`` is false, and returned in
+    ``results['instrumentation']``. ``callback(metrics)`` is called after
+    every NSGA-II generation (and forces instrumentation on).
+    """
+    instrumentation = Instrumentation(enabled=bool(params.get('instrument', True)) or callback is not None,
+                                      on_generation=callback)
+    try:
+        graph, X, F, stats = solve_front(compounds, params, instrumentation)
+        best_solution, results = summarize_front(graph, params, X, F, instrumentation)
+        results['parallel'] = stats.get('parallel')
+        results['cache'] = stats.get('cache')
+        results['decomposition'] = stats.get('decomposition')
+        results['archive'] = stats.get('archive')
+        results['warm_start'] = stats.get('warm_start')
+        results['delta'] = stats.get('delta')
+        results['instrumentation'] = instrumentation.report()
+        # Whole Pareto set as packed bits, rows aligned with F, for exports
+        results['pareto_set'] = pack(X)
+
+        logger.info("Results: %s", {k: v for k, v in results.items() if k not in ('instrumentation', 'pareto_set')})
         return best_solution, results, F
+    except RunCancelled:
+        logger.info("Problem 3 run cancelled")
+        raise
     except Exception as e:
-        print(f"Error in compute_problem_three: {e}")
-        traceback.print_exc()
-        raise
\ No newline at end of file
+        logger.exception("Error in compute_problem_three: %s", e)
+        raise
@@ -1,53 +1,109 @@
+import heapq
 import pandas as pd
 import numpy as np
+from compound_graph import as_compound_graph
+
+
+def compute_rho(graph, params):
+    """Marginal cost-effectiveness (rho) of every compound."""
+    return (params['years'] * graph.area * (graph.alpha - 1) * graph.rent) / \
+           (graph.households * params['cost_per_household'])
+
+
+def grow_frontier(compounds, params, start=None, budget=None, max_households=None, target_m=None):
+    """Grow one contiguous vacated zone, always taking the best-rho compound on its frontier.
+
+    The frontier is every compound adjacent to the zone, whichever side
+    lists the edge (as in the connected operators). A max-heap holds its rho,
+    so each compound is pushed and popped at most once: O((n + E) log n).
+    Growth starts from ``start`` (a compound ID; default: the highest rho)
+    and stops before a step would exceed ``budget`` (cost) or
+    ``max_households``, or would bring the cumulative m below ``target_m``.
+
+    Returns one row per step with cumulative households, cost and m.
+    """
+    graph = as_compound_graph(compounds, strict=False)
+    if len(graph) == 0:
+        return pd.DataFrame(columns=['step', 'id', 'rho', 'households', 'cost',
+                                     'cumulative_households', 'cumulative_cost', 'm'])
+    rho = compute_rho(graph, params)
+    cost_arr = graph.relocation_cost(params)
+    gain_arr = graph.rent_gain(params)
+    adjacency = graph.undirected_adjacency()
+    indptr, indices = adjacency.indptr, adjacency.indices
+
+    if start is None:
+        seed = int(np.argmax(rho))
+    else:
+        seed = graph.index_of(start)
+        if seed < 0:
+            raise ValueError(f"Invalid start compound ID {start}")
+
+    seen = np.zeros(len(graph), dtype=bool)
+    seen[seed] = True
+    heap = [(-rho[seed], seed)]
+    steps = []
+    total_households = 0
+    total_cost = 0.0
+    total_gain = 0.0
+    cumulative_households, cumulative_cost, cumulative_m = [], [], []
+
+    while heap:
+        _, i = heapq.heappop(heap)
+        households = total_households + int(graph.households[i])
+        cost = total_cost + cost_arr[i]
+        gain = total_gain + gain_arr[i]
+        m = min(gain / cost, 1e6) if cost > 1e-6 else 0
+        if budget is not None and cost > budget:
+            break
+        if max_households is not None and households > max_households:
+            break
+        if target_m is not None and m < target_m:
+            break
+        total_households, total_cost, total_gain = households, cost, gain
+        steps.append(i)
+        cumulative_households.append(households)
+        cumulative_cost.append(cost)
+        cumulative_m.append(m)
+
+        for j in indices[indptr[i]:indptr[i + 1]].tolist():
+            if not seen[j]:
+                seen[j] = True
+                heapq.heappush(heap, (-rho[j], j))
+
+    steps = np.array(steps, dtype=np.int64)
+    return pd.DataFrame({
+        'step': np.arange(1, len(steps) + 1),
+        'id': graph.ids[steps],
+        'rho': rho[steps],
+        'households': graph.households[steps],
+        'cost': cost_arr[steps],
+        'cumulative_households': np.array(cumulative_households, dtype=np.int64),
+        'cumulative_cost': np.array(cumulative_cost, dtype=float),
+        'm': np.array(cumulative_m, dtype=float)
+    })
 
 
 def compute_problem_two(compounds, params):
     """Compute marginal cost-effectiveness and feasible sequence."""
     # Validate inputs
-    if not compounds or not params:
+    if compounds is None or len(compounds) == 0 or not params:
         raise ValueError("Compounds or params cannot be empty")
+    graph = as_compound_graph(compounds, strict=False)
 
     # Compute marginal cost-effectiveness (rho)
-    rho = []
-    for c in compounds:
-        if not all(key in c for key in ['area', 'households', 'rent', 'alpha', 'id', 'adjacent']):
-            raise KeyError(f"Missing required keys in compound {c.get('id', 'unknown')}")
-        if not isinstance(c['adjacent'], list):
-            raise ValueError(f"Adjacent must be a list in compound {c['id']}")
-        rho_i = (params['years'] * c['area'] * (c['alpha'] - 1) * c['rent']) / \
-                (c['households'] * params['cost_per_household'])
-        rho.append(rho_i)
+    rho = compute_rho(graph, params)
 
     # Create sorted table
     df = pd.DataFrame({
-        'id': [c['id'] for c in compounds],
-        'area': [c['area'] for c in compounds],
-        'households': [c['households'] for c in compounds],
+        'id': graph.ids,
+        'area': graph.area,
+        'households': graph.households,
         'rho': rho
     })
     sorted_df = df.sort_values(by='rho', ascending=False).reset_index(drop=True)
 
-    # Generate feasible sequence
-    idx = sorted_df.index.to_list()
-    feasible_sequence = []
-    vacated = np.zeros(len(compounds), dtype=bool)
-    id_to_index = {c['id']: i for i, c in enumerate(compounds)}  # Map ID to index
-
-    for i in idx:
-        c = compounds[i]
-        # Check if any adjacent compound is vacated
-        has_vacated_neighbor = False
-        for adj_id in c['adjacent']:
-            if adj_id not in id_to_index:
-                print(f"Warning: Invalid adjacent ID {adj_id} in compound {c['id']}")
-                continue
-            adj_index = id_to_index[adj_id]
-            if vacated[adj_index]:
-                has_vacated_neighbor = True
-                break
-        if not feasible_sequence or has_vacated_neighbor:
-            feasible_sequence.append(c['id'])
-            vacated[i] = True
-
-    return sorted_df, feasible_sequence
\ No newline at end of file
+    # Generate feasible sequence: grow from the best compound through whatever is reachable
+    feasible_sequence = grow_frontier(graph, params)['id'].tolist()
+
+    return sorted_df, feasible_sequence
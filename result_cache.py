@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+from compound_graph import as_compound_graph
+
+logger = logging.getLogger(__name__)
+
+# Parameters that change how a run is executed or reported, but not its results
+EXECUTION_PARAMS = ('workers', 'decompose_workers', 'cache_size', 'instrument', 'verbose', 'checkpoint_path',
+                    'checkpoint_every', 'genome', 'delta_evaluation')
+
+# Problem 2 results (the ranking and the frontier growth) only depend on the compound table and these parameters
+PROBLEM_TWO_KINDS = ('problem2', 'frontier')
+PROBLEM_TWO_PARAMS = ('cost_per_household', 'years')
+
+# Problem 3 parameters that only pick the summary point on the front; cached fronts are re-summarized for them
+SUMMARY_PARAMS = ('target_m',)
+
+
+def file_digest(path):
+    """SHA-256 of a file's contents, or None if it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(2 ** 20), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def result_key(kind, compounds, params):
+    """Content address of a result: hash of the problem kind, compound table and relevant parameters.
+
+    A warm-started run also depends on the checkpoint it starts from, so its
+    key includes the checkpoint file's contents rather than its path.
+    ``SUMMARY_PARAMS`` are left out of Problem 3 keys: the key addresses the
+    front, and ``problem_three.resummarize`` picks its inflection point.
+    """
+    graph = as_compound_graph(compounds, strict=False)
+    if kind in PROBLEM_TWO_KINDS:
+        relevant = {name: params[name] for name in PROBLEM_TWO_PARAMS if name in params}
+    else:
+        ignored = EXECUTION_PARAMS + SUMMARY_PARAMS if kind == 'problem3' else EXECUTION_PARAMS
+        relevant = {name: value for name, value in params.items() if name not in ignored}
+        if params.get('warm_start') and params.get('checkpoint_path'):
+            relevant['checkpoint'] = file_digest(params['checkpoint_path'])
+    payload = json.dumps({'kind': kind, 'graph': graph.fingerprint(), 'params': relevant},
+                         sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """Two-level cache of computed results keyed by ``result_key``.
+
+    The memory layer is an LRU of at most ``max_items`` results. The disk
+    layer pickles each result to ``directory/<key>.pkl`` and, after every
+    write, deletes the least recently used files until the directory holds at
+    most ``max_bytes``. Disk hits are promoted to memory, so results survive
+    restarts and are shared by every process using the same directory.
+    """
+
+    def __init__(self, directory=None, max_items=32, max_bytes=256 * 2 ** 20):
+        self.directory = directory
+        self.max_items = int(max_items)
+        self.max_bytes = int(max_bytes)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        """Cached result for key, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        if self.directory:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as f:
+                    value = pickle.load(f)
+                os.utime(path)  # mark as recently used for eviction
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning("Discarding unreadable cache entry %s: %s", path, e)
+                self._remove(path)
+            else:
+                self._remember(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.directory:
+            path = self._path(key)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, path)  # atomic, so readers never see a partial file
+            except Exception as e:
+                logger.warning("Could not write cache entry %s: %s", path, e)
+                self._remove(tmp)
+            self._evict_disk()
+
+    def get_or_compute(self, kind, compounds, params, compute):
+        """Return the cached result of ``compute(compounds, params)``, computing and storing it on a miss."""
+        key = result_key(kind, compounds, params)
+        value = self.get(key)
+        if value is None:
+            value = compute(compounds, params)
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith('.pkl'):
+                    self._remove(os.path.join(self.directory, name))
+
+    def stats(self):
+        return {'memory_items': len(self._memory), 'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'disk_bytes': sum(size for _, size, _ in self._disk_entries())}
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def _disk_entries(self):
+        if not self.directory:
+            return []
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict_disk(self):
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmark import grid_graph, planar_graph, ring_graph, tree_graph  # noqa: E402
+from compound_graph import CompoundGraph  # noqa: E402
+from data_handler import load_params  # noqa: E402
+
+
+def asymmetric_graph(n, seed=0):
+    """Grid graph with about a third of its adjacency entries listed by one endpoint only."""
+    graph = grid_graph(n, seed)
+    rng = np.random.default_rng(seed)
+    keep = rng.random(len(graph.indices)) >= 1 / 3
+    rows = np.repeat(np.arange(len(graph)), np.diff(graph.indptr))
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows[keep], minlength=len(graph)))))
+    return CompoundGraph.from_arrays(graph.ids, graph.area, graph.households, graph.rent, graph.alpha,
+                                     indptr, graph.ids[graph.indices[keep]])
+
+
+BUILDERS = {'ring': ring_graph, 'grid': grid_graph, 'tree': tree_graph, 'planar': planar_graph,
+            'asymmetric': asymmetric_graph}
+
+
+def make_graph(kind, n, seed=0):
+    return BUILDERS[kind](n, seed)
+
+
+@pytest.fixture
+def params():
+    return load_params(os.path.join(ROOT, 'templates', 'config.json'))
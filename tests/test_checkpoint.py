@@ -0,0 +1,72 @@
+import os
+import time
+
+import numpy as np
+
+from checkpoint import WarmStart, load_checkpoint, prune_checkpoints, save_checkpoint, zones_to_rows
+from conftest import make_graph
+from problem_three import compute_problem_three
+
+
+def test_zones_to_rows_drops_missing_and_disconnected_zones():
+    graph = make_graph('grid', 25, seed=1)
+    a, b = graph.ids[0], graph.neighbor_ids(0)[0]
+    far = graph.ids[-1]
+    zones = [[a, b], [b, a], [a, b, 10 ** 9], [a], [a, far], []]
+    X = zones_to_rows(zones, graph)
+    assert X.shape == (1, len(graph))
+    assert graph.ids[X[0] != 0].tolist() == sorted([a, b], key=graph.ids.tolist().index)
+    assert zones_to_rows([], graph).shape == (0, len(graph))
+
+
+def test_save_and_load_checkpoint(params, tmp_path):
+    graph = make_graph('grid', 25, seed=2)
+    population = zones_to_rows([graph.ids[[0, 1]], graph.ids[[0, 1, 2]]], graph)
+    path = str(tmp_path / 'run' / 'problem3.npz')
+    save_checkpoint(path, graph, params, population, population[:1], generation=7)
+    checkpoint = load_checkpoint(path)
+    assert checkpoint['generation'] == 7
+    np.testing.assert_array_equal(zones_to_rows(checkpoint['population'], graph), population)
+    np.testing.assert_array_equal(zones_to_rows(checkpoint['archive'], graph), population[:1])
+    assert load_checkpoint(str(tmp_path / 'missing.npz')) is None
+    with open(tmp_path / 'broken.npz', 'wb') as f:
+        f.write(b'not a checkpoint')
+    assert load_checkpoint(str(tmp_path / 'broken.npz')) is None
+
+
+def test_resume_and_warm_start(params, tmp_path):
+    graph = make_graph('grid', 40, seed=3)
+    path = str(tmp_path / 'problem3.npz')
+    params = dict(params, population_size=20, max_generations=6, checkpoint_path=path)
+    _, results, _ = compute_problem_three(graph, params)
+    assert results['warm_start'] is None
+    assert load_checkpoint(path)['generation'] == 6
+
+    # Same table and search parameters: the run continues where it stopped
+    resume = dict(params, warm_start=True, max_generations=10, target_m=5.0)
+    warm = WarmStart(graph, resume)
+    assert warm.resumed and warm.generation == 6 and warm.generations == 4
+    assert len(warm.population) > 0
+    _, results, _ = compute_problem_three(graph, resume)
+    assert results['warm_start']['resumed'] and results['warm_start']['from_generation'] == 6
+    assert load_checkpoint(path)['generation'] == 10
+
+    # After an edit the surviving zones only seed a shorter run
+    checkpoint = load_checkpoint(path)
+    edited = graph.subgraph(np.arange(1, len(graph)))
+    warm = WarmStart(edited, dict(resume, warm_start_generations=3))
+    assert not warm.resumed and warm.generation == 0 and warm.generations == 3
+    assert 0 < len(warm.population) <= len(checkpoint['population'])
+    assert np.array_equal(warm.population, zones_to_rows(checkpoint['population'], edited))
+
+
+def test_prune_checkpoints(tmp_path):
+    now = time.time()
+    for k in range(6):
+        os.makedirs(tmp_path / f'run{k}')
+        os.utime(tmp_path / f'run{k}', (now - 100 * k, now - 100 * k))
+    os.utime(tmp_path / 'run5', (now - 10 ** 6, now - 10 ** 6))
+    keep = str(tmp_path / 'run4')
+    assert prune_checkpoints(str(tmp_path), max_runs=3, keep=[keep]) == 3
+    assert sorted(os.listdir(tmp_path)) == ['run0', 'run1', 'run4']
+    assert prune_checkpoints(str(tmp_path / 'missing')) == 0
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from conftest import make_graph
+from delta_eval import DeltaEvaluator
+from evaluation import PopulationEvaluator
+from genome import pack
+from operators import grow_zone
+from problem_three import UrbanRenewalProblem, VectorizedUrbanRenewalProblem
+
+KINDS = ('ring', 'grid', 'tree', 'asymmetric')
+
+
+def random_parents(rng, graph, count=20):
+    """Connected zones of assorted sizes, plus a scattered zone and the empty zone."""
+    A = graph.undirected_adjacency()
+    X = np.zeros((count + 2, len(graph)))
+    for r in range(count):
+        X[r, grow_zone(A, int(rng.integers(len(graph))), int(rng.integers(2, len(graph) // 2)))] = 1
+    X[count, rng.choice(len(graph), 6, replace=False)] = 1
+    return X
+
+
+def random_flips(rng, graph, X):
+    """Children of every row: some compounds removed, some boundary or random compounds added."""
+    A = graph.undirected_adjacency()
+    children = X.copy()
+    for child in children:
+        zone = np.flatnonzero(child)
+        if len(zone) and rng.random() < 0.7:
+            child[rng.choice(zone, int(rng.integers(1, min(len(zone), 4) + 1)), replace=False)] = 0
+        if len(zone) and rng.random() < 0.5:
+            v = zone[rng.integers(len(zone))]
+            child[A.indices[A.indptr[v]:A.indptr[v + 1]]] = 1
+        if rng.random() < 0.3:
+            child[rng.integers(len(graph), size=2)] = 1
+    return children
+
+
+def elementwise(graph, params, X):
+    F, G, H = UrbanRenewalProblem(graph, params).evaluate(X, return_values_of=['F', 'G', 'H'])
+    return F, G, H
+
+
+@pytest.mark.parametrize('kind', KINDS)
+def test_vectorized_matches_elementwise(kind, params):
+    graph = make_graph(kind, 60, seed=1)
+    rng = np.random.default_rng(1)
+    np.random.seed(1)
+    X = random_flips(rng, graph, random_parents(rng, graph))
+    F, G, H = PopulationEvaluator.from_graph(graph, params).evaluate(X)
+    F_e, G_e, H_e = elementwise(graph, params, X)
+    np.testing.assert_allclose(F, F_e)
+    np.testing.assert_array_equal(G, G_e)
+    np.testing.assert_array_equal(H, H_e)
+
+
+@pytest.mark.parametrize('kind', KINDS)
+def test_delta_matches_full_evaluation(kind, params):
+    graph = make_graph(kind, 80, seed=2)
+    rng = np.random.default_rng(2)
+    np.random.seed(2)
+    base = PopulationEvaluator.from_graph(graph, params)
+    delta = DeltaEvaluator(base, max_change=1.0)
+    problem = VectorizedUrbanRenewalProblem(graph, params)
+    X = random_parents(rng, graph)
+    delta.evaluate(X)
+    for _ in range(5):
+        children = random_flips(rng, graph, X)
+        for child, parent in zip(children, X):
+            delta.lineage.record(problem, child, parent)
+        F, G, H = delta.evaluate(children)
+        F_full, G_full, H_full = base.evaluate(children)
+        np.testing.assert_array_equal(F, F_full)
+        np.testing.assert_array_equal(G, G_full)
+        np.testing.assert_array_equal(H, H_full)
+        np.testing.assert_array_equal(H, elementwise(graph, params, children)[2])
+        X = children
+    assert delta.incremental > 0
+
+
+@pytest.mark.parametrize('kind', KINDS)
+def test_delta_matches_packed_evaluation(kind, params):
+    graph = make_graph(kind, 70, seed=3)
+    rng = np.random.default_rng(3)
+    np.random.seed(3)
+    base = PopulationEvaluator.from_graph(graph, params)
+    delta = DeltaEvaluator(base, max_change=1.0)
+    problem = VectorizedUrbanRenewalProblem(graph, params)
+    problem.packed = True
+    X = random_parents(rng, graph)
+    delta.evaluate_packed(pack(X))
+    children = random_flips(rng, graph, X)
+    P, P_parents = pack(children), pack(X)
+    for child, parent in zip(P, P_parents):
+        delta.lineage.record(problem, child, parent)
+    for got, expected in zip(delta.evaluate_packed(P), base.evaluate_packed(P)):
+        np.testing.assert_array_equal(got, expected)
+    assert delta.incremental > 0
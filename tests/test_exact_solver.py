@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from compound_graph import CompoundGraph
+from conftest import make_graph
+from evaluation import PopulationEvaluator
+from exact_solver import connected_zones, exact_solvable, solve_exact
+from pareto import non_dominated
+
+
+def all_zones(n):
+    """Every 0/1 row over n compounds."""
+    return (np.arange(2 ** n)[:, None] >> np.arange(n) & 1).astype(float)
+
+
+def brute_force(graph, params):
+    """Feasible zones and the Pareto front of all of them."""
+    X = all_zones(len(graph))
+    F, G, H = PopulationEvaluator.from_graph(graph, params).evaluate(X)
+    feasible = np.all(G <= 0, axis=1) & (H[:, 0] == 0)
+    front = non_dominated(F[feasible])
+    return X[feasible], F[feasible][front]
+
+
+def sorted_rows(F):
+    F = np.unique(np.round(F, 6), axis=0)
+    return F[np.lexsort(F.T[::-1])]
+
+
+CASES = [('ring', n) for n in (3, 5, 8, 12)] + [('ring', 2), ('grid', 9), ('grid', 12), ('tree', 10),
+                                                 ('tree', 12), ('planar', 10)]
+
+
+@pytest.mark.parametrize('kind, n', CASES)
+def test_exact_front_matches_brute_force(kind, n, params):
+    graph = make_graph(kind, n, seed=n)
+    assert exact_solvable(graph, params)
+    X, F = solve_exact(graph, params)
+    _, F_brute = brute_force(graph, params)
+    np.testing.assert_allclose(sorted_rows(F), sorted_rows(F_brute))
+    # Every returned zone is feasible and scores as reported
+    F_check, G, H = PopulationEvaluator.from_graph(graph, params).evaluate(X)
+    assert np.all(G <= 0) and np.all(H == 0)
+    np.testing.assert_allclose(F_check, F)
+
+
+def test_exact_front_of_several_districts(params):
+    # A ring and a tree side by side, with IDs kept apart
+    ring, tree = make_graph('ring', 6, seed=1), make_graph('tree', 6, seed=2)
+    frames = [ring.to_frame(), tree.to_frame()]
+    frames[1]['id'] += 100
+    frames[1]['adjacent'] = [str([a + 100 for a in tree.neighbor_ids(i).tolist()]) for i in range(len(tree))]
+    graph = CompoundGraph.from_frame(pd.concat(frames, ignore_index=True))
+    _, F = solve_exact(graph, params)
+    _, F_brute = brute_force(graph, params)
+    np.testing.assert_allclose(sorted_rows(F), sorted_rows(F_brute))
+
+
+@pytest.mark.parametrize('kind, n', [('ring', 7), ('grid', 9), ('tree', 11), ('asymmetric', 10)])
+def test_connected_zones_are_all_contiguous_zones(kind, n, params):
+    graph = make_graph(kind, n, seed=n)
+    X = all_zones(n)
+    _, _, H = PopulationEvaluator.from_graph(graph, params).evaluate(X)
+    expected = X[(H[:, 0] == 0) & (X.sum(axis=1) >= 2)]
+    zones = connected_zones(graph, 2 ** n)
+    assert len(zones) == len(np.unique(zones, axis=0))
+    np.testing.assert_array_equal(sorted_rows(zones), sorted_rows(expected))
+    assert len(connected_zones(graph, 5)) == min(5, len(expected))
+
+
+def test_asymmetric_graph_is_not_exact_solvable(params):
+    assert not exact_solvable(make_graph('asymmetric', 9, seed=1), params)
@@ -0,0 +1,123 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+from conftest import make_graph
+from front_query import COLUMNS, FrontIndex, make_server
+from genome import pack
+
+
+def random_index(n, seed=0):
+    """Index over random integer-valued columns, so sorted orders are full of ties."""
+    rng = np.random.default_rng(seed)
+    columns = {name: rng.integers(0, 6, n).astype(float) for name in COLUMNS}
+    X = rng.random((n, 12)) < 0.5
+    return FrontIndex(np.arange(12) + 100, pack(X), columns)
+
+
+def scan(index, objective, maximize, bounds):
+    """Best objective value by a linear scan, or None."""
+    feasible = np.ones(len(index), dtype=bool)
+    for key, limit in bounds.items():
+        side, _, name = key.partition('_')
+        feasible &= index.columns[name] <= limit if side == 'max' else index.columns[name] >= limit
+    if not feasible.any():
+        return None
+    values = index.columns[objective][feasible]
+    return values.max() if maximize else values.min()
+
+
+def check(index, objective, maximize, bounds):
+    solution = index.best(objective, maximize, **bounds)
+    expected = scan(index, objective, maximize, bounds)
+    if expected is None:
+        assert solution is None
+        return
+    assert solution[objective] == expected
+    for key, limit in bounds.items():
+        side, _, name = key.partition('_')
+        assert solution[name] <= limit if side == 'max' else solution[name] >= limit
+
+
+@pytest.mark.parametrize('maximize', [True, False])
+@pytest.mark.parametrize('n', [1, 2, 40])
+def test_best_matches_scan_at_every_limit(n, maximize):
+    index = random_index(n, seed=n)
+    # Limits below, at and above every value, so lookups hit both ends of each prefix/suffix table
+    limits = np.concatenate(([-1.0, 7.0], np.arange(6.0), np.arange(6.0) + 0.5))
+    for objective in COLUMNS:
+        check(index, objective, maximize, {})
+        for name in COLUMNS:
+            for limit in limits:
+                check(index, objective, maximize, {f'max_{name}': limit})
+                check(index, objective, maximize, {f'min_{name}': limit})
+        check(index, objective, maximize, {'max_cost': 3.0, 'min_households': 2.0})
+
+
+def test_best_empty_results():
+    index = random_index(30, seed=3)
+    assert index.best('m', max_cost=-1.0) is None
+    assert index.best('m', min_cost=6.0) is None
+    assert index.best('m', False, max_cost=-1.0, min_households=0.0) is None
+    empty = FrontIndex(np.arange(4), np.zeros((0, 1), dtype=np.uint8), {name: [] for name in COLUMNS})
+    assert empty.best('m') is None
+    assert empty.best('m', max_cost=5.0) is None
+    with pytest.raises(ValueError, match='Unknown bound'):
+        index.best('m', max_rent=1.0)
+    with pytest.raises(ValueError, match='Unknown objective'):
+        index.best('rent')
+
+
+def test_save_load_and_front_columns(params, tmp_path):
+    graph = make_graph('grid', 20, seed=1)
+    rng = np.random.default_rng(1)
+    X = (rng.random((15, len(graph))) < 0.3).astype(float)
+    F = np.column_stack([-X.sum(axis=1), rng.random(15) * 1e6, -rng.random(15) * 50])
+    index = FrontIndex.build(graph, X, F, params)
+    np.testing.assert_allclose(index.columns['households'], X @ graph.households)
+    path = str(tmp_path / 'front_index.npz')
+    index.save(path)
+    loaded = FrontIndex.load(path)
+    for maximize in (True, False):
+        for bound in ({}, {'max_cost': 5e5}, {'min_households': 30.0}):
+            assert loaded.best('m', maximize, **bound) == index.best('m', maximize, **bound)
+    assert loaded.solution(3)['vacated_ids'] == graph.ids[X[3] != 0].tolist()
+
+
+@pytest.fixture
+def server():
+    server = make_server(random_index(40, seed=5), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_http_queries(server):
+    status, body = get(f"{server}/query?maximize=m&max_cost=3")
+    assert status == 200 and body['solution']['cost'] <= 3
+    status, body = get(f"{server}/summary")
+    assert status == 200 and body['solutions'] == 40
+    assert get(f"{server}/missing")[0] == 404
+
+
+@pytest.mark.parametrize('query', ['maximize=m&objective=cost', 'maximize=m&foo=1', 'maximize=m&max_cost=abc',
+                                   'maximize=m&minimize=cost', 'max_cost=3', 'maximize=rent',
+                                   'minimize=m&maximize_cost=1'])
+def test_http_bad_queries_are_400(server, query):
+    status, body = get(f"{server}/query?{query}")
+    assert status == 400
+    assert body['error']
@@ -0,0 +1,24 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from data_handler import load_compound_graph
+from genome import pack, unpack
+from problem_three import solve_front
+
+
+def test_pack_round_trip():
+    X = (np.random.default_rng(0).random((7, 21)) < 0.4).astype(float)
+    np.testing.assert_array_equal(unpack(pack(X), 21), X)
+
+
+@pytest.mark.parametrize('delta_evaluation', [False, True])
+def test_packed_and_dense_genomes_give_the_same_front(params, delta_evaluation):
+    graph = load_compound_graph(os.path.join(ROOT, 'templates', 'compounds.csv'))
+    params = dict(params, max_generations=30, population_size=40, delta_evaluation=delta_evaluation)
+    _, X_dense, F_dense, _ = solve_front(graph, dict(params, genome='dense'))
+    _, X_packed, F_packed, _ = solve_front(graph, dict(params, genome='packed'))
+    np.testing.assert_array_equal(X_packed, X_dense)
+    np.testing.assert_array_equal(F_packed, F_dense)
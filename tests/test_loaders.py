@@ -0,0 +1,108 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from compound_graph import CompoundGraph, parse_adjacency
+from conftest import ROOT, make_graph
+from data_handler import load_compound_graph, load_compounds, save_compound_graph
+
+
+def assert_same_graph(loaded, graph, alpha=True):
+    np.testing.assert_array_equal(loaded.ids, graph.ids)
+    np.testing.assert_allclose(loaded.area, graph.area)
+    np.testing.assert_array_equal(loaded.households, graph.households)
+    np.testing.assert_allclose(loaded.rent, graph.rent)
+    np.testing.assert_array_equal(loaded.indptr, graph.indptr)
+    np.testing.assert_array_equal(loaded.ids[loaded.indices], graph.ids[graph.indices])
+    if alpha:
+        np.testing.assert_allclose(loaded.alpha, graph.alpha)
+
+
+@pytest.fixture(params=['grid', 'asymmetric'])
+def graph(request):
+    return make_graph(request.param, 50, seed=4)
+
+
+@pytest.mark.parametrize('extension', ['csv', 'npz', 'parquet'])
+@pytest.mark.parametrize('chunksize', [None, 7])
+def test_file_round_trip(graph, extension, chunksize, tmp_path):
+    if extension == 'parquet':
+        pytest.importorskip('pyarrow')
+    if extension == 'npz' and chunksize:
+        pytest.skip("NPZ files are always read whole")
+    path = str(tmp_path / f"compounds.{extension}")
+    save_compound_graph(graph, path)
+    loaded = load_compound_graph(path, chunksize=chunksize)
+    assert_same_graph(loaded, graph)
+    if extension != 'csv':
+        assert loaded.fingerprint() == graph.fingerprint()
+
+
+def test_file_object_round_trip(graph):
+    buffer = io.BytesIO()
+    graph.save_npz(buffer)
+    buffer.seek(0)
+    assert_same_graph(load_compound_graph(buffer, file_format='npz'), graph)
+
+
+def test_frame_and_compounds_round_trip(graph):
+    assert_same_graph(CompoundGraph.from_frame(graph.to_frame()), graph)
+    assert_same_graph(CompoundGraph.from_compounds(graph.to_compounds()), graph)
+
+
+def test_frame_keeps_per_compound_alpha(graph):
+    varied = graph.with_alpha(np.linspace(2.0, 60.0, len(graph)))
+    assert_same_graph(CompoundGraph.from_frame(varied.to_frame()), varied)
+
+
+def test_template_loaders_agree():
+    path = os.path.join(ROOT, 'templates', 'compounds.csv')
+    graph = load_compound_graph(path)
+    assert_same_graph(CompoundGraph.from_compounds(load_compounds(path)), graph)
+    assert len(graph) == len(pd.read_csv(path))
+
+
+def test_parse_adjacency_mixed_rows():
+    values = ['[2, 3]', [1], '[ ]', (1, np.int32(2)), '[1, 2.0]', np.array([3.0])]
+    counts, flat = parse_adjacency(values)
+    np.testing.assert_array_equal(counts, [2, 1, 0, 2, 2, 1])
+    np.testing.assert_array_equal(flat, [2, 3, 1, 1, 2, 1, 2, 3])
+    assert flat.dtype == np.int64
+
+
+@pytest.mark.parametrize('value, message', [
+    ('[1, 2.5]', 'must be integers in compound 8'),
+    ([1, 2.5], 'must be integers in compound 8'),
+    ([True], 'must be integers in compound 8'),
+    (['1'], 'must be integers in compound 8'),
+    ('[1, 99999999999999999999]', 'out of the int64 range in compound 8'),
+    ('[9223372036854775808]', 'out of the int64 range in compound 8'),
+    ([2 ** 70], 'out of the int64 range in compound 8'),
+    ('[1, 2', 'Failed to parse adjacent for compound 8'),
+    ('5', 'must be a list in compound 8'),
+])
+def test_parse_adjacency_rejects_bad_rows(value, message):
+    with pytest.raises(ValueError, match=message):
+        parse_adjacency(['[2]', value, '[1]'], ids=[7, 8, 9])
+
+
+def test_parse_adjacency_keeps_int64_limits():
+    limit = np.iinfo(np.int64).max
+    counts, flat = parse_adjacency([f'[{limit}]', [-limit - 1]])
+    np.testing.assert_array_equal(flat, [limit, -limit - 1])
+
+
+@pytest.mark.parametrize('indptr, indices, message', [
+    ([0, 2, 1, 3], [1, 2, 0], 'non-decreasing'),
+    ([1, 1, 2, 2], [1, 2], 'start at 0'),
+    ([0, 1, 2, 2], [1, 3], 'out of range'),
+    ([0, 1, 2, 2], [1, -1], 'out of range'),
+    ([0, 1, 2, 2], [1, 2 ** 32], 'out of range'),
+    ([0, 1, 2], [1, 0], 'indptr does not match'),
+])
+def test_graph_rejects_malformed_csr(indptr, indices, message):
+    with pytest.raises(ValueError, match=message):
+        CompoundGraph([1, 2, 3], [1.0] * 3, [1] * 3, [1.0] * 3, [50.0] * 3, indptr, indices)
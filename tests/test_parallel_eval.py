@@ -0,0 +1,23 @@
+import numpy as np
+
+from conftest import make_graph
+from evaluation import PopulationEvaluator
+from genome import pack
+from parallel_eval import SharedGraphPool
+
+
+def test_pool_matches_serial_evaluation_and_reports_speedup(params):
+    graph = make_graph('grid', 100, seed=5)
+    X = (np.random.default_rng(5).random((40, len(graph))) < 0.2).astype(float)
+    serial = PopulationEvaluator.from_graph(graph, params)
+    with SharedGraphPool(graph, params, 2) as pool:
+        for got, expected in zip(pool.evaluate(X), serial.evaluate(X)):
+            np.testing.assert_array_equal(got, expected)
+        for got, expected in zip(pool.evaluate_packed(pack(X)), serial.evaluate_packed(pack(X))):
+            np.testing.assert_array_equal(got, expected)
+        report = pool.report()
+    assert pool.rows == 2 * len(X)
+    assert report['serial_time_per_individual'] > 0
+    assert report['speedup'] > 0
+    assert np.isclose(report['speedup'],
+                      report['serial_time_per_individual'] * pool.rows / report['evaluation_wall_time'])
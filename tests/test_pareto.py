@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from pareto import ParetoArchive, front_2d, non_dominated
+
+
+def brute_force(F):
+    """Indices of the non-dominated rows of F by pairwise comparison; duplicates keep their first row."""
+    keep = []
+    for i, a in enumerate(F):
+        dominated = any(np.all(b <= a) and np.any(b < a) for b in F)
+        duplicate = any(np.array_equal(F[j], a) for j in range(i))
+        if not dominated and not duplicate:
+            keep.append(i)
+    return np.array(keep, dtype=np.int64)
+
+
+def trade_off_points(rng, n):
+    """Integer 3-D points near the plane f1 + f2 + f3 = 14, so the front stays large."""
+    F = random_points(rng, n, 3)
+    F[:, 2] = 14 - F[:, 0] - F[:, 1] + rng.integers(0, 2, n)
+    return F
+
+
+def random_points(rng, n, n_obj):
+    """Integer points from a small range, so ties and exact duplicates are common."""
+    F = rng.integers(0, 8, (n, n_obj)).astype(float)
+    F[rng.integers(n, size=n // 5)] = F[rng.integers(n, size=n // 5)]
+    return F
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('n', [1, 2, 10, 150])
+def test_non_dominated_matches_brute_force(n, seed):
+    rng = np.random.default_rng(seed)
+    F = random_points(rng, n, 3)
+    np.testing.assert_array_equal(non_dominated(F), brute_force(F))
+    # 2-D points: a constant third objective
+    F2 = random_points(rng, n, 2)
+    np.testing.assert_array_equal(non_dominated(np.column_stack([F2, np.zeros(n)])), brute_force(F2))
+    # front_2d: minimal cost, maximal m
+    np.testing.assert_array_equal(np.sort(front_2d(F2[:, 0], -F2[:, 1])), brute_force(F2))
+
+
+def test_non_dominated_of_nothing():
+    assert len(non_dominated(np.zeros((0, 3)))) == 0
+    assert len(front_2d([], [])) == 0
+
+
+@pytest.mark.parametrize('max_size', [None, 1, 5, 20])
+def test_archive_holds_a_bounded_non_dominated_set(max_size):
+    rng = np.random.default_rng(7)
+    archive = ParetoArchive(max_size)
+    seen = []
+    for _ in range(30):
+        F = trade_off_points(rng, 25)
+        X = rng.integers(0, 2, (25, 6))
+        feasible = rng.random(25) < 0.8
+        archive.add(X, F, feasible)
+        seen.append(F[feasible])
+        assert len(archive.F) == len(archive.X)
+        assert max_size is None or len(archive) <= max_size
+        assert len(non_dominated(archive.F)) == len(archive)  # no dominated points or duplicates
+    if max_size is None:
+        # Unbounded, the archive is exactly the front of every feasible point added
+        front = np.vstack(seen)
+        front = front[brute_force(front)]
+        np.testing.assert_array_equal(np.unique(archive.F, axis=0), np.unique(front, axis=0))
+    else:
+        assert len(archive) == max_size
+        assert archive.pruned > 0
@@ -0,0 +1,22 @@
+import numpy as np
+
+from conftest import make_graph
+from problem_three import compute_problem_three, resummarize
+from result_cache import result_key
+
+
+def test_cached_front_is_resummarized_for_target_m(params):
+    graph = make_graph('grid', 40, seed=6)
+    params = dict(params, max_generations=10, target_m=0.0)
+    other = dict(params, target_m=40.0)
+    assert result_key('problem3', graph, params) == result_key('problem3', graph, other)
+    assert result_key('problem2', graph, params) == result_key('problem2', graph, other)
+    assert result_key('problem3', graph, params) != result_key('problem3', graph, dict(params, years=9))
+
+    stored = compute_problem_three(graph, params)
+    best, results, F = resummarize(graph, other, stored)
+    best_direct, results_direct, F_direct = compute_problem_three(graph, other)
+    np.testing.assert_array_equal(F, F_direct)
+    np.testing.assert_array_equal(best, best_direct)
+    for name in ('m', 'households', 'cost', 'profit', 'vacated_ids', 'cluster_groups'):
+        assert results[name] == results_direct[name]
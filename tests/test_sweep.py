@@ -0,0 +1,26 @@
+import os
+
+import pytest
+
+from conftest import ROOT
+from data_handler import load_compound_graph
+from problem_three import compute_problem_three
+from sweep import RESULT_COLUMNS, run_sweep
+
+
+@pytest.fixture
+def template():
+    return load_compound_graph(os.path.join(ROOT, 'templates', 'compounds.csv'))
+
+
+def test_rescaled_scenarios_match_direct_runs(template, params):
+    params = dict(params, max_generations=20, population_size=30)
+    table = run_sweep(template, params, {'cost_per_household': [50000, 80000], 'years': [10, 15]})
+    assert table['optimized'].tolist() == [True, False, False, False]
+    assert table['group'].nunique() == 1
+    for row in table.itertuples():
+        scenario = dict(params, cost_per_household=row.cost_per_household, years=row.years)
+        _, results, _ = compute_problem_three(template, scenario)
+        for name in RESULT_COLUMNS:
+            assert getattr(row, name) == pytest.approx(results[name], rel=1e-9)
+        assert row.vacated_ids == results['vacated_ids']
@@ -1,49 +1,114 @@
 import numpy as np
-import plotly.graph_objects as go
-import matplotlib.pyplot as plt
-import os
-
-def union_find(vacated, compounds):
-    """Union-find to check number of contiguous zones."""
-    parent = {v: v for v in vacated}
-    
-    def find(u):
-        if parent[u] != u:
-            parent[u] = find(parent[u])  # Path compression
-        return parent[u]
-    
-    for i in vacated:
-        for adj in compounds[i-1]['adjacent']:
-            if adj in vacated:
-                pu = find(i)
-                pv = find(adj)
-                if pu != pv:
-                    parent[pv] = pu
-    
-    roots = {find(u) for u in vacated}
-    return len(roots)
+from pareto import front_2d
+
+# Points drawn per interactive figure; larger fronts are downsampled (exports keep every point)
+MAX_PLOT_POINTS = 2000
 
 def plot_pareto_front(fval, filename="pareto_front.png"):
     """Plot 2D Pareto front."""
+    import matplotlib.pyplot as plt
     plt.figure(figsize=(8, 6))
     plt.scatter(-fval[:, 0], fval[:, 1]/1e4, c='blue', alpha=0.5)
     plt.xlabel('Vacated Compounds')
     plt.ylabel('Total Relocation Cost (10k Yuan)')
     plt.title('Pareto Front')
     plt.grid(True)
-    plt.savefig(filename)
+    plt.savefig(filename, format='png')
     plt.close()
 
 def plot_cost_effectiveness(households, m, best_h, best_m, filename="cost_effectiveness.png"):
-    """Plot cost-effectiveness vs. households."""
+    """Plot cost-effectiveness vs. households (filename may be a path or a binary buffer)."""
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(8, 6))
+    plt.plot(households, m, marker='o', markersize=3, label='m vs. Households')
+    plt.scatter([best_h], [best_m], s=80, c='red', zorder=3, label='Inflection Point')
+    plt.xlabel('Relocated Households')
+    plt.ylabel('Cost-effectiveness (m)')
+    plt.title('Cost-effectiveness vs. Relocated Households')
+    plt.legend()
+    plt.grid(True)
+    plt.savefig(filename, format='png')
+    plt.close()
+
+def downsample_front(vacated, cost, max_points=MAX_PLOT_POINTS):
+    """Sorted indices of at most max_points front points to draw.
+
+    The (max vacated, min cost) trade-off is always kept, evenly thinned only
+    if it alone exceeds half the budget; the remaining points are thinned to
+    one per cell of a grid over the plot area, so dense regions lose points
+    first.
+    """
+    vacated = np.asarray(vacated, dtype=float)
+    cost = np.asarray(cost, dtype=float)
+    n = len(cost)
+    if n <= max_points:
+        return np.arange(n)
+    front = front_2d(cost, vacated)
+    front = front[np.argsort(cost[front], kind='stable')]
+    if len(front) > max_points // 2:
+        front = front[np.unique(np.linspace(0, len(front) - 1, max_points // 2).round().astype(int))]
+    rest = np.setdiff1d(np.arange(n), front)
+    side = max(int(np.sqrt(max_points - len(front))), 1)
+    cells = _grid_cells(vacated[rest], side) * side + _grid_cells(cost[rest], side)
+    _, first = np.unique(cells, return_index=True)
+    return np.sort(np.concatenate([front, rest[first]]))
+
+
+def downsample_curve(x, y, max_points=MAX_PLOT_POINTS):
+    """Sorted indices of at most max_points points of a curve sorted by x.
+
+    Keeps the first and last point and the lowest and highest y of every x
+    bin, so peaks (such as the inflection point) survive the thinning.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    bins = _grid_cells(x, max(max_points // 2 - 1, 1))
+    order = np.lexsort((y, bins))
+    starts = np.flatnonzero(np.diff(bins[order], prepend=-1))
+    ends = np.append(starts[1:], n) - 1
+    return np.unique(np.concatenate([[0, n - 1], order[starts], order[ends]]))
+
+
+def _grid_cells(values, cells):
+    """Bin of every value among ``cells`` equal-width bins over the value range."""
+    low, high = (values.min(), values.max()) if len(values) else (0, 0)
+    if high <= low:
+        return np.zeros(len(values), dtype=np.int64)
+    return np.minimum(((values - low) / (high - low) * cells).astype(np.int64), cells - 1)
+
+
+def _points_title(title, shown, total):
+    return title if shown == total else f"{title} ({shown:,} of {total:,} points shown)"
+
+
+def pareto_front_figure(F, max_points=MAX_PLOT_POINTS):
+    """Interactive (WebGL) Pareto front figure, downsampled to max_points."""
+    import plotly.graph_objects as go
+    keep = downsample_front(-F[:, 0], F[:, 1], max_points)
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(x=-F[keep, 0], y=F[keep, 1]/1e4, mode='markers', name='Pareto Front'))
+    fig.update_layout(
+        xaxis_title='Vacated Compounds',
+        yaxis_title='Total Relocation Cost (10k Yuan)',
+        title=_points_title('Pareto Front', len(keep), len(F))
+    )
+    return fig
+
+
+def cost_effectiveness_figure(households, m, best_h, best_m, max_points=MAX_PLOT_POINTS):
+    """Interactive (WebGL) cost-effectiveness curve, downsampled to max_points."""
+    import plotly.graph_objects as go
+    keep = downsample_curve(households, m, max_points)
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=households, y=m, mode='lines+markers', name='m vs. Households'))
-    fig.add_trace(go.Scatter(x=[best_h], y=[best_m], mode='markers', name='Inflection Point',
-                             marker=dict(size=10, color='red')))
+    fig.add_trace(go.Scattergl(x=households[keep], y=m[keep], mode='lines+markers', name='m vs. Households'))
+    fig.add_trace(go.Scattergl(x=[best_h], y=[best_m], mode='markers', name='Inflection Point',
+                               marker=dict(size=10, color='red')))
     fig.update_layout(
-        title='Cost-effectiveness vs. Relocated Households',
         xaxis_title='Relocated Households',
         yaxis_title='Cost-effectiveness (m)',
-        showlegend=True
+        title=_points_title('Cost-effectiveness vs. Relocated Households', len(keep), len(households))
     )
-    fig.write_image(filename)
\ No newline at end of file
+    return fig